@@ -2,10 +2,11 @@
 import os
 import io
 import re
+import uuid
 import asyncio
 import contextlib
 from pathlib import Path
-from typing import Tuple, Any, Dict
+from typing import Tuple, Any, Dict, Optional
 
 import streamlit as st
 
@@ -23,6 +24,32 @@ import runner
 # Import the mock storage from your tools so we can inject uploaded resume text
 from tools.file_tools import MOCK_USER_FILES
 
+# Per-mission output capture (safe when several browser sessions run missions at once)
+from core.transcript import capture_output
+from core.mission_executor import MissionExecutor, collect_worker_state
+from core.http_client import connection_stats
+from core.models import cascade_stats
+from core.resilience import breaker_snapshot
+from core.aio import loop_monitor
+from core.trace_store import trace_store
+from core.profiling import list_profiles, load_profile
+from core.structured_output import structured_stats, validate_structured
+from core.single_flight import ThreadSingleFlight, flight_stats, normalize_request
+from core.context_cache import context_cache
+from core.metrics import DEFAULT_METRICS_HOST, metrics, start_metrics_server, ui_mission_seconds
+from agents.resume_agent import ResumeAnalysisResult
+from core.prefetch import PrefetchCancelled, ResumePrefetcher
+from tools.skill_extraction import extract_skills
+from tools.quiz_bank import quiz_bank
+from tools.batch_screening import BATCH_SCREENING_ROOT, DEFAULT_TOP_K, expand_archive, iter_resume_sources, resolve_screening_path, screen_resumes, suggest_rewrites, report_to_csv
+
+# Number of worker processes for missions (0 = run in the Streamlit process, as before)
+MISSION_WORKERS = int(os.getenv("MISSION_WORKERS", "0"))
+
+# Chat history bounds: messages kept in session state, and messages rendered per page
+CHAT_HISTORY_MAX_MESSAGES = 200
+CHAT_PAGE_SIZE = 20
+
 # -------------------------
 # Helper utilities
 # -------------------------
@@ -33,17 +60,74 @@ def run_async_and_capture_stdout(coro) -> Tuple[str, Exception]:
     Returns tuple (captured_text, exception_or_None).
     Uses asyncio.run() so it runs synchronously from Streamlit.
     """
-    buf = io.StringIO()
     exc = None
-    try:
-        with contextlib.redirect_stdout(buf):
+    with capture_output() as buf:
+        try:
             asyncio.run(coro)
-    except Exception as e:
-        # capture exception message in buffer too so user can see
-        buf.write(f"\n[ERROR] Exception while running mission: {e}\n")
-        exc = e
+        except Exception as e:
+            # capture exception message in buffer too so user can see
+            buf.write(f"\n[ERROR] Exception while running mission: {e}\n")
+            exc = e
     return buf.getvalue(), exc
 
+@st.cache_resource
+def get_mission_executor() -> MissionExecutor:
+    """One process pool per Streamlit server, shared by all browser sessions."""
+    executor = MissionExecutor(num_workers=MISSION_WORKERS).start()
+    metrics.gauge_callback("mission_queue_depth", "Missions waiting for a worker process.", executor.queue_depth)
+    return executor
+
+@st.cache_resource
+def get_resume_prefetcher() -> ResumePrefetcher:
+    """
+    Background resume pre-processing shared by all browser sessions.
+    Memory indexing targets the in-process Runner's memory service; with a worker pool the
+    mission carries the resume as a payload handle instead (workers have their own memory).
+    """
+    if MISSION_WORKERS > 0:
+        return ResumePrefetcher()
+    return ResumePrefetcher(memory_service=runner.memory_service, app_name=runner.APP_NAME)
+
+@st.cache_resource
+def get_metrics_server():
+    """Prometheus /metrics endpoint, started once per Streamlit server when METRICS_PORT is set (bound to METRICS_HOST)."""
+    port = os.getenv("METRICS_PORT")
+    return start_metrics_server(int(port), host=os.getenv("METRICS_HOST", DEFAULT_METRICS_HOST)) if port else None
+
+@st.cache_resource
+def get_dispatch_flight() -> ThreadSingleFlight:
+    """Shared by all browser sessions, so their identical in-flight missions run once."""
+    return ThreadSingleFlight("dispatch_mission")
+
+def dispatch_mission(mission: str, user_id: str, session_id: Optional[str] = None, tab: str = "other") -> Tuple[str, Exception]:
+    """
+    Runs a mission either in-process or on the worker pool (MISSION_WORKERS > 0).
+    The pool routes by session_id (or user_id) so multi-turn chats stay on one worker.
+    Missions are profiled when the Debug / Logs toggle is on (results under output/profiles).
+    Identical missions already in flight (same user, session and normalized text - e.g. a
+    double-click) wait for that run and share its transcript instead of starting another.
+    The latency the user waited is recorded per tab (ui_mission_seconds).
+    Returns tuple (captured_text, exception_or_None).
+    """
+    profile = bool(st.session_state.get("profile_missions", False))
+    key = normalize_request(user_id, session_id or "", mission, profile)
+    with ui_mission_seconds.time(tab=tab, outcome="error") as labels:
+        raw_out, exc = get_dispatch_flight().do(key, lambda: _dispatch_mission(mission, user_id, session_id, profile))
+        if exc is None:
+            labels["outcome"] = "ok"
+    return raw_out, exc
+
+def _dispatch_mission(mission: str, user_id: str, session_id: Optional[str], profile: bool) -> Tuple[str, Exception]:
+    if MISSION_WORKERS <= 0:
+        return run_async_and_capture_stdout(runner.run_mission(mission, user_id=user_id, session_id=session_id, profile=profile))
+    try:
+        # Workers are separate interpreters: the uploaded resume and other user state go with the job
+        raw_out, error = get_mission_executor().run(mission, user_id=user_id, session_id=session_id, profile=profile,
+                                                    worker_state=collect_worker_state(user_id))
+    except Exception as e:
+        return f"\n[ERROR] Exception while running mission: {e}\n", e
+    return raw_out, (RuntimeError(error) if error else None)
+
 def extract_final_response(raw_output: str) -> Tuple[str, str]:
     """
     Extracts the main assistant final message from the raw printed logs.
@@ -81,6 +165,17 @@ def extract_final_response(raw_output: str) -> Tuple[str, str]:
     
     return final_text, rest
 
+def extract_structured_result(raw_output: str, agent_name: str, schema):
+    """
+    Returns the typed result a sub-agent with an output_schema produced during the mission
+    (printed by run_mission as '[STRUCTURED RESULT] <agent> > {json}'), or None.
+    """
+    matches = re.findall(rf"^\[STRUCTURED RESULT\] {re.escape(agent_name)} > (.*)$", raw_output, re.M)
+    if not matches:
+        return None
+    result = validate_structured(matches[-1], schema)
+    return result.value
+
 # --- NOTE: Removed chat_bubble and sanitize_for_html functions ---
 
 # -------------------------
@@ -108,32 +203,64 @@ with st.sidebar:
     
     if st.button("Clear chat history"):
         st.session_state["chat_history"] = []
+        st.session_state["chat_session_id"] = f"chat_{uuid.uuid4().hex[:8]}"
 
 # init chat history if missing
 if "chat_history" not in st.session_state:
-    st.session_state["chat_history"] = [] # list of dicts: {"sender":"user"|"agent","text":..., "raw":...}
+    # list of dicts: {"sender":"user"|"agent","text":..., "trace_id":...}; raw logs live in the trace store
+    st.session_state["chat_history"] = []
+
+# one ADK session per browser session so the chat tab is genuinely multi-turn
+if "chat_session_id" not in st.session_state:
+    st.session_state["chat_session_id"] = f"chat_{uuid.uuid4().hex[:8]}"
+
+# optional Prometheus endpoint (no-op unless METRICS_PORT is set)
+get_metrics_server()
 
 # Tabs (Note: st.tabs returns a list/sequence)
-tabs = st.tabs(["Chat (Multi-Turn)", "Resume Analyzer", "Coach & Layoff Pitch", "Debug / Logs"])
+tabs = st.tabs(["Chat (Multi-Turn)", "Resume Analyzer", "Coach & Layoff Pitch", "Recruiter Batch Screening", "Debug / Logs"])
 
 # -------------------------
 # TAB 1: Multi-turn Chat (Index 0)
 # -------------------------
 
-with tabs[0]: 
+@st.fragment
+def render_chat_tab(user_id: str) -> None:
+    """
+    Chat tab as a fragment: typing, sending and paging only rerun this function,
+    not the whole app, so render time does not grow with the other tabs or the history.
+    """
     st.subheader("Tutor / Research Agent — Multi-Turn Chat")
     st.write("Use this tab to interact with the **Tutor Agent** (conceptual quizzes) or the **Research Agent** (market trends).")
 
+    history = st.session_state["chat_history"]
+
+    # Only one page of messages is rendered per rerun (newest page by default)
+    num_pages = max(1, -(-len(history) // CHAT_PAGE_SIZE))
+    page = 1
+    if num_pages > 1:
+        page = st.number_input(
+            f"History page (1 = latest, {num_pages} pages)", min_value=1, max_value=num_pages, value=1, key="chat_page"
+        )
+    end = len(history) - (page - 1) * CHAT_PAGE_SIZE
+    start = max(0, end - CHAT_PAGE_SIZE)
+
     # Display chat history in simple windows/text blocks
     history_box = st.container()
     with history_box:
-        for msg in st.session_state["chat_history"]:
+        if start > 0:
+            st.caption(f"{start} earlier messages on older pages.")
+        for i in range(start, end):
+            msg = history[i]
             sender = msg["sender"].capitalize()
             # Use st.expander or st.markdown for simple display without custom HTML styling
             if sender == 'User':
                 st.markdown(f"**👤 You:** {msg['text']}")
             else:
                 st.info(msg['text'], icon="🧠")
+                # Raw logs are loaded from disk only when asked for
+                if msg.get("trace_id") and st.toggle("Show raw log", key=f"raw_{msg['trace_id']}"):
+                    st.code(trace_store.load(msg["trace_id"]) or "(Trace no longer available.)")
             st.markdown("---")
 
     # Input row
@@ -146,7 +273,7 @@ with tabs[0]:
 
     if send_btn and user_message.strip():
         # append user message to history
-        st.session_state["chat_history"].append({"sender": "user", "text": user_message})
+        history.append({"sender": "user", "text": user_message})
 
         # build mission for a chat continuation style:
         mission = (
@@ -158,7 +285,7 @@ with tabs[0]:
 
         # run the orchestrator and capture raw output synchronously
         with st.spinner("Running orchestrator and delegating task..."):
-            raw_out, exc = run_async_and_capture_stdout(runner.run_mission(mission))
+            raw_out, exc = dispatch_mission(mission, user_id, session_id=st.session_state["chat_session_id"], tab="chat")
         
         final_text, rest_logs = extract_final_response(raw_out)
 
@@ -166,16 +293,26 @@ with tabs[0]:
         if not final_text.strip():
             # include either raw_out or a friendly message
             if exc is not None:
-                final_text = f"[Agent error] {str(exc)}\n\n(See Debug logs tab for raw output.)"
+                final_text = f"[Agent error] {str(exc)}\n\n(Use 'Show raw log' below for the raw output.)"
             else:
                 # try to show some last lines of raw output
                 final_text = "(No final response detected.)\n\nRaw logs preview:\n" + "\n".join(raw_out.splitlines()[-12:])
 
-        # append agent reply and keep raw logs attached
-        st.session_state["chat_history"].append({"sender": "agent", "text": final_text, "raw": raw_out})
+        # append agent reply; the raw log is spilled to the trace store and referenced by id
+        trace_id = trace_store.save(raw_out, prefix=st.session_state["chat_session_id"])
+        history.append({"sender": "agent", "text": final_text, "trace_id": trace_id})
+
+        # Bound per-session memory: the ADK session (with compaction) keeps the context, not this list
+        if len(history) > CHAT_HISTORY_MAX_MESSAGES:
+            del history[:len(history) - CHAT_HISTORY_MAX_MESSAGES]
+        st.session_state.pop("chat_page", None) # jump back to the latest page
 
-        # Rerun to display updated history and clear input
-        st.rerun()
+        # Rerun only this fragment to display updated history
+        st.rerun(scope="fragment")
+
+
+with tabs[0]: 
+    render_chat_tab(user_id)
 
 # -------------------------
 # TAB 2: Resume Analyzer (Index 1)
@@ -188,6 +325,14 @@ with tabs[1]:
     st.write("Upload resume (.txt preferred). Resume text will be stored in the agent's mock memory and analyzed against a pasted Job Description (JD).")
     
     uploaded_file = st.file_uploader("Upload resume file (.txt, .pdf, .docx)", type=["txt", "pdf", "docx"])
+
+    # Speculative prefetch: extraction, sectioning, skill extraction and memory indexing start
+    # on upload, while the JD is still being typed. A re-upload cancels the previous job.
+    prefetch_key = f"{st.session_state['chat_session_id']}:{user_id}"
+    if uploaded_file:
+        prefetch_job = get_resume_prefetcher().start(prefetch_key, uploaded_file.name, uploaded_file.getvalue(), user_id)
+        st.caption(f"Resume pre-processing: {prefetch_job.stage}")
+
     jd_text = st.text_area("Paste Target Job Description (JD) here:", height=200)
     
     analyze_btn = st.button("Analyze Resume vs JD", key="analyze_resume")
@@ -198,36 +343,60 @@ with tabs[1]:
         elif not jd_text.strip():
             st.warning("Please paste the Job Description to compare against.")
         else:
-            filename = uploaded_file.name.lower()
             try:
-                if filename.endswith(".txt"):
-                    resume_text = uploaded_file.read().decode("utf-8", errors="ignore")
-                else:
-                    resume_bytes = uploaded_file.read()
-                    # Simple decode fallback for non-text files
-                    resume_text = resume_bytes.decode("utf-8", errors="ignore")
-                st.info("Non-txt upload: text extraction may be imperfect. Using raw text extraction.")
-
-            except Exception as e:
+                # Usually already finished; otherwise only the remaining stages are awaited
+                with st.spinner("Finishing resume pre-processing..."):
+                    insights = prefetch_job.result(timeout=120)
+                resume_text = insights.text
+                if insights.extraction_flags:
+                    st.info("Text extraction notes: " + "; ".join(insights.extraction_flags))
+            except Exception as e: # includes PrefetchCancelled / extraction failures
+                insights = None
                 resume_text = f"[ERROR extracting upload: {e}]"
 
             # Inject into mock memory used by tools.file_tools
             MOCK_USER_FILES["user:resume:raw"] = resume_text
             st.success("Resume uploaded successfully to mock storage (ADK Memory Tool ready).")
 
+            # JD-dependent part computed now; the resume side comes from the prefetch
+            prefetched_context = ""
+            if insights is not None:
+                jd_skills = extract_skills(jd_text)
+                prefetched_context = (
+                    "Pre-computed resume facts (local extraction, reuse instead of re-parsing):\n"
+                    f"- Resume sections: {', '.join(insights.sections)}\n"
+                    f"- Resume skills: {', '.join(insights.skills) or 'none detected'}\n"
+                    f"- JD skills found in resume: {', '.join(sorted(jd_skills & set(insights.skills))) or 'none'}\n"
+                    f"- JD skills missing from resume: {', '.join(sorted(jd_skills - set(insights.skills))) or 'none'}\n"
+                    f"- Full resume text: payload handle '{insights.payload['handle']}' ({insights.payload['size_chars']:,} chars, readable with read_chunk)"
+                    + (" and indexed in memory as 'user:resume'" if insights.memory_passages else "")
+                    + "\n\n"
+                )
+
             mission = (
                 "TASK: resume_review\n"
                 f"User ID: {user_id}\n"
                 "Action: Ask ResumeTailorAgent to analyze the user's resume (from memory/file tools) against the following Job Description and return a structured summary (match score, top missing skills, suggested rewrites).\n\n"
+                f"{prefetched_context}"
                 "Job Description:\n"
                 f"{jd_text}\n\n"
                 "Please produce a concise ATS score summary and suggested ATS-friendly rewrite snippets."
             )
 
             with st.spinner("Analyzing resume (calling ResumeTailorAgent via orchestrator)..."):
-                raw_out, exc = run_async_and_capture_stdout(runner.run_mission(mission))
+                raw_out, exc = dispatch_mission(mission, user_id, tab="resume")
 
             final_text, rest_logs = extract_final_response(raw_out)
+            analysis = extract_structured_result(raw_out, "ResumeTailorAgent", ResumeAnalysisResult)
+
+            # Typed ResumeAnalysisResult (schema-constrained output of ResumeTailorAgent)
+            if analysis is not None:
+                st.metric("ATS Match Score", f"{analysis.match_score}/100")
+                col_found, col_gaps, col_risks = st.columns(3)
+                col_found.markdown("**Skills found**\n" + "".join(f"\n- {s}" for s in analysis.required_skills_found))
+                col_gaps.markdown("**Skill gaps**\n" + "".join(f"\n- {s}" for s in analysis.skill_gaps_flagged))
+                col_risks.markdown("**ATS risks**\n" + "".join(f"\n- {s}" for s in analysis.ats_risk_flags))
+                st.markdown(f"**Suggested rewrite:** {analysis.suggested_rewrite_summary}")
 
             # show cleaned answer in a simple text area
             st.markdown("**ATS Analysis Result:**")
@@ -238,7 +407,7 @@ with tabs[1]:
                 st.code(raw_out)
 
             # Offer follow-up action if we got analysis: generate ATS resume
-            if final_text and ("Match Score" in final_text or "match score" in final_text.lower()):
+            if analysis is not None:
                 if st.button("Generate ATS-friendly Resume (based on suggestions)"):
                     follow_mission = (
                         "TASK: generate_ats\n"
@@ -247,7 +416,7 @@ with tabs[1]:
                     )
 
                     with st.spinner("Generating ATS-friendly resume..."):
-                        raw_out2, exc2 = run_async_and_capture_stdout(runner.run_mission(follow_mission))
+                        raw_out2, exc2 = dispatch_mission(follow_mission, user_id, tab="resume")
                         final_text2, rest2 = extract_final_response(raw_out2)
 
                     st.markdown("**Generated ATS Resume (preview):**")
@@ -279,7 +448,7 @@ with tabs[2]:
             )
 
             with st.spinner("Generating pitch via CoachAgent (may include LRO pause)..."):
-                raw_out, exc = run_async_and_capture_stdout(runner.run_mission(mission))
+                raw_out, exc = dispatch_mission(mission, user_id, tab="coach")
 
             final_text, rest_logs = extract_final_response(raw_out)
 
@@ -295,10 +464,75 @@ with tabs[2]:
                 st.code(raw_out)
 
 # -------------------------
-# TAB 4: Debug / Logs (Index 3)
+# TAB 4: Recruiter Batch Screening (Index 3)
 # -------------------------
 
-with tabs[3]: 
+def _is_screening_path(path: str) -> bool:
+    """Browser users may only point the screener at BATCH_SCREENING_ROOT, never at arbitrary server paths."""
+    try:
+        resolve_screening_path(path)
+        return True
+    except ValueError:
+        return False
+
+
+with tabs[3]:
+    st.subheader("Recruiter Mode: Batch-Score Resumes Against One JD")
+    st.info("All resumes are scored locally in one pass (skill bitsets, no LLM). The **ResumeTailorAgent** is only called for the top-k candidates' rewrite suggestions.")
+
+    batch_files = st.file_uploader(
+        "Upload resumes or a .zip archive (.txt, .md, .pdf, .docx)",
+        type=["txt", "md", "pdf", "docx", "zip"], accept_multiple_files=True, key="batch_files",
+    )
+    batch_dir = st.text_input(f"...or a directory / .zip path under `{BATCH_SCREENING_ROOT}` on the server:", key="batch_dir")
+    batch_jd = st.text_area("Job Description for this requisition:", height=180, key="batch_jd")
+    col1, col2 = st.columns(2)
+    with col1:
+        top_k = st.number_input("Top-k candidates for LLM rewrite suggestions", min_value=0, max_value=25, value=DEFAULT_TOP_K)
+    with col2:
+        run_rewrites = st.checkbox("Generate rewrite suggestions for the top-k (LLM)", value=False)
+
+    if st.button("Score all resumes", key="score_batch"):
+        if not batch_jd.strip():
+            st.warning("Please paste the Job Description to score against.")
+        elif not batch_files and not batch_dir.strip():
+            st.warning("Please upload resumes or enter a directory path.")
+        elif batch_dir.strip() and not _is_screening_path(batch_dir.strip()):
+            st.error(f"Only paths under `{BATCH_SCREENING_ROOT}` can be screened from the web UI.")
+        else:
+            sources = [item for f in (batch_files or []) for item in expand_archive(f.name, f.getvalue())]
+            if batch_dir.strip():
+                sources.extend(iter_resume_sources(resolve_screening_path(batch_dir.strip())))
+            with st.spinner(f"Extracting and scoring {len(sources)} resumes..."):
+                report = screen_resumes(sources, batch_jd)
+            if run_rewrites and top_k > 0 and report["rows"]:
+                with st.spinner(f"Asking ResumeTailorAgent for rewrite suggestions (top {top_k})..."):
+                    with capture_output():
+                        asyncio.run(suggest_rewrites(report, batch_jd, top_k=int(top_k), user_id=user_id))
+            report.pop("texts", None)  # Keep session state small: the table is all the UI needs
+            st.session_state["batch_report"] = report
+
+    batch_report = st.session_state.get("batch_report")
+    if batch_report:
+        stats = batch_report["stats"]
+        st.caption(
+            f"{stats['resumes']} resumes | text cache hits: {stats['text_cache_hits']} | "
+            f"extraction {stats['extract_s']:.2f}s | scoring {stats['score_s'] * 1000:.1f} ms"
+        )
+        st.write(f"**JD required:** {', '.join(batch_report['jd_required']) or '-'}  \n"
+                 f"**JD preferred:** {', '.join(batch_report['jd_preferred']) or '-'}")
+        st.dataframe(
+            [{k: ", ".join(v) if isinstance(v, list) else v for k, v in row.items()} for row in batch_report["rows"]],
+            column_order=["rank", "candidate", "match_score", "skill_gaps_flagged", "preferred_missing",
+                          "required_skills_found", "ats_risk_flags", "suggested_rewrite_summary"],
+        )
+        st.download_button("Download ranked table (CSV)", report_to_csv(batch_report), file_name="screening_results.csv")
+
+# -------------------------
+# TAB 5: Debug / Logs (Index 4)
+# -------------------------
+
+with tabs[4]: 
     st.subheader("Debug / Diagnostics (Observability Demo)")
     st.write("Inspect tool memory and run basic health checks to demonstrate **Day 4 Observability** principles.")
 
@@ -313,9 +547,93 @@ with tabs[3]:
     if st.button("Run a health check mission"):
         mission = "TASK: health_check\nAction: Please respond with 'OK' from the orchestrator."
         with st.spinner("Running health check..."):
-            raw_out, exc = run_async_and_capture_stdout(runner.run_mission(mission))
+            raw_out, exc = dispatch_mission(mission, user_id, tab="debug")
         st.code(raw_out)
 
+    if st.button("Show HTTP connection pool stats"):
+        # In worker-pool mode each process keeps its own pool; this shows the UI process only.
+        st.json(connection_stats.snapshot())
+
+    if st.button("Show model cascade stats"):
+        # Escalations to the larger model and estimated latency saved by serving the fast model
+        st.json({label: stats.snapshot() for label, stats in cascade_stats.items()} or "No cascaded calls yet.")
+
+    if st.button("Show circuit breakers"):
+        st.json(breaker_snapshot() or "No breakers created yet.")
+
+    if st.button("Show event-loop lag report"):
+        # Stalls of the mission event loop and the (sync) tools that were running at the time
+        st.json(loop_monitor.summary())
+
+    # --- Mission profiling ---
+    st.markdown("---")
+    st.toggle(
+        "Profile missions from this browser session (cProfile + wall-clock/await breakdown)",
+        key="profile_missions",
+    )
+    saved_profiles = list_profiles()
+    if saved_profiles:
+        chosen_profile = st.selectbox("Saved mission profiles (newest first)", saved_profiles[:50])
+        report = load_profile(chosen_profile)
+        if report:
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Wall clock", f"{report['wall_s']:.2f}s")
+            c2.metric("Loop CPU (local work)", f"{report['loop_cpu_s']:.2f}s")
+            c3.metric("Awaiting", f"{report['await_s']:.2f}s")
+            c4.metric("Model calls", f"{report['model_s']:.2f}s")
+            st.caption(
+                f"Sub-agents: {report['sub_agent_s']:.2f}s | Tools: {report['tool_s']:.2f}s | "
+                f"Session bookkeeping: {report['session_s']:.3f}s {report.get('note', '')}"
+            )
+            st.dataframe([{"span": k, **v} for k, v in report["spans"].items()])
+            st.write("Top hotspots (self time on the event-loop thread):")
+            st.dataframe(report["hotspots"])
+    st.markdown("---")
+
+    if st.button("Show structured output stats"):
+        # Schema-validated agent answers: valid as-is / repaired locally / unrepairable
+        st.json(structured_stats or "No structured outputs yet.")
+
+    if st.button("Show context cache stats"):
+        # Cached prefixes per agent/resume version: hits, refreshes, invalidations (UI process only in worker-pool mode)
+        st.json(context_cache.snapshot())
+
+    # --- Live metrics ---
+    st.markdown("---")
+    st.write("**Metrics** (this process; also served as Prometheus text on /metrics when METRICS_PORT is set)")
+    live_metrics = st.toggle("Live refresh (every 5s)", key="live_metrics")
+
+    @st.fragment(run_every=5 if live_metrics else None)
+    def metrics_panel():
+        snapshot = metrics.snapshot()
+        if snapshot["latencies"]:
+            st.dataframe([{**row, "labels": ", ".join(f"{k}={v}" for k, v in row["labels"].items())} for row in snapshot["latencies"]])
+        if snapshot["scalars"]:
+            st.dataframe([{**row, "labels": ", ".join(f"{k}={v}" for k, v in row["labels"].items())} for row in snapshot["scalars"]])
+        if not snapshot["latencies"] and not snapshot["scalars"]:
+            st.caption("No metrics recorded yet.")
+        with st.expander("Prometheus text"):
+            st.code(metrics.render_prometheus(), language="text")
+
+    metrics_panel()
+    st.markdown("---")
+
+    if st.button("Show single-flight stats"):
+        # executions = real runs, coalesced = duplicate requests that awaited one of them
+        st.json(flight_stats())
+
+    if st.button("Show session compaction stats"):
+        # Sliding-window compaction of long chat sessions (UI process only in worker-pool mode)
+        st.json(runner.session_service.stats)
+
+    if st.button("Show quiz bank stats"):
+        st.json(quiz_bank.stats())
+
+    if MISSION_WORKERS > 0 and st.button("Show mission worker pool status"):
+        executor = get_mission_executor()
+        st.write(f"Queue depth: {executor.queue_depth()} | Workers recycled: {executor.recycled}")
+        st.dataframe(executor.stats())
+
     st.markdown(
 """
 **Common issues & tips**
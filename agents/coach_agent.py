@@ -3,9 +3,9 @@
 
 import os
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from core.models import PooledGemini # Gemini on the shared, pooled HTTP client
 from google.genai import types
-from google.adk.tools import load_memory # <-- ADD the working tool
+from tools.memory_tools import load_memory # Built-in load_memory tool + single-flight coalescing of identical searches
 from google.adk.tools.tool_context import ToolContext
 from google.adk.tools.function_tool import FunctionTool
 from typing import Dict, Any
@@ -70,14 +70,14 @@ def request_human_review(document_type: str, document_draft: str, tool_context:
 # --- Agent Definition (The Brain) ---
 
 coach_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=PooledGemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
     name="CareerCoachAgent",
     description="A specialized agent providing pitch coaching for interviews, managing sensitive career narratives (e.g., layoffs), and implementing human-in-the-loop approval for high-stakes actions.",
-    instruction=f"""
+    instruction="""
     You are the Career Coach Agent. Your mission is to build user confidence and prepare them for sensitive conversations.
 
     CRITICAL BEHAVIOR:
-    1. Retrieval: ALWAYS use the '{load_memory}' tool first to retrieve the user's career history, sensitive notes (like layoff reasons, past review comments), and known skill gaps (Day 3 principle).
+    1. Retrieval: ALWAYS use the 'load_memory' tool first to retrieve the user's career history, sensitive notes (like layoff reasons, past review comments), and known skill gaps (Day 3 principle).
     2. Drafting: Use the 'generate_pitch_narrative' tool to create the initial draft pitch or narrative.
     3. Approval: After creating a sensitive document (like a layoff pitch, or final resume), you MUST IMMEDIATELY use the 'request_human_review' tool. Do NOT release the final document until approval status is 'approved'.
     4. Task: If the user asks for mock interview practice, simulate a 5-minute scenario and score their response (LLM-as-a-Judge approach).
@@ -3,9 +3,18 @@
 
 import os
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from core.models import PooledGemini # Gemini on the shared, pooled HTTP client
 from google.genai import types
-from google.adk.tools import load_memory # <-- ADD the working tool
+from tools.memory_tools import load_memory # Built-in load_memory tool + single-flight coalescing of identical searches
+from google.adk.tools.tool_context import ToolContext
+from typing import Any, Dict, List, Optional
+
+# Local quiz bank (repeat topics are served without an LLM round trip)
+from tools.quiz_bank import quiz_bank, format_quiz
+# Local skill-prerequisite graph planner (the LLM only explains the computed plan)
+from tools.study_planner import plan_study
+
+import json
 
 # Load environment variables for configuration
 # Assuming GOOGLE_API_KEY is available via os.environ (loaded by runner.py)
@@ -20,7 +29,7 @@ retry_config = types.HttpRetryOptions(
 
 # --- Define Internal Tools (Demonstrates Day 2 custom tool integration) ---
 
-def create_short_quiz(topic: str, num_questions: int = 3) -> str:
+def create_short_quiz(topic: str, num_questions: int = 3, tool_context: Optional[ToolContext] = None) -> str:
     """
     Generates a brief, multiple-choice quiz about a specific Data Science or Machine Learning topic
     to test the user's understanding.
@@ -30,27 +39,97 @@ def create_short_quiz(topic: str, num_questions: int = 3) -> str:
     Returns:
         A structured string containing the quiz questions and answers.
     """
+    # 1. Serve from the local quiz bank: questions this user has not seen yet, no LLM needed.
+    topic_key = quiz_bank.resolve(topic)
+    if topic_key is not None:
+        # 'user:' state is shared across all of this user's sessions (Day 3 memory scoping).
+        state_key = f"user:quiz_served:{topic_key}"
+        if tool_context is not None:
+            served = list(tool_context.state.get(state_key, []))
+        else:
+            served = quiz_bank.served_ids("local", topic_key)
+        questions = quiz_bank.sample(topic_key, num_questions, served)
+        if questions is not None:
+            served.extend(q["id"] for q in questions)
+            if tool_context is not None:
+                tool_context.state[state_key] = served
+            return f"QUIZ_BANK_HIT: Present this quiz to the user as-is.\n\n{format_quiz(topic_key, questions)}"
+
+    # 2. Miss (new topic) or bank exhausted for this user: fall back to LLM generation.
     # NOTE: In a real system, this function would use an external API or code execution tool
     # to guarantee code examples and accurate questions. Here we rely on the LLM.
-    return f"REQUEST: Generate a {num_questions}-question diagnostic quiz on the topic: {topic}. Output in Markdown format."
+    return (
+        f"REQUEST: Generate a {num_questions}-question diagnostic quiz on the topic: {topic}. Output in Markdown format. "
+        "Then call 'save_quiz_to_bank' with the same questions so future requests are served instantly."
+    )
+
+
+def save_quiz_to_bank(topic: str, questions: List[Dict[str, Any]]) -> str:
+    """
+    Stores freshly generated quiz questions in the local quiz bank.
+    Args:
+        topic: The topic the quiz was generated for.
+        questions: One object per question with keys 'question', 'options' (list of strings),
+            'answer' (e.g. 'B') and 'explanation'.
+    Returns:
+        A confirmation with the number of new questions stored.
+    """
+    added = quiz_bank.add(topic, questions, source="llm")
+    return f"QUIZ_BANK_SAVED: {added} new question(s) stored for topic '{topic}'."
+
+def build_study_plan(
+    skill_gaps: Optional[List[str]] = None,
+    days: int = 14,
+    hours_per_day: float = 2.0,
+    tool_context: Optional[ToolContext] = None,
+) -> Dict[str, Any]:
+    """
+    Computes a day-by-day study plan for a set of skill gaps: adds missing prerequisites,
+    orders topics so prerequisites come first, and packs them into daily time budgets.
+    Args:
+        skill_gaps: Skills to close (e.g. ['Gradient Boosting', 'A/B Testing']). Leave empty to reuse
+            the gaps flagged by the last resume analysis.
+        days: Length of the plan in days (default is 14).
+        hours_per_day: Study time available per day (default is 2.0).
+    Returns:
+        A dictionary with the ordered skills, the per-day schedule and any skills that did not fit.
+    """
+    known_skills: List[str] = []
+    # Reuse ResumeAnalysisResult fields saved by the Resume Tailor Agent (output_key) when available.
+    analysis = tool_context.state.get("user:resume_analysis") if tool_context is not None else None
+    if isinstance(analysis, str):
+        try:
+            analysis = json.loads(analysis)
+        except ValueError:
+            analysis = None
+    if isinstance(analysis, dict):
+        known_skills = list(analysis.get("required_skills_found", []))
+        if not skill_gaps:
+            skill_gaps = list(analysis.get("skill_gaps_flagged", []))
+    if not skill_gaps:
+        return {"status": "error", "message": "No skill gaps given and no previous resume analysis found. Ask the user for target skills."}
+    return plan_study(skill_gaps, days=days, hours_per_day=hours_per_day, known_skills=known_skills)
 
 # --- Agent Definition (The Brain) ---
 
 ds_tutor_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=PooledGemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
     name="DataScienceTutorAgent",
     description="A specialized agent dedicated to teaching, quizzing, and diagnosing conceptual gaps in Data Science, Machine Learning, and technical interview topics.",
-    instruction=f"""
+    instruction="""
     You are the Data Science Tutor Agent. Your goal is to ensure the user fully masters complex DS/ML concepts.
     
     CRITICAL BEHAVIOR:
-    1. Retrieval: ALWAYS use the '{load_memory}' tool before responding to automatically load the user's recorded skill profile, study history, and known gaps from long-term memory.
+    1. Retrieval: ALWAYS use the 'load_memory' tool before responding to automatically load the user's recorded skill profile, study history, and known gaps from long-term memory.
     2. Teaching: Explain concepts clearly, providing code examples (when relevant), and adjust complexity based on the retrieved user skill level.
-    3. Assessment: When asked to diagnose a skill or create practice problems, you MUST first use the 'create_short_quiz' tool. If the user asks for a study plan, generate a 2-week plan tailored to their known skill gaps.
-    4. Conciseness: Keep core explanations under 400 words.
+    3. Assessment: When asked to diagnose a skill or create practice problems, you MUST first use the 'create_short_quiz' tool. If it returns QUIZ_BANK_HIT, present that quiz unchanged; if it returns a REQUEST, write the quiz and then store it with 'save_quiz_to_bank'.
+    4. Study Plans: If the user asks for a study plan, you MUST call 'build_study_plan' (pass their skill gaps, or leave them empty to reuse the last resume analysis). Present the computed day-by-day schedule as-is and only add a one-line explanation and a resource suggestion per topic; do not reorder or invent days.
+    5. Conciseness: Keep core explanations under 400 words.
     """,
     tools=[
         create_short_quiz, # Day 2 custom function tool
+        save_quiz_to_bank, # Grows the local quiz bank on misses
+        build_study_plan, # Local DAG planner for 2-week study plans
         load_memory, # <-- Corrected tool name for memory access
     ],
     # Configuration to ensure agent is discoverable by the Orchestrator
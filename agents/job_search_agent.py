@@ -3,9 +3,15 @@
 
 import os
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from core.models import PooledGemini # Gemini on the shared, pooled HTTP client
 from google.genai import types
-from google.adk.tools import load_memory # <-- ADD the working tool
+from tools.memory_tools import load_memory # Built-in load_memory tool + single-flight coalescing of identical searches
+
+# Near-duplicate collapsing before any ranking or model call
+from tools.job_dedup import job_deduplicator
+# Large job lists are returned as handles; read_chunk pages through them on demand
+from core.payload_store import handle_note
+from tools.payload_tools import read_chunk
 
 # Load environment variables for configuration
 # Assuming GOOGLE_API_KEY and SERPAPI_API_KEY are available via os.environ
@@ -40,11 +46,19 @@ def query_job_board(role: str, location: str, max_results: int = 10) -> str:
     
     # Placeholder for simulated search result (ensures model has data to work with)
     mock_results = [
-        {"id": "J101", "title": "Junior Data Analyst", "company": "DataCorp", "snippet": "Requires strong SQL, Python (Pandas), and visualization skills (Tableau)."},
-        {"id": "J102", "title": "Machine Learning Engineer", "company": "AICo", "snippet": "Demands expertise in PyTorch/TensorFlow, deep learning models, and cloud deployment (GCP/AWS)."},
-        {"id": "J103", "title": "Data Science Intern", "company": "StartUpX", "snippet": "Looking for basics in statistics and linear regression. Must be familiar with Jupyter Notebooks."},
+        {"id": "J101", "title": "Junior Data Analyst", "company": "DataCorp", "snippet": "Requires strong SQL, Python (Pandas), and visualization skills (Tableau).", "source": "Google Jobs"},
+        {"id": "J102", "title": "Machine Learning Engineer", "company": "AICo", "snippet": "Demands expertise in PyTorch/TensorFlow, deep learning models, and cloud deployment (GCP/AWS).", "source": "Google Jobs"},
+        {"id": "J103", "title": "Data Science Intern", "company": "StartUpX", "snippet": "Looking for basics in statistics and linear regression. Must be familiar with Jupyter Notebooks.", "source": "Google Jobs"},
+        # The same DataCorp role syndicated to another board (collapsed by the dedup stage)
+        {"id": "LI-88412", "title": "Junior Data Analyst", "company": "DataCorp", "snippet": "Requires strong SQL, Python (Pandas), and visualization skills (Tableau). Apply today!", "source": "LinkedIn"},
     ]
-    return f"API_RESPONSE: Successfully retrieved {len(mock_results)} job postings: {mock_results}"
+    # Collapse near-identical postings (MinHash/LSH) so ranking and the LLM only see each job once
+    unique_results = job_deduplicator.dedupe(mock_results, source="job_board")
+    collapsed = len(mock_results) - len(unique_results)
+    return handle_note(
+        f"API_RESPONSE: Successfully retrieved {len(unique_results)} unique job postings ({collapsed} duplicates collapsed): {unique_results}",
+        kind="job_list",
+    )
 
 
 def rank_jobs_by_fit(job_list: str, user_profile: str) -> str:
@@ -64,22 +78,24 @@ def rank_jobs_by_fit(job_list: str, user_profile: str) -> str:
 # --- Agent Definition ---
 
 job_search_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=PooledGemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
     name="JobSearchAgent",
     description="A specialized agent for finding relevant Data Science and ML job postings, analyzing required skills from job descriptions (JDs), and scoring job fit against the user's memory profile.",
-    instruction=f"""
+    instruction="""
     You are the Job Search Agent. Your mission is to maximize the user's job placement potential.
     
     CRITICAL BEHAVIOR:
-    1. Retrieval: ALWAYS use the '{load_memory}' tool first to inject the user's skill history, preferred roles, and location constraints into context (Day 3 principle).
+    1. Retrieval: ALWAYS use the 'load_memory' tool first to inject the user's skill history, preferred roles, and location constraints into context (Day 3 principle).
     2. Search: Use the 'query_job_board' tool to find current postings based on the user's request.
     3. Ranking: After gathering results, use the 'rank_jobs_by_fit' tool to process the job list against the retrieved user profile.
     4. Output: Present the top 3 ranked jobs clearly, emphasizing why they are a strong fit based on the analysis.
+    5. Large results: If a tool returns a handle instead of the full list, call 'read_chunk' only for the pages you need.
     """,
     tools=[
         load_memory, 
         query_job_board, 
         rank_jobs_by_fit,
+        read_chunk,
     ],
     #is_a2a_server=False,
 )
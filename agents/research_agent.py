@@ -3,7 +3,7 @@
 
 import os
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from core.models import cascade # flash-lite first, escalate to gemini-2.5-pro only when needed
 from google.genai import types
 # Using a built-in tool that utilizes Google Search for real-time information (Day 1, Day 2 concept)
 from google.adk.tools import google_search
@@ -39,7 +39,7 @@ def search_hiring_trends(query: str, years: int = 1) -> str:
 # --- Agent Definition (The Brain) ---
 
 research_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-pro", retry_options=retry_config),
+    model=cascade("gemini-2.5-flash-lite", "gemini-2.5-pro", retry_options=retry_config, label="ResearchAgent"),
     name="ResearchAgent",
     description="A specialized research assistant that queries real-time data sources (Google Search, SERP APIs) to find the latest industry trends, hiring demands, salary data, and authoritative documents.",
     instruction="""
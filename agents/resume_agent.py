@@ -3,11 +3,12 @@
 
 import os
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from core.models import PooledGemini # Gemini on the shared, pooled HTTP client
 from google.genai import types
-from google.adk.tools import load_memory # <-- ADD the working tool
+from tools.memory_tools import load_memory # Built-in load_memory tool + single-flight coalescing of identical searches
 from typing import Dict, List, Optional, Any
 from pydantic import BaseModel, Field # Using Pydantic for structured output schema (Day 2 best practice)
+from core.structured_output import structured_output_guard, structured_response_guard # Validates/repairs the JSON before ADK parses it
 
 
 # --- Configuration (Consistency with runner.py) ---
@@ -72,14 +73,14 @@ def generate_ats_friendly_document(analysis: ResumeAnalysisResult, resume_conten
 # --- Agent Definition (The Brain) ---
 
 resume_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=PooledGemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
     name="ResumeTailorAgent",
     description="A specialized agent for optimizing resumes and generating ATS-friendly documents by matching user skills against specific job descriptions.",
-    instruction=f"""
+    instruction="""
     You are the Resume Tailor Agent. Your mission is to maximize the user's chance of passing automated HR systems (ATS).
 
     CRITICAL BEHAVIOR:
-    1. Retrieval: ALWAYS use the '{load_memory}' tool first to retrieve the user's current resume (long-term memory item: user:resume).
+    1. Retrieval: ALWAYS use the 'load_memory' tool first to retrieve the user's current resume (long-term memory item: user:resume).
     2. Analysis: Use the 'parse_resume' tool to compare the retrieved resume against the user-provided Job Description (JD).
     3. Scrutiny: After parsing, your final answer MUST adhere strictly to the JSON schema of the ResumeAnalysisResult class. You must calculate a match score and identify critical skill gaps.
     4. Action: You MUST call the 'generate_ats_friendly_document' tool only if the user confirms the suggested changes are acceptable.
@@ -90,8 +91,16 @@ resume_agent = LlmAgent(
         parse_resume,    # Custom tool (Day 2)
         generate_ats_friendly_document, # Custom tool (Day 2)
     ],
-    # Enforce structured output for evaluation clarity (Day 4)
-    #response_schema=ResumeAnalysisResult,
+    # Persist the analysis in user-scoped state so other agents (e.g. the tutor's study planner) reuse the gap list
+    output_key="user:resume_analysis",
+    # Enforce structured output for evaluation clarity (Day 4).
+    # ADK constrains the final answer to this schema (natively, or via set_model_response when
+    # combined with tools) and AgentTool hands the orchestrator a validated dict.
+    output_schema=ResumeAnalysisResult,
+    # Small JSON defects are repaired locally instead of failing the delegation (no re-prompt):
+    # in the set_model_response arguments (Gemini API: schema + tools) or in JSON text (Vertex AI)
+    after_model_callback=structured_output_guard(ResumeAnalysisResult),
+    before_tool_callback=structured_response_guard(ResumeAnalysisResult),
     #is_a2a_server=False,
 )
 
@@ -0,0 +1,5 @@
+# core/__init__.py
+# This file marks the 'core' directory as a Python package,
+# holding the execution infrastructure shared by runner.py and the Streamlit app
+# (process pool, output capture, and other runtime plumbing).
+# This file can remain empty.
@@ -0,0 +1,184 @@
+# core/aio.py
+# Event-loop hygiene: thread-pool offloading for blocking tools and a loop-lag monitor
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import AgentTool
+
+# --- Configuration ---
+LOOP_LAG_INTERVAL_S = 0.05    # How often the watcher wakes up
+LOOP_LAG_THRESHOLD_S = 0.10   # Oversleep beyond this is reported as a blocked loop
+MAX_LAG_REPORTS = 200         # Recent reports kept for the Debug tab
+
+logger = logging.getLogger(__name__)
+
+
+# --- 1. Tool Spans (who was running when the loop stalled) ---
+
+@dataclass
+class _ToolSpan:
+    name: str
+    thread_id: int
+    started: float
+    ended: Optional[float] = None
+    offloaded: bool = False  # Ran in a worker thread, so it cannot have blocked the loop
+
+
+_current_span: contextvars.ContextVar[Optional[_ToolSpan]] = contextvars.ContextVar("current_tool_span", default=None)
+
+
+@dataclass
+class LagReport:
+    lag_s: float
+    at: float
+    tools: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "lag_ms": round(self.lag_s * 1000, 1),
+            "at": time.strftime("%H:%M:%S", time.localtime(self.at)),
+            "blocking_tools": self.tools or ["(no tool running - model/session code)"],
+        }
+
+
+class LoopLagMonitor:
+    """
+    Detects event-loop stalls: a watcher task sleeps LOOP_LAG_INTERVAL_S and measures how
+    late it wakes up. Any oversleep above the threshold means something ran synchronously
+    on the loop; the report names the tools whose spans overlap the stall.
+    """
+
+    def __init__(self, interval_s: float = LOOP_LAG_INTERVAL_S, threshold_s: float = LOOP_LAG_THRESHOLD_S):
+        self.interval_s = interval_s
+        self.threshold_s = threshold_s
+        self.reports: Deque[LagReport] = deque(maxlen=MAX_LAG_REPORTS)
+        self.max_lag_s = 0.0
+        self._spans: Deque[_ToolSpan] = deque(maxlen=512)
+        self._watchers: Dict[int, List[Any]] = {}  # id(loop) -> [task, refcount]
+        self._lock = threading.Lock()
+
+    # --- Span bookkeeping ---
+
+    def tool_started(self, name: str) -> _ToolSpan:
+        span = _ToolSpan(name=name, thread_id=threading.get_ident(), started=time.perf_counter())
+        self._spans.append(span)
+        _current_span.set(span)
+        return span
+
+    def tool_finished(self, span: Optional[_ToolSpan]) -> None:
+        if span is not None:
+            span.ended = time.perf_counter()
+
+    def _blockers(self, thread_id: int, window_start: float, window_end: float) -> List[str]:
+        return sorted({
+            s.name for s in list(self._spans)
+            if s.thread_id == thread_id and not s.offloaded
+            and s.started <= window_end and (s.ended is None or s.ended >= window_start)
+        })
+
+    # --- Watcher lifecycle ---
+
+    async def _watch(self) -> None:
+        thread_id = threading.get_ident()
+        while True:
+            expected = time.perf_counter() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            now = time.perf_counter()
+            lag = now - expected
+            if lag > self.threshold_s:
+                report = LagReport(lag_s=lag, at=time.time(), tools=self._blockers(thread_id, expected, now))
+                self.reports.append(report)
+                self.max_lag_s = max(self.max_lag_s, lag)
+                if report.tools:
+                    # Actionable: a named tool blocked the loop, so it goes into the mission transcript
+                    print(f"[LOOP LAG] Event loop blocked for {lag * 1000:.0f} ms; tools: {', '.join(report.tools)}")
+                else:
+                    # Unattributed stalls (imports, GC, framework work) stay in the Debug tab report only
+                    logger.debug("Event loop blocked for %.0f ms; no tool attributed", lag * 1000)
+
+    @contextlib.asynccontextmanager
+    async def watching(self) -> AsyncIterator["LoopLagMonitor"]:
+        """Runs one watcher per event loop for as long as any caller is inside this block."""
+        loop = asyncio.get_running_loop()
+        key = id(loop)
+        with self._lock:
+            entry = self._watchers.get(key)
+            if entry is None:
+                entry = self._watchers[key] = [loop.create_task(self._watch()), 0]
+            entry[1] += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    entry[0].cancel()
+                    del self._watchers[key]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "stalls": len(self.reports),
+            "max_lag_ms": round(self.max_lag_s * 1000, 1),
+            "recent": [r.as_dict() for r in list(self.reports)[-10:]],
+        }
+
+
+loop_monitor = LoopLagMonitor()
+
+
+class ToolTimingPlugin(BasePlugin):
+    """Runner plugin that opens/closes a tool span around every tool call (all agents, incl. AgentTool sub-runs)."""
+
+    def __init__(self, monitor: LoopLagMonitor = loop_monitor):
+        super().__init__(name="tool_timing")
+        self.monitor = monitor
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        # AgentTool spans cover a whole (async) sub-agent run; the tools inside it get their own spans.
+        if not isinstance(tool, AgentTool):
+            self.monitor.tool_started(tool.name)
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        self._finish(tool)
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        self._finish(tool)
+        return None
+
+    def _finish(self, tool) -> None:
+        span = _current_span.get()
+        if span is not None and span.name == tool.name and span.ended is None:
+            self.monitor.tool_finished(span)
+
+
+# --- 2. Thread-pool Offloading for Sync Tools ---
+
+def offload_to_thread(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Turns a blocking sync tool into an async one that runs in the default thread pool.
+
+    functools.wraps keeps the name, docstring and signature, so the FunctionTool
+    declaration the model sees is unchanged.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        span = _current_span.get()
+        if span is not None:
+            span.offloaded = True
+        # to_thread copies the context, so prints still land in the mission transcript.
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    return wrapper
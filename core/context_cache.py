@@ -0,0 +1,293 @@
+# core/context_cache.py
+# Provider-side context caching of stable agent prefixes (instruction + tools + user documents)
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from core import http_client
+from core.single_flight import SingleFlight
+
+# --- Configuration ---
+CACHE_TTL_S = 3600              # Lifetime requested for a cached context
+REFRESH_MARGIN_S = 300          # Extend the TTL when a cache this close to expiry is reused
+MIN_CACHE_TOKENS = 1024         # Provider minimum for explicit caches (smaller prefixes are sent inline)
+FAILURE_BACKOFF_S = 300         # Don't retry creating a cache for a prefix that just failed
+MAX_CACHES = 128                # Oldest handles are deleted provider-side beyond this (storage is billed)
+CHARS_PER_TOKEN = 4
+CONTEXT_CACHE_MODE = os.getenv("CONTEXT_CACHE", "genai")  # genai | off
+
+
+# --- 1. Providers ---
+
+class GenaiCacheProvider:
+    """Gemini explicit context caches (client.aio.caches) over the pooled HTTP client."""
+
+    @property
+    def client(self):
+        return http_client.genai_client()
+
+    async def create(self, model: str, prefix: Dict[str, Any], ttl_s: int) -> Tuple[str, float]:
+        cached = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=prefix["system_instruction"],
+                tools=prefix["tools"],
+                tool_config=prefix["tool_config"],
+                ttl=f"{ttl_s}s",
+                display_name=prefix["display_name"],
+            ),
+        )
+        expire = cached.expire_time.timestamp() if cached.expire_time else time.time() + ttl_s
+        return cached.name, expire
+
+    async def refresh(self, name: str, ttl_s: int) -> float:
+        updated = await self.client.aio.caches.update(name=name, config=types.UpdateCachedContentConfig(ttl=f"{ttl_s}s"))
+        return updated.expire_time.timestamp() if updated.expire_time else time.time() + ttl_s
+
+    async def delete(self, name: str) -> None:
+        await self.client.aio.caches.delete(name=name)
+
+    def use(self, name: str) -> None:
+        pass  # Usage shows up as cached_content_token_count in the response usage metadata
+
+
+# --- 2. Cache Manager ---
+
+@dataclass
+class CacheEntry:
+    name: str
+    model: str
+    expire_at: float
+    tokens: int
+    user_id: Optional[str]
+    doc_versions: Tuple[Tuple[str, str], ...]
+    uses: int = 0
+
+
+@dataclass
+class _AgentCacheProfile:
+    documents: Tuple[str, ...]  # User documents (doc keys) that belong in this agent's prefix
+
+
+class ContextCacheManager:
+    """
+    Builds byte-identical prompt prefixes for registered agents and maps each one to a
+    provider-side cached context, reused across missions until it expires.
+
+    The prefix is the final system instruction (agent instruction + ADK additions + the user's
+    registered documents, e.g. the current resume) plus the tool declarations. Its key is a
+    hash of exactly those bytes and the model, so any change - a new resume version, an edited
+    instruction, a different tool set - lands on a new cache instead of a stale one.
+    """
+
+    def __init__(self, provider=None, ttl_s: int = CACHE_TTL_S, min_tokens: int = MIN_CACHE_TOKENS):
+        self.provider = provider
+        self.ttl_s = ttl_s
+        self.min_tokens = min_tokens
+        self.agents: Dict[str, _AgentCacheProfile] = {}
+        self._documents: Dict[Tuple[str, str], Tuple[str, str]] = {}  # (user_id, doc_key) -> (version, text)
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._failed: Dict[str, float] = {}
+        self._stale: List[str] = []  # Cache names to delete provider-side (superseded document versions)
+        self._lock = threading.Lock()
+        self._create_flight = SingleFlight("context_cache_create")
+        self.stats = {"hits": 0, "created": 0, "refreshed": 0, "expired": 0, "invalidated": 0, "below_minimum": 0, "failures": 0, "cached_tokens": 0}
+
+    # --- Registration ---
+
+    def register_agent(self, agent_name: str, documents: Sequence[str] = ()) -> None:
+        self.agents[agent_name] = _AgentCacheProfile(tuple(documents))
+
+    def set_document(self, user_id: str, doc_key: str, text: str, version: Optional[str] = None) -> str:
+        """
+        Registers the current version of a user document (e.g. 'user:resume') for the prefixes
+        of agents that include it. A new version invalidates the caches built on the old one.
+        Returns the version (content hash prefix unless given).
+        """
+        version = version or hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            previous = self._documents.get((user_id, doc_key))
+            if previous is not None and previous[0] == version:
+                return version
+            self._documents[(user_id, doc_key)] = (version, text)
+            for key, entry in list(self._entries.items()):
+                if entry.user_id == user_id and any(k == doc_key for k, _ in entry.doc_versions):
+                    del self._entries[key]
+                    self._stale.append(entry.name)
+                    self.stats["invalidated"] += 1
+        return version
+
+    def document_version(self, user_id: str, doc_key: str) -> Optional[str]:
+        with self._lock:
+            document = self._documents.get((user_id, doc_key))
+        return document[0] if document else None
+
+    def user_documents(self, user_id: str) -> Dict[str, Tuple[str, str]]:
+        """doc_key -> (version, text) of every document registered for user_id."""
+        with self._lock:
+            return {doc_key: document for (owner, doc_key), document in self._documents.items() if owner == user_id}
+
+    # --- Prefix ---
+
+    def _documents_for(self, agent_name: str, user_id: str) -> List[Tuple[str, str, str]]:
+        profile = self.agents.get(agent_name)
+        if profile is None:
+            return []
+        with self._lock:
+            return [
+                (doc_key, *self._documents[(user_id, doc_key)])
+                for doc_key in profile.documents
+                if (user_id, doc_key) in self._documents
+            ]
+
+    @staticmethod
+    def _prefix_key(model: str, config: types.GenerateContentConfig) -> Tuple[str, int]:
+        instruction = config.system_instruction
+        instruction_json = instruction.model_dump_json(exclude_none=True) if isinstance(instruction, types.Content) else json.dumps(instruction)
+        tools_json = json.dumps([t.model_dump(mode="json", exclude_none=True) for t in (config.tools or []) if isinstance(t, types.Tool)], sort_keys=True)
+        tool_config_json = config.tool_config.model_dump_json(exclude_none=True) if config.tool_config else ""
+        digest = hashlib.sha256("\x1f".join((model, instruction_json, tools_json, tool_config_json)).encode("utf-8")).hexdigest()
+        return digest, (len(instruction_json) + len(tools_json)) // CHARS_PER_TOKEN
+
+    # --- Apply ---
+
+    async def apply(self, llm_request, agent_name: str, user_id: str) -> Optional[str]:
+        """
+        Adds the agent's user documents to the system instruction and, when a cache exists
+        (or can be created) for the resulting prefix, replaces the prefix with the handle.
+        Returns the cache name used, or None when the request goes out uncached.
+        """
+        await self._drain_stale()
+        config = llm_request.config
+        documents = self._documents_for(agent_name, user_id)
+        if documents:
+            blocks = "\n\n".join(f"[USER DOCUMENT {doc_key} (version {version})]\n{text}" for doc_key, version, text in documents)
+            llm_request.append_instructions([blocks])
+        # Caches are model-specific; cascades and non-Gemini models keep their prompt inline
+        if self.provider is None or config.cached_content or not (llm_request.model or "").startswith("gemini"):
+            return None
+
+        key, tokens = self._prefix_key(llm_request.model, config)
+        if tokens < self.min_tokens:
+            self.stats["below_minimum"] += 1
+            return None
+        entry = await self._entry_for(key, llm_request.model, config, tokens, user_id, documents)
+        if entry is None:
+            return None
+
+        config.cached_content = entry.name
+        config.system_instruction = None
+        config.tools = None
+        config.tool_config = None
+        self.provider.use(entry.name)
+        return entry.name
+
+    async def _entry_for(self, key, model, config, tokens, user_id, documents) -> Optional[CacheEntry]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expire_at <= now + 5:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.uses += 1
+                self.stats["hits"] += 1
+                self.stats["cached_tokens"] += entry.tokens
+            elif now - self._failed.get(key, 0.0) < FAILURE_BACKOFF_S:
+                return None
+
+        if entry is not None:
+            if entry.expire_at - now < REFRESH_MARGIN_S:
+                try:
+                    entry.expire_at = await self.provider.refresh(entry.name, self.ttl_s)
+                    self.stats["refreshed"] += 1
+                except Exception as e:
+                    print(f"[CONTEXT CACHE] Refresh of {entry.name} failed ({type(e).__name__}); it will be recreated on expiry.")
+            return entry
+
+        # Concurrent first requests for the same prefix create one cache
+        return await self._create_flight.do(key, lambda: self._create(key, model, config, tokens, user_id, documents))
+
+    async def _create(self, key, model, config, tokens, user_id, documents) -> Optional[CacheEntry]:
+        prefix = {
+            "system_instruction": config.system_instruction,
+            "tools": config.tools,
+            "tool_config": config.tool_config,
+            "display_name": f"prefix-{key[:12]}",
+            "tokens": tokens,
+        }
+        try:
+            name, expire_at = await self.provider.create(model, prefix, self.ttl_s)
+        except Exception as e:
+            with self._lock:
+                self._failed[key] = time.time()
+                self.stats["failures"] += 1
+            print(f"[CONTEXT CACHE] Could not create a cache for {model} ({type(e).__name__}: {e}); sending the prefix inline.")
+            return None
+
+        entry = CacheEntry(name, model, expire_at, tokens, user_id if documents else None, tuple((k, v) for k, v, _ in documents), uses=1)
+        with self._lock:
+            self._entries[key] = entry
+            self.stats["created"] += 1
+            while len(self._entries) > MAX_CACHES:
+                _, evicted = self._entries.popitem(last=False)
+                self._stale.append(evicted.name)
+        print(f"[CONTEXT CACHE] Created {name} for {model} (~{tokens} tokens, ttl {self.ttl_s}s)")
+        return entry
+
+    async def _drain_stale(self) -> None:
+        with self._lock:
+            stale, self._stale = self._stale, []
+        for name in stale:
+            try:
+                await self.provider.delete(name)
+            except Exception:
+                pass  # It expires on its own
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = [
+                {"name": e.name, "model": e.model, "tokens": e.tokens, "uses": e.uses, "user_id": e.user_id,
+                 "documents": dict(e.doc_versions), "expires_in_s": round(e.expire_at - time.time())}
+                for e in self._entries.values()
+            ]
+        provider_stats = getattr(self.provider, "stats", None)
+        return {"mode": CONTEXT_CACHE_MODE, **self.stats, "provider": provider_stats, "entries": entries}
+
+
+def _default_provider():
+    # Tests inject their own provider into a ContextCacheManager; at runtime every handle
+    # sent as cached_content must exist on the Gemini API.
+    if CONTEXT_CACHE_MODE == "off":
+        return None
+    return GenaiCacheProvider()
+
+
+context_cache = ContextCacheManager(_default_provider())
+
+
+# --- 3. Runner Plugin ---
+
+class ContextCachePlugin(BasePlugin):
+    """Applies context_cache to the model calls of registered agents."""
+
+    def __init__(self, manager: ContextCacheManager = context_cache):
+        super().__init__(name="context_cache")
+        self.manager = manager
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        if callback_context.agent_name not in self.manager.agents:
+            return None
+        await self.manager.apply(llm_request, callback_context.agent_name, callback_context.user_id)
+        return None
@@ -0,0 +1,526 @@
+# core/evaluation.py
+# Offline evaluation: runs a mission dataset concurrently and scores quality next to latency and token cost
+
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import re
+import statistics
+import threading
+import time
+import typing
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Iterator, List, Optional, Type
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import AgentTool
+from google.genai import types
+from pydantic import BaseModel
+
+from core.structured_output import validate_structured
+from core.transcript import capture_output
+from tools.skill_extraction import extract_skills
+
+# --- Configuration ---
+EVAL_DIR = os.path.join("output", "eval")
+DEFAULT_DATASET = os.path.join("data", "eval_missions.json")
+DEFAULT_CASSETTE = os.path.join(EVAL_DIR, "cassette.jsonl")
+DEFAULT_MIN_SKILL_OVERLAP = 0.5
+FAKE_LATENCY_S = 0.05
+
+# USD per 1M tokens (input, output); approximate list prices - edit to match your billing.
+# Cached input tokens are billed at CACHED_INPUT_FACTOR of the input price.
+MODEL_PRICES_PER_M = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+CACHED_INPUT_FACTOR = 0.25
+
+GEMINI_CHECK_ENV = "ADK_DISABLE_GEMINI_MODEL_ID_CHECK"
+
+# Printed by the runner even when the mission "succeeds" - an eval case fails on these
+FAILURE_MARKERS = ("[DEGRADED", "[FATAL EXECUTION ERROR", "[ERROR]")
+
+
+# --- 1. Dataset ---
+
+@dataclass
+class EvalCase:
+    """
+    One mission with the properties its output must have. Every expectation is optional:
+      structured_agent: sub-agent whose typed result must be present and schema-valid
+      skills:           canonical skills the output should mention (min_skill_overlap of them)
+      sections:         phrases/headings that must appear in the final response
+      tools:            agents/tools that must be called (trajectory check)
+    """
+    id: str
+    mission: str
+    tab: str = "other"
+    user_id: str = "eval_user"
+    structured_agent: Optional[str] = None
+    skills: List[str] = field(default_factory=list)
+    min_skill_overlap: float = DEFAULT_MIN_SKILL_OVERLAP
+    sections: List[str] = field(default_factory=list)
+    tools: List[str] = field(default_factory=list)
+
+
+def load_dataset(path: str = DEFAULT_DATASET) -> List[EvalCase]:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    cases = []
+    for item in raw["cases"] if isinstance(raw, dict) else raw:
+        mission = item["mission"]
+        if isinstance(mission, list):  # Multi-line missions are stored as a list of lines
+            mission = "\n".join(mission)
+        cases.append(EvalCase(**{**item, "mission": mission}))
+    ids = [case.id for case in cases]
+    if len(ids) != len(set(ids)):
+        raise ValueError(f"Duplicate case ids in {path}")
+    return cases
+
+
+# --- 2. Per-Case Usage (tokens, cost, tool trajectory) ---
+
+@dataclass
+class CaseUsage:
+    model_calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    tools_called: List[str] = field(default_factory=list)
+
+
+# The usage record of the eval case running in the current context. contextvars are copied
+# into child tasks, so AgentTool sub-runs and parallel tool calls add to the same record.
+_active_usage: contextvars.ContextVar[Optional[CaseUsage]] = contextvars.ContextVar("eval_case_usage", default=None)
+
+
+def _price(model: str) -> tuple:
+    # Longest prefix wins ("gemini-2.5-flash-lite-001" -> flash-lite, not flash)
+    for name in sorted(MODEL_PRICES_PER_M, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_PRICES_PER_M[name]
+    return (0.0, 0.0)
+
+
+class EvalUsagePlugin(BasePlugin):
+    """Runner plugin that attributes token usage and tool calls to the running eval case (no-op otherwise)."""
+
+    def __init__(self):
+        super().__init__(name="eval_usage")
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        usage = _active_usage.get()
+        meta = llm_response.usage_metadata
+        if usage is None or llm_response.partial or meta is None:
+            return None
+        prompt = meta.prompt_token_count or 0
+        cached = meta.cached_content_token_count or 0
+        output = (meta.candidates_token_count or 0) + (meta.thoughts_token_count or 0)
+        input_price, output_price = _price(llm_response.model_version or "")
+        usage.model_calls += 1
+        usage.prompt_tokens += prompt
+        usage.cached_tokens += cached
+        usage.output_tokens += output
+        usage.cost_usd += ((prompt - cached) * input_price + cached * input_price * CACHED_INPUT_FACTOR + output * output_price) / 1e6
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        usage = _active_usage.get()
+        if usage is not None:
+            usage.tools_called.append(tool.name)
+        return None
+
+
+# --- 3. Model Modes (live / record / replay / fake) ---
+
+def _request_key(llm_request: LlmRequest) -> str:
+    """
+    Stable fingerprint of a model request. Function-call ids are random per run, so only
+    names, arguments, responses and text are hashed.
+    """
+    contents = []
+    for content in llm_request.contents:
+        parts = []
+        for part in content.parts or []:
+            if part.text is not None:
+                parts.append(["text", part.text])
+            elif part.function_call:
+                parts.append(["call", part.function_call.name, part.function_call.args])
+            elif part.function_response:
+                parts.append(["response", part.function_response.name, part.function_response.response])
+        contents.append([content.role, parts])
+    config = llm_request.config
+    schema = config.response_schema if config else None
+    payload = {
+        "system": str(config.system_instruction) if config and config.system_instruction else "",
+        "tools": sorted(llm_request.tools_dict),
+        "schema": getattr(schema, "__name__", str(schema) if schema else ""),
+        "contents": contents,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+class ReplayMissError(RuntimeError):
+    """A replayed run sent a request that is not in the cassette (prompt/routing changed)."""
+
+
+class Cassette:
+    """Recorded model responses keyed by request fingerprint (JSONL, one request per line)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["responses"]
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            responses = self._entries.get(key)
+            self.stats["replayed" if responses is not None else "misses"] += 1
+            return responses
+
+    def put(self, key: str, responses: List[str]) -> None:
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = responses
+            self.stats["recorded"] += 1
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "responses": responses}, ensure_ascii=False) + "\n")
+
+
+class ReplayLlm(BaseLlm):
+    """
+    record: forwards to the wrapped model and stores its responses in the cassette.
+    replay: answers from the cassette only (no network, no API key, deterministic).
+
+    The model name does not start with 'gemini', so provider-side context caching is off
+    in both modes and recorded requests carry the full prefix (stable fingerprints).
+    """
+
+    model_config = {"arbitrary_types_allowed": True}
+    inner: Optional[BaseLlm] = None
+    cassette: Any = None
+    record: bool = False
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        key = _request_key(llm_request)
+        if not self.record:
+            responses = self.cassette.get(key)
+            if responses is None:
+                raise ReplayMissError(f"No recorded response for this request ({self.model}); re-record the cassette.")
+            for raw in responses:
+                yield LlmResponse.model_validate_json(raw)
+            return
+        recorded = []
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            if not response.partial:
+                recorded.append(response.model_dump_json(exclude_none=True))
+            yield response
+        self.cassette.put(key, recorded)
+
+
+def _fake_value(annotation: Any, name: str, skills: List[str]) -> Any:
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        annotation = next(a for a in typing.get_args(annotation) if a is not type(None))
+        origin = typing.get_origin(annotation)
+    if origin in (list, List):
+        return list(skills) or ["none"]
+    if annotation is int:
+        return 70
+    if annotation is float:
+        return 0.7
+    if annotation is bool:
+        return True
+    return f"Fake {name.replace('_', ' ')} covering {', '.join(skills) or 'the request'}."
+
+
+def _fake_instance(schema: Type[BaseModel], text: str) -> Dict[str, Any]:
+    skills = sorted(extract_skills(text))[:8]
+    return {name: _fake_value(info.annotation, name, skills) for name, info in schema.model_fields.items()}
+
+
+class FakeEvalLlm(BaseLlm):
+    """
+    Deterministic local model for plumbing/overhead runs (no network). It delegates to a
+    sub-agent whose name appears in the request, answers schema agents with a valid
+    instance, and otherwise echoes the request and the skills it saw - so a clean build
+    passes every case and any failure is a pipeline regression. Quality scores measure the
+    pipeline, not a real model.
+    """
+
+    model: str = "fake-eval"
+    latency_s: float = FAKE_LATENCY_S
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(self.latency_s)
+        # This turn = everything after the last user text message
+        turn_start = max((i for i, c in enumerate(llm_request.contents) if c.role == "user" and any(p.text for p in c.parts or [])), default=0)
+        turn = llm_request.contents[turn_start:]
+        request_text = " ".join(p.text for p in (turn[0].parts if turn else []) if p.text)
+        responses = [p.function_response for c in turn for p in c.parts or [] if p.function_response]
+        seen_text = request_text + " " + " ".join(json.dumps(r.response, default=str) for r in responses)
+
+        output_tool = llm_request.tools_dict.get("set_model_response")
+        schema = getattr(output_tool, "_model_type", None)
+        config_schema = llm_request.config.response_schema if llm_request.config else None
+        agent_tools = [name for name, tool in llm_request.tools_dict.items() if isinstance(tool, AgentTool)]
+        target = next((name for name in agent_tools if name in request_text), None)
+
+        if schema is not None:
+            part = types.Part(function_call=types.FunctionCall(name="set_model_response", args=_fake_instance(schema, seen_text)))
+        elif isinstance(config_schema, type) and issubclass(config_schema, BaseModel):
+            part = types.Part(text=json.dumps(_fake_instance(config_schema, seen_text)))
+        elif target and not responses:
+            part = types.Part(function_call=types.FunctionCall(name=target, args={"request": request_text}))
+        else:
+            skills = sorted(extract_skills(seen_text))
+            request = " ".join(request_text.split())
+            part = types.Part(text=f"Summary\nFake answer to: {request}\nSkills mentioned: {', '.join(skills) or 'none'}.")
+
+        prompt_chars = len(str(llm_request.config.system_instruction or "")) + len(seen_text)
+        output_chars = len(part.text or json.dumps(part.function_call.args if part.function_call else {}))
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            model_version=self.model,
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_chars // 4, candidates_token_count=output_chars // 4,
+            ),
+        )
+
+
+def iter_agents(root) -> Iterator[Any]:
+    """The root agent and every agent reachable through sub_agents and AgentTools."""
+    seen, stack = set(), [root]
+    while stack:
+        agent = stack.pop()
+        if id(agent) in seen:
+            continue
+        seen.add(id(agent))
+        yield agent
+        stack.extend(getattr(agent, "sub_agents", None) or [])
+        stack.extend(tool.agent for tool in getattr(agent, "tools", None) or [] if isinstance(tool, AgentTool))
+
+
+@contextlib.contextmanager
+def model_mode(root, mode: str, cassette: Optional[Cassette] = None, fake_latency_s: float = FAKE_LATENCY_S) -> Iterator[None]:
+    """Temporarily swaps every agent's model for the chosen mode (live keeps the real models)."""
+    originals = {}
+    check_env = os.environ.get(GEMINI_CHECK_ENV)
+    if mode != "live":
+        # Built-in tools (google_search) refuse non-'gemini-*' model names; the wrappers stand in for Gemini
+        os.environ[GEMINI_CHECK_ENV] = "true"
+        for agent in iter_agents(root):
+            if not hasattr(agent, "canonical_model"):
+                continue
+            originals[id(agent)] = (agent, agent.model)
+            if mode == "fake":
+                agent.model = FakeEvalLlm(latency_s=fake_latency_s)
+            else:
+                inner = agent.canonical_model
+                agent.model = ReplayLlm(model=f"replay:{inner.model}", inner=inner, cassette=cassette, record=mode == "record")
+    try:
+        yield
+    finally:
+        for agent, model in originals.values():
+            agent.model = model
+        if check_env is None:
+            os.environ.pop(GEMINI_CHECK_ENV, None)
+        else:
+            os.environ[GEMINI_CHECK_ENV] = check_env
+
+
+# --- 4. Deterministic Checks ---
+
+_FINAL = re.compile(r"\[FINAL RESPONSE\]\s*> ?(.*?)(?=\n={3,}|\Z)", re.S)
+_STRUCTURED = re.compile(r"^\[STRUCTURED RESULT\] (\S+) > (.*)$", re.M)
+
+
+def final_response(transcript: str) -> str:
+    matches = _FINAL.findall(transcript)
+    return matches[-1].strip() if matches else ""
+
+
+def score_case(case: EvalCase, transcript: str, usage: CaseUsage, schemas: Dict[str, Type[BaseModel]]) -> Dict[str, Dict[str, Any]]:
+    """Runs every check that applies to the case. Returns {check: {"passed": bool, "detail": str}}."""
+    final = final_response(transcript)
+    structured = {name: text for name, text in _STRUCTURED.findall(transcript)}
+    checks: Dict[str, Dict[str, Any]] = {}
+
+    def check(name: str, passed: bool, detail: str = "") -> None:
+        checks[name] = {"passed": bool(passed), "detail": detail}
+
+    check("final_response", final, "" if final else "no [FINAL RESPONSE] in transcript")
+    markers = [m for m in FAILURE_MARKERS if m in transcript]
+    check("no_degradation", not markers, ", ".join(markers))
+
+    if case.structured_agent:
+        schema = schemas.get(case.structured_agent)
+        raw = structured.get(case.structured_agent)
+        if schema is None:
+            check("schema_valid", False, f"{case.structured_agent} has no output_schema")
+        elif raw is None:
+            check("schema_valid", False, f"no structured result from {case.structured_agent}")
+        else:
+            result = validate_structured(raw, schema)
+            check("schema_valid", result.ok, result.error or (f"repaired: {', '.join(result.repairs)}" if result.repairs else ""))
+
+    if case.skills:
+        expected = set(case.skills)
+        found = extract_skills(final + " " + " ".join(structured.values()))
+        overlap = len(expected & found) / len(expected)
+        check("skill_overlap", overlap >= case.min_skill_overlap, f"{overlap:.0%}, missing: {', '.join(sorted(expected - found)) or '-'}")
+
+    if case.sections:
+        missing = [s for s in case.sections if s.lower() not in final.lower()]
+        check("required_sections", not missing, f"missing: {', '.join(missing)}" if missing else "")
+
+    if case.tools:
+        missing = [t for t in case.tools if t not in usage.tools_called]
+        check("tool_trajectory", not missing, f"missing: {', '.join(missing)}" if missing else "")
+
+    return checks
+
+
+# --- 5. Runner ---
+
+@dataclass
+class CaseResult:
+    id: str
+    tab: str
+    run: int
+    passed: bool
+    score: float
+    latency_s: float
+    checks: Dict[str, Dict[str, Any]]
+    usage: Dict[str, Any]
+    error: str = ""
+
+
+async def _run_case(
+    case: EvalCase, run: int, run_mission: Callable[..., Awaitable[Any]],
+    schemas: Dict[str, Type[BaseModel]], semaphore: asyncio.Semaphore,
+) -> CaseResult:
+    async with semaphore:
+        usage = CaseUsage()
+        _active_usage.set(usage)  # This task's context only
+        error = ""
+        started = time.perf_counter()
+        with capture_output() as buffer:
+            try:
+                # An explicit session id keeps identical cases/repeats from being coalesced
+                await run_mission(case.mission, user_id=case.user_id, session_id=f"eval_{case.id}_{run}_{uuid.uuid4().hex[:6]}")
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                print(f"\n[ERROR] {error}")
+        latency = time.perf_counter() - started
+    checks = score_case(case, buffer.getvalue(), usage, schemas)
+    passed_checks = sum(c["passed"] for c in checks.values())
+    return CaseResult(
+        id=case.id, tab=case.tab, run=run, passed=passed_checks == len(checks),
+        score=round(passed_checks / len(checks), 3), latency_s=round(latency, 3),
+        checks=checks, usage=asdict(usage), error=error,
+    )
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(results: List[CaseResult], wall_s: float) -> Dict[str, Any]:
+    latencies = [r.latency_s for r in results]
+    return {
+        "cases": len(results),
+        "pass_rate": round(sum(r.passed for r in results) / len(results), 3) if results else 0.0,
+        "mean_score": round(statistics.mean(r.score for r in results), 3) if results else 0.0,
+        "latency_p50_s": round(_percentile(latencies, 0.5), 3),
+        "latency_p95_s": round(_percentile(latencies, 0.95), 3),
+        "latency_max_s": round(max(latencies, default=0.0), 3),
+        "wall_s": round(wall_s, 3),
+        "model_calls": sum(r.usage["model_calls"] for r in results),
+        "prompt_tokens": sum(r.usage["prompt_tokens"] for r in results),
+        "cached_tokens": sum(r.usage["cached_tokens"] for r in results),
+        "output_tokens": sum(r.usage["output_tokens"] for r in results),
+        "cost_usd": round(sum(r.usage["cost_usd"] for r in results), 6),
+    }
+
+
+async def run_evaluation(
+    cases: List[EvalCase],
+    run_mission: Callable[..., Awaitable[Any]],
+    schemas: Dict[str, Type[BaseModel]],
+    concurrency: int = 4,
+    repeat: int = 1,
+) -> Dict[str, Any]:
+    """
+    Runs every case `repeat` times, at most `concurrency` missions at once, on the caller's
+    event loop. The runner must include EvalUsagePlugin for token/tool accounting.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        _run_case(case, run, run_mission, schemas, semaphore) for run in range(repeat) for case in cases
+    ])
+    return {"summary": summarize(list(results), time.perf_counter() - started), "results": [asdict(r) for r in results]}
+
+
+# --- 6. Reports ---
+
+COMPARED_METRICS = ("pass_rate", "mean_score", "latency_p50_s", "latency_p95_s", "wall_s", "prompt_tokens", "output_tokens", "cost_usd")
+
+
+def save_report(report: Dict[str, Any], path: Optional[str] = None) -> str:
+    path = path or os.path.join(EVAL_DIR, f"eval_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'case':<28} {'run':>3} {'pass':>5} {'score':>6} {'latency':>8} {'tokens':>8}  failed checks"]
+    for r in report["results"]:
+        failed = "; ".join(f"{name} ({c['detail']})" if c["detail"] else name for name, c in r["checks"].items() if not c["passed"])
+        tokens = r["usage"]["prompt_tokens"] + r["usage"]["output_tokens"]
+        lines.append(f"{r['id']:<28} {r['run']:>3} {'yes' if r['passed'] else 'NO':>5} {r['score']:>6.2f} {r['latency_s']:>7.2f}s {tokens:>8}  {failed}")
+    s = report["summary"]
+    lines.append("")
+    lines.append(
+        f"Quality: {s['pass_rate']:.0%} passed, mean score {s['mean_score']:.2f} | "
+        f"Latency: p50 {s['latency_p50_s']:.2f}s, p95 {s['latency_p95_s']:.2f}s, wall {s['wall_s']:.2f}s | "
+        f"Cost: {s['prompt_tokens']} in ({s['cached_tokens']} cached) + {s['output_tokens']} out tokens, ${s['cost_usd']:.4f}"
+    )
+    return "\n".join(lines)
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> str:
+    """Quality-vs-speed table against a baseline report, plus cases that stopped passing."""
+    lines = [f"{'metric':<16} {'baseline':>12} {'current':>12} {'delta':>12}"]
+    for metric in COMPARED_METRICS:
+        before, after = baseline["summary"].get(metric, 0), current["summary"].get(metric, 0)
+        lines.append(f"{metric:<16} {before:>12} {after:>12} {after - before:>+12.4g}")
+    passed_before = {r["id"] for r in baseline["results"] if r["passed"]}
+    failing_now = sorted({r["id"] for r in current["results"] if not r["passed"]} & passed_before)
+    lines.append(f"\nRegressions (passed in baseline, failing now): {', '.join(failing_now) or 'none'}")
+    return "\n".join(lines)
@@ -0,0 +1,287 @@
+# core/http_client.py
+# One shared, pooled, keep-alive HTTP client stack for every Gemini model instance
+
+import asyncio
+import importlib.util
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from google.genai import Client, types
+
+from core.metrics import http_responses_total, http_retryable_responses_total
+
+# --- Configuration: Pool Limits ---
+POOL_MAX_CONNECTIONS = 32           # Hard cap on open sockets per event loop
+POOL_MAX_KEEPALIVE = 16             # Idle connections kept warm for reuse
+POOL_KEEPALIVE_EXPIRY = 120.0       # Seconds an idle connection stays in the pool
+POOL_TIMEOUT = httpx.Timeout(connect=10.0, read=300.0, write=30.0, pool=30.0)
+
+# HTTP/2 multiplexing is used when the optional 'h2' package is installed (pip install httpx[http2]).
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+# --- 1. Connection Metrics ---
+
+@dataclass
+class ConnectionStats:
+    """Counters fed by httpcore trace events; shared by every pooled client in the process."""
+    requests: int = 0
+    new_connections: int = 0
+    tls_handshakes: int = 0
+    http2_requests: int = 0
+    failed_requests: int = 0
+    status_codes: Dict[int, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def record_status(self, status_code: int) -> None:
+        with self._lock:
+            self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+
+    @property
+    def reused_connections(self) -> int:
+        return max(0, self.requests - self.new_connections)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": self.reused_connections,
+                "reuse_ratio": round(self.reused_connections / self.requests, 3) if self.requests else 0.0,
+                "tls_handshakes": self.tls_handshakes,
+                "http2_requests": self.http2_requests,
+                "failed_requests": self.failed_requests,
+                "status_codes": dict(self.status_codes),
+                "open_connections": open_connection_count(),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = self.new_connections = self.tls_handshakes = 0
+            self.http2_requests = self.failed_requests = 0
+            self.status_codes.clear()
+
+
+connection_stats = ConnectionStats()
+
+_TRACE_COUNTERS = {
+    "connection.connect_tcp.complete": "new_connections",
+    "connection.start_tls.complete": "tls_handshakes",
+    "http2.send_request_headers.started": "http2_requests",
+}
+
+
+def _request_tracer():
+    """
+    Trace callback for one request. httpcore reports '<step>.failed' for every step an
+    exception passes through, so a transport failure is counted once per request.
+    Cancellation (a caller that stopped waiting) is not a failure.
+    """
+    failed = False
+
+    def trace(event_name: str, info: Dict[str, Any]) -> None:
+        nonlocal failed
+        attr = _TRACE_COUNTERS.get(event_name)
+        if attr:
+            connection_stats.record(attr)
+        elif event_name.endswith(".failed") and not failed:
+            if not isinstance(info.get("exception"), asyncio.CancelledError):
+                failed = True
+                connection_stats.record("failed_requests")
+
+    return trace
+
+
+def _on_sync_request(request: httpx.Request) -> None:
+    connection_stats.record("requests")
+    request.extensions["trace"] = _request_tracer()
+
+
+async def _on_async_request(request: httpx.Request) -> None:
+    connection_stats.record("requests")
+    trace = _request_tracer()
+
+    async def async_trace(event_name: str, info: Dict[str, Any]) -> None:
+        trace(event_name, info)
+
+    request.extensions["trace"] = async_trace
+
+
+def _on_sync_response(response: httpx.Response) -> None:
+    connection_stats.record_status(response.status_code)
+    _record_response_metrics(response.status_code)
+
+
+async def _on_async_response(response: httpx.Response) -> None:
+    connection_stats.record_status(response.status_code)
+    _record_response_metrics(response.status_code)
+
+
+def _record_response_metrics(status: int) -> None:
+    http_responses_total.inc(status=status)
+    # The genai retry policy retries exactly these codes, so this counts retry attempts
+    if status in (408, 429) or status >= 500:
+        http_retryable_responses_total.inc()
+
+
+# --- 2. Shared Pools ---
+
+# httpx.AsyncClient connections are bound to the event loop that opened them, so the
+# async pool is shared per loop (a long-lived worker loop reuses it across missions;
+# asyncio.run() per mission reuses it across all agents/AgentTool hops of that mission).
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_sync_client: Optional[httpx.Client] = None
+_genai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, Client]]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_shared_sync_client() -> httpx.Client:
+    """Process-wide pooled sync client (thread-safe, loop independent)."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                limits=_limits(),
+                timeout=POOL_TIMEOUT,
+                event_hooks={"request": [_on_sync_request], "response": [_on_sync_response]},
+            )
+        return _sync_client
+
+
+def get_shared_async_client() -> httpx.AsyncClient:
+    """Pooled async client for the running event loop (one pool per loop)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=_limits(),
+                timeout=POOL_TIMEOUT,
+                event_hooks={"request": [_on_async_request], "response": [_on_async_response]},
+            )
+            _async_clients[loop] = client
+        return client
+
+
+def genai_client(
+    retry_options: Optional[types.HttpRetryOptions] = None,
+    headers: Optional[Dict[str, str]] = None,
+    **http_options: Any,
+) -> Client:
+    """
+    Returns a google.genai Client whose transport is the shared pool.
+
+    Clients are cheap wrappers, cached per (loop, retry options, headers, extra http
+    options such as base_url/api_version), so agents with different retry policies
+    still send their requests over the same connections.
+    """
+    http_options = {k: v for k, v in http_options.items() if v is not None}
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    key = (
+        retry_options.model_dump_json(exclude_none=True) if retry_options else None,
+        tuple(sorted((headers or {}).items())),
+        tuple(sorted(http_options.items())),
+    )
+    if loop is not None:
+        with _lock:
+            cached = _genai_clients.setdefault(loop, {}).get(key)
+        if cached is not None:
+            return cached
+
+    client = Client(
+        http_options=types.HttpOptions(
+            headers=headers,
+            retry_options=retry_options,
+            **http_options,
+            httpx_client=get_shared_sync_client(),
+            httpx_async_client=get_shared_async_client() if loop is not None else None,
+        )
+    )
+    if loop is not None:
+        with _lock:
+            _genai_clients[loop][key] = client
+    return client
+
+
+def open_connection_count() -> int:
+    """Best-effort count of sockets currently held by the shared pools (reads httpcore internals)."""
+    total = 0
+    clients = list(_async_clients.values()) + ([_sync_client] if _sync_client else [])
+    for client in clients:
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        total += len(getattr(pool, "connections", []) or [])
+    return total
+
+
+async def aclose_shared_async_client() -> None:
+    """Closes the running loop's pool (call before the loop shuts down)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+        _genai_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+# --- 3. Local Reuse Check ---
+
+if __name__ == "__main__":
+    # Spins up a local keep-alive stub server and reports how many TCP connections
+    # the shared async pool opened for a burst of requests.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    server_connections = 0
+
+    class _StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def setup(self):
+            global server_connections
+            server_connections += 1
+            super().setup()
+
+        def do_GET(self):
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    async def _burst(n: int = 50, concurrency: int = 5):
+        client = get_shared_async_client()
+        for start in range(0, n, concurrency):
+            await asyncio.gather(*(client.get(url) for _ in range(concurrency)))
+        await aclose_shared_async_client()
+
+    asyncio.run(_burst())
+    server.shutdown()
+    print(f"Server saw {server_connections} TCP connection(s).")
+    print(f"Client stats: {connection_stats.snapshot()}")
@@ -0,0 +1,385 @@
+# core/memory_ingest.py
+# Bulk ingestion of user documents into long-term memory (worker pool + content-hash manifest + SQLite store)
+
+import asyncio
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from google.adk.memory import InMemoryMemoryService
+
+from tools.batch_screening import RESUME_EXTENSIONS, extract_text
+from tools.memory_tools import chunk_text, document_events, document_session_id
+
+# --- Configuration ---
+MEMORY_STORE_PATH = os.path.join("output", "memory_store.sqlite3")
+DEFAULT_USER_ID = "DS_Candidate_123"   # Owner of files placed directly in the ingest root (same as runner.USER_ID)
+INGEST_EXTENSIONS = RESUME_EXTENSIONS + (".json",)
+INGEST_WORKERS = os.cpu_count() or 2
+POOL_MIN_FILES = 64                    # Fewer changed files than this are prepared in-process (pool startup costs seconds)
+WRITE_BATCH_FILES = 500                # Files committed per SQLite transaction
+# App data that ships in data/ next to the demo user's documents - never user memory
+APP_DATA_FILES = (os.path.join("data", "quiz_bank.json"), os.path.join("data", "eval_missions.json"))
+
+# File name -> memory doc key. The first marker that is a whole word of the lower-cased file
+# stem wins (cv_2024.pdf, my-resume.docx; not recv_log.txt or export_cvs.csv); everything
+# else becomes a note. Several files may map to one key (resume.txt and cv.txt,
+# notes.txt in two folders): passages are stored per source, so they never overwrite each other.
+_DOC_KEY_RULES: Tuple[Tuple[str, str], ...] = (
+    ("resume", "user:resume"),
+    ("cv", "user:resume"),
+    ("layoff", "user:coaching:layoff_reason"),
+    ("review", "user:review:{stem}"),
+)
+
+
+def doc_key_for(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0].lower()
+    tokens = set(re.findall(r"[a-z]+", stem))
+    for marker, key in _DOC_KEY_RULES:
+        if marker in tokens:
+            return key.format(stem=stem)
+    return f"user:notes:{stem}"
+
+
+# --- 1. Memory Store (the manifest and the passages, one SQLite file) ---
+
+class MemoryStore:
+    """
+    Durable side of long-term memory. init_memory.py writes here; the Runner's
+    StoreBackedMemoryService reads a user's documents from here the first time they are needed.
+
+    - sources:  (user_id, source) -> content hash and the doc keys it produced (the skip manifest)
+    - passages: (user_id, source, doc_key, seq) -> passage text
+    - users:    user_id -> version (time of the last write), so long-running processes pick up re-ingests
+
+    Reads reuse one connection per thread (searches run on the default executor's threads);
+    ingest writes open their own connection.
+    """
+
+    def __init__(self, path: str = MEMORY_STORE_PATH):
+        self.path = path
+        self._schema_ready = False
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers (the Runner) are not blocked by an ingest in progress
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(passages)")]
+            if columns and "source" not in columns:
+                # Stores written before passages were keyed by source: rebuild them on the next ingest
+                conn.executescript("DROP TABLE passages; DROP TABLE IF EXISTS sources;")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS sources (
+                    user_id TEXT, source TEXT, content_hash TEXT, doc_keys TEXT, ingested_at REAL,
+                    PRIMARY KEY (user_id, source));
+                CREATE TABLE IF NOT EXISTS passages (
+                    user_id TEXT, source TEXT, doc_key TEXT, seq INTEGER, text TEXT,
+                    PRIMARY KEY (user_id, source, doc_key, seq));
+                CREATE TABLE IF NOT EXISTS users (user_id TEXT PRIMARY KEY, version REAL);
+                """
+            )
+            self._schema_ready = True
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def known_hashes(self) -> Dict[Tuple[str, str], str]:
+        if not self.exists():
+            return {}
+        return {(u, s): h for u, s, h in self._reader().execute("SELECT user_id, source, content_hash FROM sources")}
+
+    def write_batch(self, results: List[Dict[str, Any]]) -> int:
+        """
+        Writes the prepared documents of many files in ONE transaction (all or nothing, so the
+        manifest never claims a file whose passages are missing). Returns the passages written.
+        """
+        now = time.time()
+        written = 0
+        conn = self._connect()
+        try:
+            with conn:
+                for result in results:
+                    user_id, source = result["user_id"], result["source"]
+                    # Only this file's passages: other files may share its doc keys
+                    conn.execute("DELETE FROM passages WHERE user_id = ? AND source = ?", (user_id, source))
+                    conn.executemany(
+                        "INSERT INTO passages (user_id, source, doc_key, seq, text) VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (user_id, source, doc_key, seq, chunk)
+                            for doc_key, chunks in result["docs"].items()
+                            for seq, chunk in enumerate(chunks)
+                        ],
+                    )
+                    written += sum(len(chunks) for chunks in result["docs"].values())
+                    conn.execute(
+                        "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                        (user_id, source, result["content_hash"], json.dumps(sorted(result["docs"])), now),
+                    )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO users VALUES (?, ?)", [(u, now) for u in {r["user_id"] for r in results}]
+                )
+        finally:
+            conn.close()
+        return written
+
+    def remove_sources(self, keys: List[Tuple[str, str]]) -> int:
+        """
+        Deletes the manifest rows and passages of (user_id, source) pairs in one transaction and
+        bumps the owners' versions, so running processes drop the documents. Returns the passages removed.
+        """
+        if not keys:
+            return 0
+        now = time.time()
+        removed = 0
+        conn = self._connect()
+        try:
+            with conn:
+                for user_id, source in keys:
+                    removed += conn.execute("DELETE FROM passages WHERE user_id = ? AND source = ?", (user_id, source)).rowcount
+                    conn.execute("DELETE FROM sources WHERE user_id = ? AND source = ?", (user_id, source))
+                conn.executemany("INSERT OR REPLACE INTO users VALUES (?, ?)", [(u, now) for u in {u for u, _ in keys}])
+        finally:
+            conn.close()
+        return removed
+
+    def user_version(self, user_id: str) -> Optional[float]:
+        if not self.exists():
+            return None
+        # fetchall finishes the statement, so the reused connection does not pin an old WAL snapshot
+        rows = self._reader().execute("SELECT version FROM users WHERE user_id = ?", (user_id,)).fetchall()
+        return rows[0][0] if rows else None
+
+    def load_user(self, user_id: str) -> Dict[str, List[str]]:
+        """doc_key -> passages, in order (files sharing a doc key are concatenated by source)."""
+        documents: Dict[str, List[str]] = {}
+        for doc_key, text in self._reader().execute(
+            "SELECT doc_key, text FROM passages WHERE user_id = ? ORDER BY doc_key, source, seq", (user_id,)
+        ):
+            documents.setdefault(doc_key, []).append(text)
+        return documents
+
+
+# --- 2. Discovery and Per-File Preparation (runs in worker processes) ---
+
+def discover_documents(root: str, default_user_id: str = DEFAULT_USER_ID) -> List[Tuple[str, str, str]]:
+    """
+    Lists (user_id, path, source) for every ingestible file under root.
+
+    Layout: root/<user_id>/**/<file> for many users; files directly in root belong to
+    default_user_id. 'source' is the path relative to root (the manifest key).
+    APP_DATA_FILES (quiz bank, eval dataset) are skipped.
+    """
+    app_data = {os.path.realpath(p) for p in APP_DATA_FILES}
+    found: List[Tuple[str, str, str]] = []
+    for entry in sorted(os.listdir(root)):
+        path = os.path.join(root, entry)
+        if os.path.isfile(path):
+            if entry.lower().endswith(INGEST_EXTENSIONS) and os.path.realpath(path) not in app_data:
+                found.append((default_user_id, path, entry))
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.lower().endswith(INGEST_EXTENSIONS):
+                    file_path = os.path.join(dirpath, name)
+                    found.append((entry, file_path, os.path.relpath(file_path, root)))
+    return found
+
+
+def _json_documents(path: str, data: bytes) -> Dict[str, str]:
+    """
+    A JSON file of {key: text} pairs becomes one document per key, e.g.
+    {"user:coaching:layoff_reason": "..."}. Keys without the 'user:' prefix are filed as notes.
+    """
+    payload = json.loads(data.decode("utf-8"))
+    if not isinstance(payload, dict) or not all(isinstance(v, str) for v in payload.values()):
+        raise ValueError("expected a flat object of key -> text")
+    stem = os.path.splitext(os.path.basename(path))[0].lower()
+    return {(k if k.startswith("user:") else f"user:notes:{stem}:{k}"): v for k, v in payload.items()}
+
+
+def _hash_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except OSError:
+        return None
+
+
+def prepare_file(task: Tuple[str, str, str, str]) -> Dict[str, Any]:
+    """
+    Extracts and chunks one changed file.
+
+    Args:
+        task: (user_id, path, source, content hash)
+
+    Returns:
+        {'user_id', 'source', 'status': 'changed'|'failed', 'content_hash', 'docs': {doc_key: [passages]}, 'error'}
+    """
+    user_id, path, source, content_hash = task
+    result: Dict[str, Any] = {"user_id": user_id, "source": source, "status": "changed", "content_hash": content_hash, "docs": {}, "error": ""}
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.lower().endswith(".json"):
+            texts = _json_documents(path, data)
+        else:
+            texts = {doc_key_for(path): extract_text(path, data)[0]}
+        result["docs"] = {key: chunk_text(text) for key, text in texts.items() if text.strip()}
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+# --- 3. Bulk Ingestion ---
+
+def ingest_directory(
+    root: str,
+    default_user_id: str = DEFAULT_USER_ID,
+    store: Optional[MemoryStore] = None,
+    workers: int = INGEST_WORKERS,
+    batch_files: int = WRITE_BATCH_FILES,
+    prune: bool = True,
+) -> Dict[str, Any]:
+    """
+    Ingests every user document under root into the memory store.
+
+    Every file is hashed first (I/O-bound, thread pool) and files whose content hash matches the
+    manifest are skipped. Sources in the manifest that are no longer under root (deleted or
+    renamed files) lose their passages unless prune is False. Text extraction and chunking of the changed files run in a process pool
+    (PDF/DOCX parsing is CPU-bound); the main process commits the results in batches of
+    batch_files files per transaction.
+
+    Args:
+        workers: Worker processes; 0 prepares the files in this process (small directories, debugging).
+        prune: Remove manifest sources that were not found under root.
+
+    Returns:
+        Stats: files, changed, unchanged, failed, removed, passages, users, elapsed_s, errors (first 20).
+    """
+    store = store or MemoryStore()
+    started = time.perf_counter()
+    known = store.known_hashes()
+    documents = discover_documents(root, default_user_id)
+    with ThreadPoolExecutor(max_workers=16) as io_pool:
+        hashes = list(io_pool.map(_hash_file, [path for _, path, _ in documents]))
+
+    stats: Dict[str, Any] = {"files": len(documents), "changed": 0, "unchanged": 0, "failed": 0, "removed": 0, "passages": 0, "users": 0, "errors": []}
+    if prune:
+        found = {(user, source) for user, _, source in documents}
+        missing = sorted(key for key in known if key not in found)
+        store.remove_sources(missing)
+        stats["removed"] = len(missing)
+    tasks = []
+    for (user, path, source), content_hash in zip(documents, hashes):
+        if content_hash is None:
+            stats["failed"] += 1
+            if len(stats["errors"]) < 20:
+                stats["errors"].append(f"{user}/{source}: unreadable")
+        elif known.get((user, source)) == content_hash:
+            stats["unchanged"] += 1
+        else:
+            tasks.append((user, path, source, content_hash))
+    users = set()
+    batch: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        if batch:
+            stats["passages"] += store.write_batch(batch)
+            users.update(r["user_id"] for r in batch)
+            batch.clear()
+            done = stats["changed"] + stats["unchanged"] + stats["failed"]
+            print(f"[MEMORY INGEST] {done}/{len(documents)} files processed, {stats['passages']} passages written")
+
+    def collect(results: Iterable[Dict[str, Any]]) -> None:
+        for result in results:
+            stats[result["status"]] += 1
+            if result["status"] == "failed" and len(stats["errors"]) < 20:
+                stats["errors"].append(f"{result['user_id']}/{result['source']}: {result['error']}")
+            elif result["status"] == "changed":
+                batch.append(result)
+                if len(batch) >= batch_files:
+                    flush()
+
+    if workers <= 0 or len(tasks) < POOL_MIN_FILES:
+        collect(map(prepare_file, tasks))
+    else:
+        # spawn: the pool may be started from a process with live threads (UI, runner)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            chunksize = max(1, min(64, len(tasks) // (workers * 8)))
+            collect(pool.map(prepare_file, tasks, chunksize=chunksize))
+    flush()
+
+    stats["users"] = len(users)
+    stats["elapsed_s"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+# --- 4. The Runner's Memory Service ---
+
+class StoreBackedMemoryService(InMemoryMemoryService):
+    """
+    InMemoryMemoryService that lazily loads a user's ingested documents from the MemoryStore
+    on their first memory search (and again after a re-ingest bumps the user's version).
+
+    Thousands of onboarded users therefore cost nothing at startup. Documents indexed live in
+    this process (e.g. a resume upload via the prefetcher) are newer than the store and win.
+    """
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        super().__init__()
+        self.store = store or MemoryStore()
+        self._loaded_versions: Dict[Tuple[str, str], float] = {}
+        self._store_sessions: Dict[Tuple[str, str], set] = {}  # Doc sessions that came from the store
+        self.stats = {"users_loaded": 0, "passages_loaded": 0}
+
+    async def add_session_to_memory(self, session) -> None:
+        with self._lock:
+            self._store_sessions.get((session.app_name, session.user_id), set()).discard(session.id)
+        await super().add_session_to_memory(session)
+
+    async def search_memory(self, *, app_name: str, user_id: str, query: str):
+        await self._ensure_loaded(app_name, user_id)
+        return await super().search_memory(app_name=app_name, user_id=user_id, query=query)
+
+    async def _ensure_loaded(self, app_name: str, user_id: str) -> None:
+        key = (app_name, user_id)
+        version = await asyncio.to_thread(self.store.user_version, user_id)
+        if version is None or self._loaded_versions.get(key, 0.0) >= version:
+            return
+        documents = await asyncio.to_thread(self.store.load_user, user_id)
+        events = {document_session_id(doc_key): document_events(doc_key, chunks) for doc_key, chunks in documents.items()}
+        with self._lock:
+            sessions = self._session_events.setdefault(key, {})
+            owned = self._store_sessions.setdefault(key, set())
+            for session_id in owned - events.keys():
+                # Its source files were removed from the store by a later ingest
+                sessions.pop(session_id, None)
+                owned.discard(session_id)
+            for session_id, doc_events in events.items():
+                if session_id in sessions and session_id not in owned:
+                    continue  # Indexed live in this process after the ingest
+                sessions[session_id] = doc_events
+                owned.add(session_id)
+            self._loaded_versions[key] = version
+            self.stats["users_loaded"] += 1
+            self.stats["passages_loaded"] += sum(len(e) for e in events.values())
@@ -0,0 +1,392 @@
+# core/metrics.py
+# In-process metrics: counters, gauges and log-bucket latency histograms with a Prometheus text export
+
+import contextlib
+import math
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import AgentTool
+
+# --- Configuration ---
+SUB_BUCKETS = 16                         # Buckets per power of two: <= ~3% relative error on quantiles
+SUMMARY_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+DEFAULT_METRICS_PORT = 9464
+DEFAULT_METRICS_HOST = "127.0.0.1"      # Loopback only; set METRICS_HOST=0.0.0.0 to let a remote scraper in
+
+LabelKey = Tuple[str, ...]
+
+
+# --- 1. Per-Thread Shards (no locks on the recording path) ---
+
+class _HistogramCell:
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class _Shard:
+    """Everything one thread has recorded. Only its owning thread writes to it."""
+    __slots__ = ("values", "histograms", "owner")
+
+    def __init__(self, owner: Optional[threading.Thread] = None):
+        self.values: Dict[Tuple[str, LabelKey], float] = {}
+        self.histograms: Dict[Tuple[str, LabelKey], _HistogramCell] = {}
+        self.owner = weakref.ref(owner) if owner is not None else None
+
+    def finished(self) -> bool:
+        if self.owner is None:
+            return False
+        thread = self.owner()
+        return thread is None or not thread.is_alive()
+
+    def merge_into(self, values: Dict[Tuple[str, LabelKey], float], histograms: Dict[Tuple[str, LabelKey], _HistogramCell]) -> None:
+        # dict.copy() is atomic under the GIL, so a concurrent writer can't break the iteration
+        for key, value in self.values.copy().items():
+            values[key] = values.get(key, 0.0) + value
+        for key, cell in self.histograms.copy().items():
+            merged = histograms.get(key)
+            if merged is None:
+                merged = histograms[key] = _HistogramCell()
+            for index, count in cell.buckets.copy().items():
+                merged.buckets[index] = merged.buckets.get(index, 0) + count
+            merged.count += cell.count
+            merged.total += cell.total
+            merged.max = max(merged.max, cell.max)
+
+
+def _bucket_index(value: float) -> int:
+    """
+    HDR-style log-linear bucket: SUB_BUCKETS linear steps inside each power of two.
+    frexp is a single C call, so this costs well under a microsecond.
+    """
+    if value <= 0.0:
+        return -(1 << 30)
+    mantissa, exponent = math.frexp(value)  # value = mantissa * 2**exponent, mantissa in [0.5, 1)
+    return exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+
+def _bucket_value(index: int) -> float:
+    """Midpoint of a bucket (the value reported for quantiles that fall into it)."""
+    if index == -(1 << 30):
+        return 0.0
+    exponent, sub = divmod(index, SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub + 0.5) / (2 * SUB_BUCKETS), exponent)
+
+
+# --- 2. Metric Types ---
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, LabelKey]:
+        return self.name, tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        values = self.registry._shard().values
+        values[key] = values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Up/down gauge (in-flight work). inc and dec may happen on different threads; shards are summed."""
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        values = self.registry._shard().values
+        values[key] = values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Latency histogram in seconds, exported as a Prometheus summary (quantiles + _sum + _count)."""
+    kind = "summary"
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        histograms = self.registry._shard().histograms
+        cell = histograms.get(key)
+        if cell is None:
+            cell = histograms[key] = _HistogramCell()
+        index = _bucket_index(value)
+        cell.buckets[index] = cell.buckets.get(index, 0) + 1
+        cell.count += 1
+        cell.total += value
+        if value > cell.max:
+            cell.max = value
+
+    @contextlib.contextmanager
+    def time(self, **labels) -> Iterator[Dict[str, Any]]:
+        """
+        Times the enclosed block. The yielded dict can override labels before exit, e.g.
+        labels['outcome'] = 'error'.
+        """
+        started = time.perf_counter()
+        labels = dict(labels)
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+# --- 3. Registry ---
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()  # Taken once per thread, when its shard is created
+        # Totals of threads that have exited (Streamlit runs every rerun on a new thread), so
+        # the shard list stays as long as the number of live threads
+        self._retired = _Shard()
+        self._metrics: Dict[str, _Metric] = {}
+        self._callbacks: Dict[str, Tuple[str, Tuple[str, ...], Callable[[], Any]]] = {}
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._shards_lock:
+                self._retire_finished_locked()
+                self._shards.append(shard)
+        return shard
+
+    def _retire_finished_locked(self) -> None:
+        """Folds the shards of exited threads into the retired totals (nobody writes to them any more)."""
+        live = []
+        for shard in self._shards:
+            if shard.finished():
+                shard.merge_into(self._retired.values, self._retired.histograms)
+            else:
+                live.append(shard)
+        self._shards = live
+
+    def _register(self, cls, name: str, help_text: str, labelnames: Sequence[str]):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(self, name, help_text, labelnames)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Histogram:
+        return self._register(Histogram, name, help_text, labelnames)
+
+    def gauge_callback(self, name: str, help_text: str, fn: Callable[[], Any], labelnames: Sequence[str] = ()) -> None:
+        """
+        Gauge read at snapshot time (zero cost on the hot path). fn returns a number, or a
+        dict of label tuple -> number when labelnames are given.
+        """
+        self._callbacks[name] = (help_text, tuple(labelnames), fn)
+
+    # --- Snapshot ---
+
+    def _merged(self) -> Tuple[Dict[Tuple[str, LabelKey], float], Dict[Tuple[str, LabelKey], _HistogramCell]]:
+        values: Dict[Tuple[str, LabelKey], float] = {}
+        histograms: Dict[Tuple[str, LabelKey], _HistogramCell] = {}
+        with self._shards_lock:
+            self._retire_finished_locked()
+            self._retired.merge_into(values, histograms)
+            shards = list(self._shards)
+        for shard in shards:
+            shard.merge_into(values, histograms)
+        return values, histograms
+
+    @staticmethod
+    def _quantile(cell: _HistogramCell, q: float) -> float:
+        if not cell.count:
+            return 0.0
+        rank = q * cell.count
+        seen = 0
+        for index in sorted(cell.buckets):
+            seen += cell.buckets[index]
+            if seen >= rank:
+                return min(_bucket_value(index), cell.max)
+        return cell.max
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Rows for the Debug tab: counters/gauges with values, histograms with count and quantiles."""
+        values, histograms = self._merged()
+        scalars = []
+        for (name, label_values), value in sorted(values.items()):
+            metric = self._metrics[name]
+            scalars.append({"metric": name, "type": metric.kind, "labels": dict(zip(metric.labelnames, label_values)), "value": round(value, 6)})
+        for name, (_, labelnames, fn) in sorted(self._callbacks.items()):
+            for label_values, value in self._callback_values(labelnames, fn):
+                scalars.append({"metric": name, "type": "gauge", "labels": dict(zip(labelnames, label_values)), "value": value})
+        latencies = []
+        for (name, label_values), cell in sorted(histograms.items()):
+            metric = self._metrics[name]
+            row = {"metric": name, "labels": dict(zip(metric.labelnames, label_values)), "count": cell.count,
+                   "mean_s": round(cell.total / cell.count, 4) if cell.count else 0.0}
+            row.update({f"p{int(q * 100)}_s": round(self._quantile(cell, q), 4) for q in SUMMARY_QUANTILES})
+            row["max_s"] = round(cell.max, 4)
+            latencies.append(row)
+        return {"scalars": scalars, "latencies": latencies}
+
+    @staticmethod
+    def _callback_values(labelnames: Tuple[str, ...], fn: Callable[[], Any]) -> List[Tuple[LabelKey, float]]:
+        try:
+            result = fn()
+        except Exception:
+            return []
+        if isinstance(result, dict):
+            return [(tuple(map(str, k if isinstance(k, tuple) else (k,))), float(v)) for k, v in result.items()]
+        return [((), float(result))]
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        values, histograms = self._merged()
+        lines: List[str] = []
+
+        def fmt(labelnames: Sequence[str], label_values: Sequence[str], extra: str = "") -> str:
+            pairs = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, label_values)]
+            if extra:
+                pairs.append(extra)
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        for name, metric in sorted(self._metrics.items()):
+            lines += [f"# HELP {name} {metric.help}", f"# TYPE {name} {metric.kind}"]
+            if isinstance(metric, Histogram):
+                for (metric_name, label_values), cell in sorted(histograms.items()):
+                    if metric_name != name:
+                        continue
+                    for q in SUMMARY_QUANTILES:
+                        quantile = 'quantile="%s"' % q
+                        lines.append(f"{name}{fmt(metric.labelnames, label_values, quantile)} {self._quantile(cell, q):.6g}")
+                    lines.append(f"{name}_sum{fmt(metric.labelnames, label_values)} {cell.total:.6g}")
+                    lines.append(f"{name}_count{fmt(metric.labelnames, label_values)} {cell.count}")
+            else:
+                for (metric_name, label_values), value in sorted(values.items()):
+                    if metric_name == name:
+                        lines.append(f"{name}{fmt(metric.labelnames, label_values)} {value:.6g}")
+        for name, (help_text, labelnames, fn) in sorted(self._callbacks.items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for label_values, value in self._callback_values(labelnames, fn):
+                lines.append(f"{name}{fmt(labelnames, label_values)} {value:.6g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+metrics = MetricsRegistry()
+
+# --- 4. Metric Catalog (one definition per metric, imported where it is recorded) ---
+
+mission_seconds = metrics.histogram("mission_seconds", "Wall time of run_mission.", ["outcome"])
+missions_total = metrics.counter("missions_total", "Missions finished, by outcome.", ["outcome"])
+missions_in_flight = metrics.gauge("missions_in_flight", "Missions currently executing in this process.")
+ui_mission_seconds = metrics.histogram("ui_mission_seconds", "Mission latency seen by the UI (includes queueing), by tab.", ["tab", "outcome"])
+agent_delegation_seconds = metrics.histogram("agent_delegation_seconds", "AgentTool delegation wall time.", ["agent", "outcome"])
+agent_delegations_total = metrics.counter("agent_delegations_total", "AgentTool delegations, by outcome.", ["agent", "outcome"])
+tool_seconds = metrics.histogram("tool_seconds", "FunctionTool call wall time.", ["tool", "outcome"])
+tool_calls_total = metrics.counter("tool_calls_total", "FunctionTool calls, by outcome.", ["tool", "outcome"])
+model_seconds = metrics.histogram("model_seconds", "Model call wall time, by agent.", ["agent", "outcome"])
+model_escalations_total = metrics.counter("model_escalations_total", "Cascade escalations from the fast to the strong model.", ["cascade"])
+http_responses_total = metrics.counter("http_responses_total", "Model API HTTP responses, by status code.", ["status"])
+http_retryable_responses_total = metrics.counter("http_retryable_responses_total", "HTTP 408/429/5xx responses (each one triggers a client retry).")
+
+
+# --- 5. Runner Plugin (model + tool instrumentation) ---
+
+class MetricsPlugin(BasePlugin):
+    """Times every model call and FunctionTool call. AgentTool delegations are recorded by ResilientAgentTool."""
+
+    def __init__(self):
+        super().__init__(name="metrics")
+        self._started: Dict[Tuple[str, str], float] = {}
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        self._started[("model", callback_context.invocation_id + callback_context.agent_name)] = time.perf_counter()
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        if not llm_response.partial:
+            self._finish_model(callback_context, "error" if llm_response.error_code else "ok")
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        self._finish_model(callback_context, "error")
+        return None
+
+    def _finish_model(self, callback_context, outcome: str) -> None:
+        started = self._started.pop(("model", callback_context.invocation_id + callback_context.agent_name), None)
+        if started is not None:
+            model_seconds.observe(time.perf_counter() - started, agent=callback_context.agent_name, outcome=outcome)
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        if not isinstance(tool, AgentTool):
+            self._started[("tool", tool_context.function_call_id or tool.name)] = time.perf_counter()
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        self._finish_tool(tool, tool_context, "ok")
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        self._finish_tool(tool, tool_context, "error")
+        return None
+
+    def _finish_tool(self, tool, tool_context, outcome: str) -> None:
+        started = self._started.pop(("tool", tool_context.function_call_id or tool.name), None)
+        if started is not None:
+            tool_seconds.observe(time.perf_counter() - started, tool=tool.name, outcome=outcome)
+            tool_calls_total.inc(tool=tool.name, outcome=outcome)
+
+
+# --- 6. HTTP Endpoint ---
+
+def start_metrics_server(port: int = DEFAULT_METRICS_PORT, registry: MetricsRegistry = metrics,
+                         host: str = DEFAULT_METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """Serves GET /metrics on a daemon thread, bound to host. Returns None if the port is already taken."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        print(f"[METRICS] Endpoint not started on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True).start()
+    print(f"[METRICS] Prometheus endpoint on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,406 @@
+# core/mission_executor.py
+# Multi-process mission executor: scales run_mission across CPU cores
+
+import asyncio
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# --- Configuration ---
+DEFAULT_WORKERS = os.cpu_count() or 2
+MAX_MISSIONS_PER_WORKER = 200      # Recycle a worker after this many missions (bounds leaks/memory growth)
+MAX_CONCURRENCY_PER_WORKER = 4     # Missions awaited concurrently on one worker's event loop
+HEALTH_CHECK_INTERVAL = 15.0       # Seconds between pings
+HEALTH_CHECK_TIMEOUT = 10.0        # A worker that has not answered a ping within this is recycled
+
+MissionOutcome = Tuple[str, Optional[str]]  # (captured transcript, error message or None)
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised on missions that were in flight on a worker that died or was killed."""
+
+
+# --- 1. Per-User State Shipped With Each Mission ---
+# Workers are spawned interpreters: module-level state of the submitting process never reaches
+# them. What a mission reads from that state travels with the job:
+#   - 'files':     the user:* entries of tools.file_tools.MOCK_USER_FILES (e.g. an uploaded resume)
+#   - 'documents': the user's context-cache documents (doc_key -> (version, text)), which the
+#                  worker registers with its own context cache and indexes into its memory service
+# Worker-local by design: sessions and their history (sticky routing keeps a session on one
+# worker), artifacts saved by tools, and the prefetcher's jobs and text cache (the mission text
+# already carries the pre-computed facts). Payload handles resolve in every process because the
+# payload store spills to disk.
+
+def collect_worker_state(user_id: str) -> Dict[str, Any]:
+    """Snapshot of the submitting process's state that a mission for user_id may read."""
+    from core.context_cache import context_cache
+    from tools.file_tools import MOCK_USER_FILES
+
+    return {
+        "files": {k: v for k, v in MOCK_USER_FILES.items() if k.startswith("user:")},
+        "documents": context_cache.user_documents(user_id),
+    }
+
+
+async def apply_worker_state(user_id: str, state: Dict[str, Any]) -> None:
+    """Installs a collect_worker_state() snapshot in this process; unchanged document versions are skipped."""
+    from core.context_cache import context_cache
+    from tools.file_tools import MOCK_USER_FILES
+    from tools.memory_tools import index_user_document
+    import runner
+
+    MOCK_USER_FILES.update(state.get("files") or {})
+    for doc_key, (version, text) in (state.get("documents") or {}).items():
+        if context_cache.document_version(user_id, doc_key) == version:
+            continue
+        context_cache.set_document(user_id, doc_key, text, version=version)
+        await index_user_document(runner.memory_service, runner.APP_NAME, user_id, doc_key, text)
+
+
+# --- 2. Worker Process ---
+
+def _worker_main(index: int, inbox, outbox, max_concurrency: int) -> None:
+    """
+    Entry point of a worker process. Each worker imports runner.py itself, so it owns
+    its own Runner, agent tree, session service and memory service.
+    """
+    # Windows SSL fix (same as runner.py / agentic_ai.py)
+    import sys
+    if sys.platform.startswith("win"):
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    from core.http_client import aclose_shared_async_client
+    from core.transcript import capture_output
+    import runner
+
+    async def run_one(request_id: int, payload: Dict[str, Any], limiter: asyncio.Semaphore):
+        async with limiter:
+            error = None
+            state = payload.pop("worker_state", None)
+            with capture_output() as buf:
+                try:
+                    if state:
+                        await apply_worker_state(payload.get("user_id", runner.USER_ID), state)
+                    await runner.run_mission(**payload)
+                except Exception as e:
+                    buf.write(f"\n[ERROR] Exception while running mission: {e}\n")
+                    error = f"{type(e).__name__}: {e}"
+            outbox.put(("result", index, request_id, buf.getvalue(), error))
+
+    async def serve():
+        loop = asyncio.get_running_loop()
+        limiter = asyncio.Semaphore(max_concurrency)
+        inflight = set()
+        completed = 0
+        while True:
+            kind, request_id, payload = await loop.run_in_executor(None, inbox.get)
+            if kind == "mission":
+                task = asyncio.create_task(run_one(request_id, payload, limiter))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+                completed += 1
+            elif kind == "ping":
+                outbox.put(("pong", index, request_id, {"inflight": len(inflight), "accepted": completed}, None))
+            elif kind == "stop":
+                # Graceful recycle: finish what is in flight, then exit. request_id identifies
+                # this generation, since a slot may have several retiring workers.
+                if inflight:
+                    await asyncio.gather(*inflight, return_exceptions=True)
+                await aclose_shared_async_client()
+                outbox.put(("stopped", index, request_id, "", None))
+                return
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(serve())
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+# --- 3. Parent-side Bookkeeping ---
+
+@dataclass
+class _Worker:
+    index: int
+    process: Any
+    inbox: Any
+    generation: int
+    started_at: float = field(default_factory=time.monotonic)
+    dispatched: int = 0
+    last_pong: float = field(default_factory=time.monotonic)
+    pending_ping: Optional[int] = None
+    ping_sent_at: float = 0.0
+    stop_id: Optional[int] = None
+    inflight: Dict[int, Future] = field(default_factory=dict)
+
+
+class MissionExecutor:
+    """
+    Runs missions on a pool of worker processes, each with its own Runner.
+
+    Routing is sticky: every mission with the same session key (session_id, or user_id
+    when no session is given) goes to the same worker slot, so multi-turn context held
+    by that worker's InMemorySessionService stays local. A background monitor pings
+    workers, replaces dead or hung ones, and recycles workers that have served
+    MAX_MISSIONS_PER_WORKER missions.
+
+    NOTE: Session state lives inside the worker. Recycling a slot starts a fresh
+    process, so sessions on that slot begin again with an empty history. Other state a
+    mission needs from the submitting process is passed as worker_state (see section 1).
+
+    Every submitted future resolves: with the worker's result, or with WorkerCrashedError
+    when its worker dies (also while retiring) or the executor shuts down first.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = DEFAULT_WORKERS,
+        max_missions_per_worker: int = MAX_MISSIONS_PER_WORKER,
+        max_concurrency_per_worker: int = MAX_CONCURRENCY_PER_WORKER,
+        health_check_interval: float = HEALTH_CHECK_INTERVAL,
+        health_check_timeout: float = HEALTH_CHECK_TIMEOUT,
+    ):
+        if num_workers < 1:
+            raise ValueError("num_workers must be >= 1")
+        self.num_workers = num_workers
+        self.max_missions_per_worker = max_missions_per_worker
+        self.max_concurrency_per_worker = max_concurrency_per_worker
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+
+        # 'spawn' gives each worker a clean interpreter (no inherited threads/event loops).
+        self._ctx = mp.get_context("spawn")
+        self._outbox = self._ctx.Queue()
+        self._workers: List[_Worker] = []
+        self._retiring: Dict[Tuple[int, int], _Worker] = {}
+        self._ids = itertools.count(1)
+        self._generations = itertools.count(1)
+        self._lock = threading.RLock()
+        self._stopping = threading.Event()
+        self._collector: Optional[threading.Thread] = None
+        self._monitor: Optional[threading.Thread] = None
+        self.recycled = 0
+
+    # --- Lifecycle ---
+
+    def start(self) -> "MissionExecutor":
+        with self._lock:
+            if self._workers:
+                return self
+            self._workers = [self._spawn(i) for i in range(self.num_workers)]
+        self._collector = threading.Thread(target=self._collect_results, name="mission-executor-collector", daemon=True)
+        self._monitor = threading.Thread(target=self._monitor_health, name="mission-executor-monitor", daemon=True)
+        self._collector.start()
+        self._monitor.start()
+        print(f"[EXECUTOR] Started {self.num_workers} mission worker process(es).")
+        return self
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """Stops all workers, letting in-flight missions finish within the timeout."""
+        self._stopping.set()
+        with self._lock:
+            # Every worker retires, so the collector keeps draining results until they are gone
+            for worker in self._workers:
+                self._retire_locked(worker)
+            self._workers = []
+            workers = list(self._retiring.values())
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join(5)
+        # Results sent before the workers exited may still be queued: let the collector deliver them
+        if self._collector is not None and self._collector is not threading.current_thread():
+            self._collector.join(max(1.0, deadline - time.monotonic()))
+        with self._lock:
+            for worker in workers:
+                self._fail_inflight(worker, "executor shut down")
+            self._retiring.clear()
+
+    def __enter__(self) -> "MissionExecutor":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    # --- Submission ---
+
+    def route(self, routing_key: str) -> int:
+        """Maps a session/user key to a stable worker slot."""
+        return zlib.crc32(routing_key.encode("utf-8")) % self.num_workers
+
+    def submit(self, mission_query: str, user_id: Optional[str] = None, session_id: Optional[str] = None, **mission_kwargs) -> Future:
+        """
+        Queues a mission on its sticky worker.
+
+        Returns:
+            A concurrent.futures.Future resolving to (captured transcript, error message or None).
+        """
+        if not self._workers:
+            raise RuntimeError("MissionExecutor is not running. Call start() first.")
+        # mission_kwargs may carry worker_state=collect_worker_state(user_id), applied before the mission
+        payload = dict(mission_kwargs, mission_query=mission_query, session_id=session_id)
+        if user_id is not None:
+            payload["user_id"] = user_id
+        routing_key = session_id or user_id or mission_query
+        future: Future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            worker = self._workers[self.route(routing_key)]
+            worker.inflight[request_id] = future
+            worker.dispatched += 1
+            worker.inbox.put(("mission", request_id, payload))
+            if worker.dispatched >= self.max_missions_per_worker:
+                self._recycle_locked(worker.index, graceful=True, reason="mission quota reached")
+        return future
+
+    def run(self, mission_query: str, user_id: Optional[str] = None, session_id: Optional[str] = None, timeout: Optional[float] = None, **mission_kwargs) -> MissionOutcome:
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(mission_query, user_id=user_id, session_id=session_id, **mission_kwargs).result(timeout)
+
+    # --- Health & Recycling ---
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-slot status snapshot (for the Debug tab / logs)."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "slot": w.index,
+                    "pid": w.process.pid,
+                    "alive": w.process.is_alive(),
+                    "generation": w.generation,
+                    "dispatched": w.dispatched,
+                    "inflight": len(w.inflight),
+                    "uptime_s": round(now - w.started_at, 1),
+                    "last_pong_s_ago": round(now - w.last_pong, 1),
+                }
+                for w in self._workers
+            ]
+
+    def queue_depth(self) -> int:
+        """Number of missions submitted but not yet finished, across all workers."""
+        with self._lock:
+            return sum(len(w.inflight) for w in self._workers) + sum(len(w.inflight) for w in self._retiring.values())
+
+    def recycle(self, index: int, graceful: bool = True) -> None:
+        with self._lock:
+            self._recycle_locked(index, graceful=graceful, reason="manual")
+
+    def _spawn(self, index: int) -> _Worker:
+        inbox = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, inbox, self._outbox, self.max_concurrency_per_worker),
+            name=f"mission-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return _Worker(index=index, process=process, inbox=inbox, generation=next(self._generations))
+
+    def _recycle_locked(self, index: int, graceful: bool, reason: str) -> None:
+        old = self._workers[index]
+        self._workers[index] = self._spawn(index)
+        self.recycled += 1
+        print(f"[EXECUTOR] Recycling worker slot {index} (pid {old.process.pid}): {reason}.")
+        if graceful and old.process.is_alive():
+            self._retire_locked(old)
+        else:
+            if old.process.is_alive():
+                old.process.kill()
+            self._fail_inflight(old, f"worker recycled ({reason})")
+
+    def _retire_locked(self, worker: _Worker) -> None:
+        # The process finishes its in-flight missions, then reports 'stopped' with this stop id.
+        worker.stop_id = next(self._ids)
+        self._retiring[(worker.index, worker.generation)] = worker
+        worker.inbox.put(("stop", worker.stop_id, None))
+
+    def _reap_retiring_locked(self) -> None:
+        # Only called once the outbox is empty, so a dead worker has nothing left to deliver.
+        for key, worker in list(self._retiring.items()):
+            if not worker.process.is_alive():
+                self._fail_inflight(worker, f"process exited while retiring (code {worker.process.exitcode})")
+                del self._retiring[key]
+
+    def _fail_inflight(self, worker: _Worker, reason: str) -> None:
+        for future in worker.inflight.values():
+            if not future.done():
+                future.set_exception(WorkerCrashedError(f"Mission lost on worker {worker.index}: {reason}"))
+        worker.inflight.clear()
+
+    def _find_owner(self, index: int, request_id: int) -> Optional[_Worker]:
+        candidates = [self._workers[index]] if index < len(self._workers) else []
+        candidates += [w for w in self._retiring.values() if w.index == index]
+        for worker in candidates:
+            if request_id in worker.inflight or worker.pending_ping == request_id:
+                return worker
+        return None
+
+    def _collect_results(self) -> None:
+        while not self._stopping.is_set() or self.queue_depth():
+            try:
+                kind, index, request_id, body, error = self._outbox.get(timeout=0.5)
+            except queue.Empty:
+                with self._lock:
+                    self._reap_retiring_locked()
+                continue
+            with self._lock:
+                if kind == "result":
+                    worker = self._find_owner(index, request_id)
+                    future = worker.inflight.pop(request_id, None) if worker else None
+                    if future is not None and not future.done():
+                        future.set_result((body, error))
+                elif kind == "pong":
+                    worker = self._find_owner(index, request_id)
+                    if worker is not None:
+                        worker.pending_ping = None
+                        worker.last_pong = time.monotonic()
+                elif kind == "stopped":
+                    for key, worker in list(self._retiring.items()):
+                        if worker.stop_id == request_id:
+                            # Its results precede 'stopped' in the outbox; anything left was lost
+                            self._fail_inflight(worker, "worker stopped without reporting a result")
+                            worker.process.join(5)
+                            del self._retiring[key]
+
+    def _monitor_health(self) -> None:
+        while not self._stopping.wait(self.health_check_interval):
+            with self._lock:
+                now = time.monotonic()
+                for worker in list(self._workers):
+                    if not worker.process.is_alive():
+                        self._recycle_locked(worker.index, graceful=False, reason=f"process exited (code {worker.process.exitcode})")
+                    elif worker.pending_ping is not None and now - worker.ping_sent_at > self.health_check_timeout:
+                        self._recycle_locked(worker.index, graceful=False, reason="health check timed out")
+                    elif worker.pending_ping is None:
+                        worker.pending_ping = next(self._ids)
+                        worker.ping_sent_at = now
+                        worker.inbox.put(("ping", worker.pending_ping, None))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run missions across a pool of worker processes.")
+    parser.add_argument("missions", nargs="+", help="Mission prompts to execute.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    with MissionExecutor(num_workers=args.workers) as executor:
+        futures = [executor.submit(m, session_id=f"cli_{i}") for i, m in enumerate(args.missions)]
+        for future in futures:
+            transcript, error = future.result()
+            print(transcript)
+            if error:
+                print(f"[ERROR] {error}")
@@ -0,0 +1,269 @@
+# core/models.py
+# Model wrappers shared by all agents (runner.py and agents/*)
+
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import Client, types
+from pydantic import BaseModel, ValidationError
+
+from core import http_client
+from core.metrics import model_escalations_total
+from core.resilience import CircuitOpenError, get_breaker
+
+
+class PooledGemini(Gemini):
+    """
+    Drop-in replacement for Gemini(model=..., retry_options=...) that sends every request
+    through the process-wide pooled HTTP client (core/http_client.py) instead of building
+    a private client stack per agent. AgentTool delegation therefore reuses warm,
+    keep-alive connections rather than paying TCP/TLS setup on every hop.
+    """
+
+    @property
+    def api_client(self) -> Client:
+        # An explicitly injected client still wins (ADK releases that expose a 'client' field).
+        explicit = getattr(self, "client", None)
+        if explicit is not None:
+            return explicit
+        return http_client.genai_client(
+            retry_options=self.retry_options,
+            headers=self._shared_headers(),
+            base_url=getattr(self, "base_url", None),
+            api_version=getattr(self, "api_version", None),
+        )
+
+    def _shared_headers(self) -> Dict[str, str]:
+        # ADK exposes the tracking headers as a property in some releases and a method in others.
+        headers = self._tracking_headers
+        return headers() if callable(headers) else headers
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        # Per-model circuit breaker: while the provider is failing, calls fast-fail here
+        # instead of each one waiting out the full retry chain.
+        breaker = get_breaker(f"model:{self.model}")
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for model {self.model}; failing fast.")
+        started = time.perf_counter()
+        failed = None
+        try:
+            async for response in super().generate_content_async(llm_request, stream=stream):
+                if response.error_code:
+                    failed = True
+                yield response
+            failed = bool(failed)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if failed is None:
+                breaker.release()  # consumer stopped early; no verdict on the model
+            elif failed:
+                breaker.record_failure(time.perf_counter() - started)
+            else:
+                breaker.record_success(time.perf_counter() - started)
+
+
+# --- Model Cascade (cheap model first, escalate on failed local checks) ---
+
+# Phrases that mark a refusal / non-answer from the fast model.
+_REFUSAL_PATTERN = re.compile(
+    r"\b(i\s*(?:can(?:'|no)t|cannot|am unable to|'m unable to|am not able to)\s+(?:help|assist|answer|do that|complete|provide))"
+    r"|\bas an ai\b|\bi don't have (?:access|enough information)\b",
+    re.IGNORECASE,
+)
+# Finish reasons after which the fast answer is not trusted.
+_BAD_FINISH_REASONS = {"SAFETY", "MAX_TOKENS", "RECITATION", "MALFORMED_FUNCTION_CALL", "BLOCKLIST", "PROHIBITED_CONTENT"}
+
+
+@dataclass
+class CascadeStats:
+    """Escalation and latency bookkeeping for one cascaded agent model."""
+    calls: int = 0
+    escalations: int = 0
+    escalation_reasons: Counter = field(default_factory=Counter)
+    fast_latency_s: float = 0.0
+    strong_latency_s: float = 0.0
+    strong_latency_ewma_s: Optional[float] = None  # Running estimate of what the strong model costs per call
+    estimated_saved_s: float = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        served_fast = self.calls - self.escalations
+        return {
+            "calls": self.calls,
+            "escalations": self.escalations,
+            "escalation_rate": round(self.escalations / self.calls, 3) if self.calls else 0.0,
+            "escalation_reasons": dict(self.escalation_reasons),
+            "avg_fast_latency_s": round(self.fast_latency_s / self.calls, 3) if self.calls else 0.0,
+            "avg_strong_latency_s": round(self.strong_latency_s / self.escalations, 3) if self.escalations else None,
+            "served_by_fast": served_fast,
+            "estimated_saved_s": round(self.estimated_saved_s, 2),
+        }
+
+
+# One entry per cascade label (agent name); read by the Debug tab.
+cascade_stats: Dict[str, CascadeStats] = {}
+
+
+def _response_parts(responses: List[LlmResponse]) -> List[types.Part]:
+    parts: List[types.Part] = []
+    for response in responses:
+        if response.content and response.content.parts and not response.partial:
+            parts.extend(response.content.parts)
+    return parts
+
+
+def check_fast_response(responses: List[LlmResponse], llm_request: LlmRequest) -> Optional[str]:
+    """
+    Local confidence/validity check on the fast model's answer.
+
+    Returns:
+        None when the answer can be served, otherwise the reason to escalate.
+    """
+    if not responses:
+        return "empty_response"
+    for response in responses:
+        if response.error_code:
+            return f"error:{response.error_code}"
+        finish = getattr(response.finish_reason, "name", response.finish_reason)
+        if finish in _BAD_FINISH_REASONS:
+            return f"finish_reason:{finish}"
+
+    parts = _response_parts(responses)
+    function_calls = [p.function_call for p in parts if p.function_call]
+    text = "".join(p.text for p in parts if p.text and not p.thought).strip()
+
+    # Tool-call sanity: the tool must exist and its required arguments must be present.
+    for call in function_calls:
+        tool = llm_request.tools_dict.get(call.name)
+        if tool is None:
+            return f"unknown_tool:{call.name}"
+        declaration = tool._get_declaration() if hasattr(tool, "_get_declaration") else None
+        schema = getattr(declaration, "parameters", None)
+        required = list(getattr(schema, "required", None) or [])
+        missing = [name for name in required if name not in (call.args or {})]
+        if missing:
+            return f"missing_args:{call.name}"
+
+    if function_calls:
+        return None
+    if not text:
+        return "empty_text"
+    if _REFUSAL_PATTERN.search(text[:400]):
+        return "refusal"
+
+    # Schema validity for agents that declare a structured output.
+    schema = llm_request.config.response_schema if llm_request.config else None
+    if schema is not None:
+        try:
+            payload = json.loads(text)
+            if isinstance(schema, type) and issubclass(schema, BaseModel):
+                schema.model_validate(payload)
+        except (ValueError, ValidationError):
+            return "schema_invalid"
+    return None
+
+
+def _request_for(llm_request: LlmRequest, model: BaseLlm) -> LlmRequest:
+    # Gemini mutates contents/config in place, so each tier gets its own copy.
+    return llm_request.model_copy(update={
+        "model": model.model,
+        "contents": list(llm_request.contents),
+        "config": llm_request.config.model_copy(deep=True) if llm_request.config else None,
+    })
+
+
+class CascadeLlm(BaseLlm):
+    """
+    Cascading model policy for one agent: the fast/cheap model answers first, the answer
+    is checked locally (check_fast_response) and only failures are escalated to the
+    strong model. Escalation rate and latency are recorded in cascade_stats[label].
+    """
+
+    fast: BaseLlm
+    strong: BaseLlm
+    label: str = "default"
+
+    @property
+    def capabilities(self):
+        # Tool/schema support is bounded by the model that may end up answering.
+        return self.strong.capabilities
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        stats = cascade_stats.setdefault(self.label, CascadeStats())
+        stats.calls += 1
+
+        started = time.perf_counter()
+        try:
+            fast_responses = [r async for r in self.fast.generate_content_async(_request_for(llm_request, self.fast), stream=False)]
+            reason = check_fast_response(fast_responses, llm_request)
+        except Exception as e:
+            fast_responses, reason = [], f"exception:{type(e).__name__}"
+        fast_elapsed = time.perf_counter() - started
+        stats.fast_latency_s += fast_elapsed
+
+        if reason is None:
+            if stats.strong_latency_ewma_s is not None:
+                stats.estimated_saved_s += max(0.0, stats.strong_latency_ewma_s - fast_elapsed)
+            for response in fast_responses:
+                yield response
+            return
+
+        # Degraded mode: with the strong model's breaker open, a usable-but-unverified fast
+        # answer beats failing the whole mission.
+        if fast_responses and get_breaker(f"model:{self.strong.model}").is_open:
+            stats.escalation_reasons["skipped_circuit_open"] += 1
+            print(f"[DEGRADED] {self.label}: {self.strong.model} circuit open; serving {self.fast.model} answer ({reason})")
+            for response in fast_responses:
+                yield response
+            return
+
+        stats.escalations += 1
+        stats.escalation_reasons[reason.split(":")[0]] += 1
+        model_escalations_total.inc(cascade=self.label)
+        print(f"[CASCADE] {self.label}: {self.fast.model} -> {self.strong.model} ({reason})")
+
+        started = time.perf_counter()
+        yielded = False
+        try:
+            async for response in self.strong.generate_content_async(_request_for(llm_request, self.strong), stream=stream):
+                yielded = True
+                yield response
+        except Exception as e:
+            if yielded or not fast_responses:
+                raise
+            print(f"[DEGRADED] {self.label}: {self.strong.model} failed ({type(e).__name__}); serving {self.fast.model} answer")
+            for response in fast_responses:
+                yield response
+            return
+        strong_elapsed = time.perf_counter() - started
+        stats.strong_latency_s += strong_elapsed
+        stats.strong_latency_ewma_s = (
+            strong_elapsed if stats.strong_latency_ewma_s is None
+            else 0.8 * stats.strong_latency_ewma_s + 0.2 * strong_elapsed
+        )
+
+
+def cascade(fast_model: str, strong_model: str, retry_options: Optional[types.HttpRetryOptions] = None, label: str = "default") -> CascadeLlm:
+    """
+    Builds a CascadeLlm over two pooled Gemini models.
+
+    The model name is 'cascade/<fast>/<strong>': ADK resolves a provider-prefixed name to its
+    last segment, so agents with built-in Gemini tools (google_search) still pass the
+    'gemini-*' check, while the context cache (which only handles plain 'gemini-*' names)
+    keeps a cascaded prompt inline.
+    """
+    return CascadeLlm(
+        model=f"cascade/{fast_model}/{strong_model}",
+        fast=PooledGemini(model=fast_model, retry_options=retry_options),
+        strong=PooledGemini(model=strong_model, retry_options=retry_options),
+        label=label,
+    )
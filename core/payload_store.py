@@ -0,0 +1,249 @@
+# core/payload_store.py
+# Content-addressed store for large payloads (full resumes, job lists, long sub-agent outputs)
+
+import contextlib
+import contextvars
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional
+
+from core.aio import offload_to_thread
+
+# --- Configuration ---
+PAYLOAD_DIR = os.path.join("output", "payloads")  # Spill location (shared by worker processes)
+MEMORY_BUDGET_CHARS = 8_000_000                   # Hot cache size before falling back to disk
+MAX_PAYLOAD_FILES = 5_000                         # Oldest payload files (all scopes) are pruned beyond this
+MAX_META_ENTRIES = 10_000                         # Handle metadata kept in memory (describe() falls back to disk)
+PRUNE_EVERY_WRITES = 100
+SUMMARY_CHARS = 300
+INLINE_RESULT_MAX_CHARS = 6_000                   # Tool results above this are returned as a handle
+PREVIEW_CHARS = 800                               # Opening text shipped alongside a handle
+DEFAULT_CHUNK_CHARS = 4_000                       # Page size for read_chunk
+
+# Handles come back from the model, so anything else is rejected before touching disk
+HANDLE_PATTERN = re.compile(r"^ref_[0-9a-f]{16}$")
+SHARED_SCOPE = "_shared"  # Payloads stored outside any user's mission (CLI, tests)
+
+# The user whose mission is running in this context; payloads are stored and resolved in
+# that user's scope, so one session can never read another user's resume or job lists.
+_payload_user: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("payload_user", default=None)
+
+
+@contextlib.contextmanager
+def payload_scope(user_id: Optional[str]) -> Iterator[None]:
+    """Payload handles created or read inside this block belong to user_id."""
+    token = _payload_user.set(user_id)
+    try:
+        yield
+    finally:
+        _payload_user.reset(token)
+
+
+def _scope(user_id: Optional[str]) -> str:
+    user_id = user_id if user_id is not None else _payload_user.get()
+    if user_id is None:
+        return SHARED_SCOPE
+    # Hashed, so arbitrary user ids are safe as directory names
+    return f"u_{hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:16]}"
+
+
+def summarize_text(text: str, max_chars: int = SUMMARY_CHARS) -> str:
+    """Cheap local summary: the opening lines, cut at a word boundary."""
+    compact = " ".join(text.split())
+    if len(compact) <= max_chars:
+        return compact
+    return compact[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+
+class PayloadStore:
+    """
+    Keeps large text payloads out of prompts and session history.
+
+    Payloads are addressed by content hash, so storing the same resume twice yields the
+    same handle. Recent payloads stay in memory; every payload is also written to
+    PAYLOAD_DIR/<user scope>/ so other processes (mission workers, the UI) can resolve the
+    handle. A handle only resolves in the scope of the user that stored it.
+
+    Both the metadata and the spill directory are bounded: the oldest payload files are
+    pruned every PRUNE_EVERY_WRITES writes, after which their handles stop resolving.
+    """
+
+    def __init__(self, directory: str = PAYLOAD_DIR, memory_budget_chars: int = MEMORY_BUDGET_CHARS,
+                 max_files: int = MAX_PAYLOAD_FILES, max_meta: int = MAX_META_ENTRIES):
+        self.directory = directory
+        self.memory_budget_chars = memory_budget_chars
+        self.max_files = max_files
+        self.max_meta = max_meta
+        self._hot: "OrderedDict[str, str]" = OrderedDict()
+        self._hot_chars = 0
+        self._meta: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        scope, handle = key.split("/")
+        return os.path.join(self.directory, scope, f"{handle}.txt")
+
+    @staticmethod
+    def _key(handle: str, user_id: Optional[str]) -> Optional[str]:
+        if not isinstance(handle, str) or not HANDLE_PATTERN.match(handle):
+            return None
+        return f"{_scope(user_id)}/{handle}"
+
+    def put(self, content: str, kind: str = "text", summary: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Stores a payload for user_id (default: the user of the running mission).
+
+        Blocking (disk write); async callers use put_async.
+
+        Returns:
+            A lightweight handle dict: {'handle', 'kind', 'size_chars', 'summary'}.
+        """
+        handle = f"ref_{hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]}"
+        key = self._key(handle, user_id)
+        meta = {"handle": handle, "kind": kind, "size_chars": len(content), "summary": summary or summarize_text(content)}
+        path = self._path(key)
+        with self._lock:
+            known = key in self._meta
+        if not known or not os.path.exists(path):
+            # Written outside the lock: a concurrent put of the same content writes identical bytes,
+            # and the rename keeps readers in other processes from seeing a partial file.
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        else:
+            os.utime(path)  # Recently stored payloads are pruned last
+        with self._lock:
+            self._meta[key] = meta
+            self._meta.move_to_end(key)
+            while len(self._meta) > self.max_meta:
+                self._meta.popitem(last=False)
+            self._remember_locked(key, content)
+            if not known:
+                self._writes += 1
+                if self._writes % PRUNE_EVERY_WRITES == 0:
+                    self._prune_locked()
+        return dict(meta)
+
+    put_async = offload_to_thread(put)
+
+    def _prune_locked(self) -> None:
+        files = []
+        for scope in os.listdir(self.directory):
+            scope_dir = os.path.join(self.directory, scope)
+            if os.path.isdir(scope_dir):
+                files.extend(os.path.join(scope_dir, name) for name in os.listdir(scope_dir) if name.endswith(".txt"))
+        files.sort(key=os.path.getmtime)
+        for path in files[:-self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            scope = os.path.basename(os.path.dirname(path))
+            key = f"{scope}/{os.path.basename(path)[:-len('.txt')]}"
+            self._meta.pop(key, None)
+            content = self._hot.pop(key, None)
+            if content is not None:
+                self._hot_chars -= len(content)
+
+    def _remember_locked(self, handle: str, content: str) -> None:
+        if handle in self._hot:
+            self._hot.move_to_end(handle)
+            return
+        self._hot[handle] = content
+        self._hot_chars += len(content)
+        while self._hot_chars > self.memory_budget_chars and len(self._hot) > 1:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_chars -= len(evicted)
+
+    def get(self, handle: str, user_id: Optional[str] = None) -> Optional[str]:
+        """The payload, or None if the handle is malformed or unknown in this user's scope."""
+        key = self._key(handle, user_id)
+        if key is None:
+            return None
+        with self._lock:
+            content = self._hot.get(key)
+            if content is not None:
+                self._hot.move_to_end(key)
+                return content
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        with self._lock:
+            self._remember_locked(key, content)
+        return content
+
+    def describe(self, handle: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        key = self._key(handle, user_id)
+        meta = self._meta.get(key) if key else None
+        if meta is None:
+            content = self.get(handle, user_id)
+            if content is None:
+                return None
+            meta = {"handle": handle, "kind": "text", "size_chars": len(content), "summary": summarize_text(content)}
+        return dict(meta)
+
+    def read(self, handle: str, offset: int = 0, length: int = DEFAULT_CHUNK_CHARS, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Reads one page of a stored payload.
+
+        Returns:
+            {'handle', 'offset', 'content', 'size_chars', 'next_offset'} (next_offset is None at the end),
+            or None if the handle is unknown.
+        """
+        content = self.get(handle, user_id)
+        if content is None:
+            return None
+        offset = max(0, int(offset))
+        end = min(len(content), offset + max(1, int(length)))
+        return {
+            "handle": handle,
+            "offset": offset,
+            "content": content[offset:end],
+            "size_chars": len(content),
+            "next_offset": end if end < len(content) else None,
+        }
+
+
+# Process-wide store used by session compaction and tool-result handles
+payload_store = PayloadStore()
+
+
+def inline_or_handle(content: str, kind: str = "text", threshold: int = INLINE_RESULT_MAX_CHARS, user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Returns {'content': ...} for small payloads. Above the threshold the payload is stored and a
+    lightweight handle comes back instead, with a preview and a hint to page through it via read_chunk.
+    """
+    if len(content) <= threshold:
+        return {"content": content}
+    handle = payload_store.put(content, kind=kind, user_id=user_id)
+    return {
+        "handle": handle["handle"],
+        "size_chars": handle["size_chars"],
+        "summary": handle["summary"],
+        "preview": content[:PREVIEW_CHARS],
+        "note": f"Full content stored as a handle. Call read_chunk(handle='{handle['handle']}', offset=0) to read it in pages.",
+    }
+
+
+def handle_note(content: str, kind: str = "text", threshold: int = INLINE_RESULT_MAX_CHARS, user_id: Optional[str] = None) -> str:
+    """String form of inline_or_handle for tools (and sub-agents) that return plain text."""
+    result = inline_or_handle(content, kind=kind, threshold=threshold, user_id=user_id)
+    if "handle" not in result:
+        return content
+    return (
+        f"[LARGE RESULT: {result['size_chars']:,} chars stored as handle '{result['handle']}'. "
+        f"Call read_chunk(handle='{result['handle']}', offset=0) for the full text.]\n"
+        f"Summary: {result['summary']}"
+    )
+
+
+# For callers on the event loop: storing a large result writes it to disk
+handle_note_async = offload_to_thread(handle_note)
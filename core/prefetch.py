@@ -0,0 +1,173 @@
+# core/prefetch.py
+# Speculative background processing of an uploaded resume (before the JD is even pasted)
+
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from core.context_cache import context_cache
+from core.payload_store import payload_store
+from tools.batch_screening import text_cache
+from tools.memory_tools import index_user_document
+from tools.skill_extraction import extract_skills
+
+# --- Configuration ---
+PREFETCH_WORKERS = 4
+RESUME_DOC_KEY = "user:resume"
+
+# Standalone heading lines that start a resume section
+_SECTION_HEADINGS = {
+    "summary": "summary", "profile": "summary", "professional summary": "summary", "objective": "summary",
+    "experience": "experience", "work experience": "experience", "professional experience": "experience", "employment": "experience",
+    "education": "education",
+    "skills": "skills", "technical skills": "skills", "core skills": "skills",
+    "projects": "projects", "selected projects": "projects",
+    "certifications": "certifications", "certificates": "certifications",
+    "publications": "publications", "awards": "awards",
+}
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """Splits resume text on heading lines ('EXPERIENCE', 'Skills:' ...); text before the first heading is 'header'."""
+    sections: Dict[str, List[str]] = {"header": []}
+    current = "header"
+    for line in text.splitlines():
+        key = re.sub(r"[^a-z ]", "", line.lower()).strip()
+        if key in _SECTION_HEADINGS and len(line.strip()) <= 40:
+            current = _SECTION_HEADINGS[key]
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+    return {name: "\n".join(lines).strip() for name, lines in sections.items() if "\n".join(lines).strip()}
+
+
+class PrefetchCancelled(Exception):
+    """The upload was replaced before this job finished."""
+
+
+@dataclass
+class ResumeInsights:
+    """Everything about the resume that does not depend on the JD."""
+    content_hash: str
+    file_name: str
+    text: str
+    extraction_flags: List[str]
+    sections: Dict[str, str]
+    skills: List[str]
+    payload: Dict[str, Any]            # Payload-store handle for the full text (shared across processes)
+    memory_passages: int = 0           # 0 when memory indexing was skipped
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class PrefetchJob:
+    def __init__(self, key: str, generation: int, content_hash: str):
+        self.key = key
+        self.generation = generation
+        self.content_hash = content_hash
+        self.stage = "queued"
+        self.future: Optional[Future] = None
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()  # Succeeds only if the job has not started yet
+
+    def check(self) -> None:
+        if self._cancelled.is_set():
+            raise PrefetchCancelled()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> ResumeInsights:
+        return self.future.result(timeout)
+
+
+class ResumePrefetcher:
+    """
+    Starts the JD-independent part of the resume analysis as soon as a file is uploaded:
+    text extraction -> sectioning -> skill extraction -> payload store + memory indexing.
+
+    One job per key (browser session / user). A new upload cancels the previous job:
+    not-yet-started jobs are dropped, running ones stop at the next stage boundary, and a
+    superseded job never writes to memory.
+    """
+
+    def __init__(self, memory_service=None, app_name: Optional[str] = None, max_workers: int = PREFETCH_WORKERS):
+        self.memory_service = memory_service
+        self.app_name = app_name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resume-prefetch")
+        self._jobs: Dict[str, PrefetchJob] = {}
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()  # Memory writes in upload order; a superseded job never writes
+
+    def start(self, key: str, file_name: str, data: bytes, user_id: str) -> PrefetchJob:
+        """Starts (or reuses, for identical bytes) the prefetch job for this key."""
+        content_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            previous = self._jobs.get(key)
+            if previous is not None and previous.content_hash == content_hash and not previous.cancelled:
+                return previous
+            if previous is not None:
+                previous.cancel()
+            job = PrefetchJob(key, (previous.generation + 1) if previous else 1, content_hash)
+            self._jobs[key] = job
+            job.future = self._pool.submit(self._run, job, file_name, data, user_id)
+        return job
+
+    def get(self, key: str) -> Optional[PrefetchJob]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def _is_current(self, job: PrefetchJob) -> bool:
+        with self._lock:
+            return self._jobs.get(job.key) is job
+
+    def _run(self, job: PrefetchJob, file_name: str, data: bytes, user_id: str) -> ResumeInsights:
+        timings: Dict[str, float] = {}
+
+        def stage(name: str) -> float:
+            job.check()
+            job.stage = name
+            return time.perf_counter()
+
+        started = stage("extracting text")
+        text, flags, _ = text_cache.get_or_extract(file_name, data)
+        timings["extract_s"] = time.perf_counter() - started
+
+        started = stage("splitting sections")
+        sections = split_sections(text)
+        timings["sections_s"] = time.perf_counter() - started
+
+        started = stage("extracting skills")
+        skills = sorted(extract_skills(text))
+        timings["skills_s"] = time.perf_counter() - started
+
+        started = stage("indexing")
+        payload = payload_store.put(text, kind="resume", user_id=user_id)
+        passages = 0
+        with self._index_lock:
+            if self._is_current(job):
+                # New resume version -> new cached prefix for the resume/coach agents
+                context_cache.set_document(user_id, RESUME_DOC_KEY, text, version=job.content_hash[:16])
+                if self.memory_service is not None:
+                    # InMemoryMemoryService is thread-safe; a private loop runs its async API here
+                    passages = asyncio.run(index_user_document(self.memory_service, self.app_name, user_id, RESUME_DOC_KEY, text))
+        timings["index_s"] = time.perf_counter() - started
+
+        job.stage = "ready"
+        return ResumeInsights(
+            content_hash=job.content_hash, file_name=file_name, text=text, extraction_flags=flags,
+            sections=sections, skills=skills, payload=payload, memory_passages=passages,
+            timings={k: round(v, 4) for k, v in timings.items()},
+        )
@@ -0,0 +1,228 @@
+# core/profiling.py
+# On-demand mission profiling: cProfile hotspots plus a wall-clock vs await breakdown
+
+import contextlib
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import AgentTool
+
+# --- Configuration ---
+PROFILE_DIR = os.path.join("output", "profiles")
+TOP_HOTSPOTS = 25
+
+_active_profile: contextvars.ContextVar[Optional["MissionProfile"]] = contextvars.ContextVar("active_mission_profile", default=None)
+_cprofile_threads: set = set()  # Only one cProfile can be active per thread
+_cprofile_lock = threading.Lock()
+
+
+class MissionProfile:
+    """
+    Profile of one mission.
+
+    - cProfile runs on the event-loop thread for the duration of the mission. Tools
+      offloaded with offload_to_thread run in worker threads and are not included.
+    - Timed spans (model calls, tools, session bookkeeping) come from ProfilingPlugin and
+      run_mission, which gives the wall-clock vs await split: CPU time on the loop thread
+      is local work, and the rest of the wall time was spent awaiting (models, network, threads).
+    """
+
+    def __init__(self, mission_id: str, directory: str = PROFILE_DIR):
+        self.mission_id = mission_id
+        self.directory = directory
+        self.profiler: Optional[cProfile.Profile] = None
+        self.spans: Dict[str, List[float]] = defaultdict(list)  # "model:Agent" / "tool:name" / "session" -> durations
+        self._open: Dict[str, float] = {}
+        self.wall_s = 0.0
+        self.loop_cpu_s = 0.0
+        self.note = ""
+
+    # --- Spans ---
+
+    def open_span(self, key: str, span_id: str) -> None:
+        self._open[f"{key}|{span_id}"] = time.perf_counter()
+
+    def close_span(self, key: str, span_id: str) -> None:
+        started = self._open.pop(f"{key}|{span_id}", None)
+        if started is not None:
+            self.spans[key].append(time.perf_counter() - started)
+
+    @contextlib.contextmanager
+    def phase(self, key: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[key].append(time.perf_counter() - started)
+
+    # --- Report ---
+
+    def hotspots(self, limit: int = TOP_HOTSPOTS) -> List[Dict[str, Any]]:
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                "function": f"{func} ({os.path.basename(filename)}:{line})",
+                "calls": ncalls,
+                "self_s": round(tottime, 4),
+                "cumulative_s": round(cumtime, 4),
+            })
+        rows.sort(key=lambda r: r["self_s"], reverse=True)
+        return rows[:limit]
+
+    def summary(self) -> Dict[str, Any]:
+        breakdown = {
+            key: {"count": len(durations), "total_s": round(sum(durations), 3), "max_s": round(max(durations), 3)}
+            for key, durations in sorted(self.spans.items())
+        }
+        model_s = sum(v["total_s"] for k, v in breakdown.items() if k.startswith("model:"))
+        tool_s = sum(v["total_s"] for k, v in breakdown.items() if k.startswith("tool:"))
+        agent_s = sum(v["total_s"] for k, v in breakdown.items() if k.startswith("agent:"))
+        return {
+            "mission_id": self.mission_id,
+            "wall_s": round(self.wall_s, 3),
+            "loop_cpu_s": round(self.loop_cpu_s, 3),
+            "await_s": round(max(0.0, self.wall_s - self.loop_cpu_s), 3),
+            "model_s": round(model_s, 3),
+            "tool_s": round(tool_s, 3),
+            "sub_agent_s": round(agent_s, 3),
+            "session_s": breakdown.get("session", {}).get("total_s", 0.0),
+            "spans": breakdown,
+            "hotspots": self.hotspots(),
+            "note": self.note,
+        }
+
+    def save(self) -> str:
+        """Writes <mission_id>.json (summary) and <mission_id>.prof (pstats dump). Returns the JSON path."""
+        os.makedirs(self.directory, exist_ok=True)
+        if self.profiler is not None:
+            self.profiler.dump_stats(os.path.join(self.directory, f"{self.mission_id}.prof"))
+        path = os.path.join(self.directory, f"{self.mission_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+
+@contextlib.contextmanager
+def profile_mission(mission_id: str, directory: str = PROFILE_DIR) -> Iterator[MissionProfile]:
+    """
+    Profiles the enclosed mission and saves the result under directory/<mission_id>.*
+
+    If another mission is already being cProfiled on this thread (concurrent missions share
+    one event loop), this one records only the timed spans.
+    """
+    profile = MissionProfile(mission_id, directory)
+    thread_id = threading.get_ident()
+    with _cprofile_lock:
+        own_cprofile = thread_id not in _cprofile_threads
+        if own_cprofile:
+            _cprofile_threads.add(thread_id)
+    if own_cprofile:
+        profile.profiler = cProfile.Profile()
+    else:
+        profile.note = "cProfile skipped: another profiled mission was running on the same event loop."
+
+    token = _active_profile.set(profile)
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    if profile.profiler is not None:
+        profile.profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profile.profiler is not None:
+            profile.profiler.disable()
+            with _cprofile_lock:
+                _cprofile_threads.discard(thread_id)
+        profile.wall_s = time.perf_counter() - wall_start
+        profile.loop_cpu_s = time.thread_time() - cpu_start
+        _active_profile.reset(token)
+        path = profile.save()
+        print(f"[PROFILE] wall {profile.wall_s:.2f}s | loop CPU {profile.loop_cpu_s:.2f}s | saved to {path}")
+
+
+def current_profile() -> Optional[MissionProfile]:
+    return _active_profile.get()
+
+
+def profiled_phase(key: str):
+    """Times the enclosed block into the active mission profile (no-op when not profiling)."""
+    profile = _active_profile.get()
+    return profile.phase(key) if profile is not None else contextlib.nullcontext()
+
+
+def load_profile(mission_id: str, directory: str = PROFILE_DIR) -> Optional[Dict[str, Any]]:
+    path = os.path.join(directory, f"{os.path.basename(mission_id)}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_profiles(directory: str = PROFILE_DIR) -> List[str]:
+    """Saved mission ids, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    files = [f for f in os.listdir(directory) if f.endswith(".json")]
+    files.sort(key=lambda f: os.path.getmtime(os.path.join(directory, f)), reverse=True)
+    return [f[:-len(".json")] for f in files]
+
+
+class ProfilingPlugin(BasePlugin):
+    """Runner plugin that times model calls and tool calls of profiled missions (no-op otherwise)."""
+
+    def __init__(self):
+        super().__init__(name="mission_profiling")
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        profile = _active_profile.get()
+        if profile is not None:
+            profile.open_span(f"model:{callback_context.agent_name}", callback_context.invocation_id)
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        self._close_model(callback_context)
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        self._close_model(callback_context)
+        return None
+
+    def _close_model(self, callback_context) -> None:
+        profile = _active_profile.get()
+        if profile is not None:
+            profile.close_span(f"model:{callback_context.agent_name}", callback_context.invocation_id)
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        profile = _active_profile.get()
+        if profile is not None:
+            profile.open_span(self._tool_key(tool), tool_context.function_call_id or "")
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        self._close_tool(tool, tool_context)
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        self._close_tool(tool, tool_context)
+        return None
+
+    def _close_tool(self, tool, tool_context) -> None:
+        profile = _active_profile.get()
+        if profile is not None:
+            profile.close_span(self._tool_key(tool), tool_context.function_call_id or "")
+
+    @staticmethod
+    def _tool_key(tool) -> str:
+        # Sub-agent delegations are reported separately from plain function tools
+        return f"agent:{tool.name}" if isinstance(tool, AgentTool) else f"tool:{tool.name}"
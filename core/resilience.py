@@ -0,0 +1,305 @@
+# core/resilience.py
+# Circuit breakers per agent/model and degraded-mode fallbacks for A2A delegation
+
+import asyncio
+import contextvars
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from google.adk.memory.base_memory_service import BaseMemoryService
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import AgentTool
+from google.adk.tools.tool_context import ToolContext
+
+from core.metrics import agent_delegation_seconds, agent_delegations_total
+from core.payload_store import handle_note_async
+
+# --- Configuration ---
+AGENT_TIMEOUT_S = 90.0        # Upper bound on one AgentTool delegation (bounds tail latency)
+DEGRADED_CACHE_SIZE = 256     # Last good sub-agent results kept for degraded answers
+AGENT_RESULT_INLINE_MAX_CHARS = 12_000  # Longer sub-agent outputs reach the orchestrator as a handle
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose breaker is open (fast-fail)."""
+
+
+# --- 1. Circuit Breaker ---
+
+@dataclass
+class BreakerConfig:
+    window_size: int = 20             # Calls kept in the rolling window
+    min_calls: int = 5                # Do not judge the error rate on fewer calls
+    error_rate_threshold: float = 0.5 # Trip when this share of windowed calls failed...
+    slow_call_s: float = 45.0         # ...or when this many seconds counts as a slow call
+    slow_rate_threshold: float = 0.8  # ...and this share of windowed calls was slow
+    cooldown_s: float = 30.0          # Time spent open before a half-open probe is allowed
+    half_open_probes: int = 1         # Concurrent trial calls while half-open
+
+
+class CircuitBreaker:
+    """
+    Rolling-window breaker (closed -> open -> half-open -> closed).
+
+    Trips on error rate or slow-call rate; while open every call fast-fails until the
+    cooldown passes, then a limited number of probes decide whether to close again.
+    """
+
+    def __init__(self, name: str, config: Optional[BreakerConfig] = None):
+        self.name = name
+        self.config = config or BreakerConfig()
+        self.state = CLOSED
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=self.config.window_size)  # (failed, slow)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected (open and still cooling down). Does not consume a probe."""
+        return self.state == OPEN and time.monotonic() - self._opened_at < self.config.cooldown_s
+
+    def allow(self) -> bool:
+        """Asks permission for one call. Every allowed call must end in record_success/record_failure/release."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.config.cooldown_s:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.config.half_open_probes:
+                    self.rejected += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def record_success(self, latency_s: float) -> None:
+        self._record(failed=False, latency_s=latency_s)
+
+    def record_failure(self, latency_s: float) -> None:
+        self._record(failed=True, latency_s=latency_s)
+
+    def release(self) -> None:
+        """Gives back an allowed call that ended without an outcome (e.g. consumer stopped early)."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def _record(self, failed: bool, latency_s: float) -> None:
+        slow = latency_s >= self.config.slow_call_s
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed or slow:
+                    self._trip_locked()
+                else:
+                    self.state = CLOSED
+                    self._window.clear()
+                return
+            self._window.append((failed, slow))
+            if self.state == CLOSED and len(self._window) >= self.config.min_calls:
+                n = len(self._window)
+                error_rate = sum(f for f, _ in self._window) / n
+                slow_rate = sum(s for _, s in self._window) / n
+                if error_rate >= self.config.error_rate_threshold or slow_rate >= self.config.slow_rate_threshold:
+                    self._trip_locked()
+
+    def _trip_locked(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+        self.trips += 1
+        print(f"[CIRCUIT OPEN] {self.name}: fast-failing for {self.config.cooldown_s:.0f}s.")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            n = len(self._window)
+            return {
+                "state": OPEN if self.is_open else (HALF_OPEN if self.state == OPEN else self.state),
+                "window_calls": n,
+                "window_error_rate": round(sum(f for f, _ in self._window) / n, 3) if n else 0.0,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, config: Optional[BreakerConfig] = None) -> CircuitBreaker:
+    """Process-wide breaker registry, keyed like 'agent:ResearchAgent' or 'model:gemini-2.5-pro'."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, config)
+        return breaker
+
+
+def breaker_snapshot() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        return {name: breaker.snapshot() for name, breaker in _breakers.items()}
+
+
+# --- 2. Degraded Answers ---
+
+class _LruCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+            return hit
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+
+# Last successful result per (user, agent, normalized request). Answers can contain the user's
+# resume or layoff details, so a degraded answer is only ever served back to the same user.
+degraded_cache = _LruCache(DEGRADED_CACHE_SIZE)
+
+
+def _request_text(args: Dict[str, Any]) -> str:
+    if "request" in args:
+        return str(args["request"])
+    return json.dumps(args, ensure_ascii=False, sort_keys=True)
+
+
+def _cache_key(user_id: str, agent_name: str, args: Dict[str, Any]) -> str:
+    return f"{user_id}\x1f{agent_name}:{' '.join(_request_text(args).lower().split())}"
+
+
+# Memory service of the invocation that is delegating right now (see SubAgentMemoryPlugin)
+_caller_memory: contextvars.ContextVar[Optional[BaseMemoryService]] = contextvars.ContextVar("caller_memory", default=None)
+
+
+class SubAgentMemoryPlugin(BasePlugin):
+    """
+    AgentTool runs every sub-agent with a fresh, empty InMemoryMemoryService, so the
+    specialists' load_memory never saw the documents indexed into the Runner's memory.
+    This plugin (inherited by AgentTool sub-runs) points each sub-run at the memory
+    service of the ResilientAgentTool call that started it.
+    """
+
+    def __init__(self):
+        super().__init__(name="sub_agent_memory")
+
+    async def before_run_callback(self, *, invocation_context):
+        memory = _caller_memory.get()
+        if memory is not None:
+            invocation_context.memory_service = memory
+        return None
+
+
+class ResilientAgentTool(AgentTool):
+    """
+    AgentTool with a per-agent circuit breaker, a delegation timeout and degraded answers.
+
+    A failing sub-agent no longer aborts the whole mission: the orchestrator receives a
+    degraded result instead (cached answer for the same request, a local deterministic
+    fallback, or an explicit 'unavailable' note) and can still aggregate the outputs of
+    the sub-agents that succeeded.
+    """
+
+    def __init__(
+        self,
+        agent,
+        fallback: Optional[Callable[[str], Any]] = None,  # Sync or async; called with the request text
+        timeout_s: float = AGENT_TIMEOUT_S,
+        breaker_config: Optional[BreakerConfig] = None,
+        **kwargs,
+    ):
+        super().__init__(agent=agent, **kwargs)
+        self.fallback = fallback
+        self.timeout_s = timeout_s
+        self.breaker = get_breaker(f"agent:{agent.name}", breaker_config)
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context: ToolContext) -> Any:
+        key = _cache_key(tool_context.user_id, self.name, args)
+        if not self.breaker.allow():
+            self._record(0.0, "circuit_open")
+            return await self._degraded(key, args, "circuit open")
+
+        started = time.perf_counter()
+        memory_token = _caller_memory.set(tool_context._invocation_context.memory_service)
+        try:
+            result = await asyncio.wait_for(super().run_async(args=args, tool_context=tool_context), self.timeout_s)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            self._record(time.perf_counter() - started, "cancelled")
+            raise
+        except asyncio.TimeoutError:
+            self.breaker.record_failure(time.perf_counter() - started)
+            self._record(time.perf_counter() - started, "timeout")
+            return await self._degraded(key, args, f"timed out after {self.timeout_s:.0f}s")
+        except Exception as e:
+            self.breaker.record_failure(time.perf_counter() - started)
+            self._record(time.perf_counter() - started, "error")
+            return await self._degraded(key, args, f"{type(e).__name__}: {e}")
+        finally:
+            _caller_memory.reset(memory_token)
+
+        self.breaker.record_success(time.perf_counter() - started)
+        self._record(time.perf_counter() - started, "ok")
+        degraded_cache.put(key, result)
+        if isinstance(result, str):
+            # Keep multi-page sub-agent outputs out of the orchestrator prompt (read_chunk on demand)
+            return await handle_note_async(result, kind=f"agent:{self.name}", threshold=AGENT_RESULT_INLINE_MAX_CHARS, user_id=tool_context.user_id)
+        return result
+
+    def _record(self, elapsed_s: float, outcome: str) -> None:
+        agent_delegations_total.inc(agent=self.name, outcome=outcome)
+        if outcome != "circuit_open":  # Fast-fails would drag the latency quantiles towards zero
+            agent_delegation_seconds.observe(elapsed_s, agent=self.name, outcome=outcome)
+
+    async def _degraded(self, key: str, args: Dict[str, Any], reason: str) -> str:
+        print(f"[DEGRADED] {self.name}: {reason}")
+        cached = degraded_cache.get(key)
+        if cached is not None:
+            saved_at, result = cached
+            age_min = (time.time() - saved_at) / 60
+            return f"[DEGRADED: {self.name} unavailable ({reason}); cached answer from {age_min:.0f} min ago]\n{result}"
+        if self.fallback is not None:
+            try:
+                output = self.fallback(_request_text(args))
+                if inspect.isawaitable(output):
+                    output = await output
+                return f"[DEGRADED: {self.name} unavailable ({reason}); local tool output]\n{output}"
+            except Exception as e:
+                reason = f"{reason}; fallback failed: {e}"
+        return (
+            f"[DEGRADED: {self.name} unavailable ({reason})] "
+            "Continue with the results from the other agents and tell the user this part could not be completed right now."
+        )
+
+
+def aggregate_partial_results(sub_agent_results: Dict[str, str]) -> str:
+    """Deterministic partial answer built from the sub-agent outputs that did arrive."""
+    if not sub_agent_results:
+        return ""
+    sections = [f"### {name}\n{text}" for name, text in sub_agent_results.items()]
+    return (
+        "[DEGRADED] The orchestrator could not finish, but these sub-agents completed:\n\n"
+        + "\n\n".join(sections)
+    )
@@ -0,0 +1,220 @@
+# core/session_compaction.py
+# Context Compaction (Day 3 concept): bounds the event history a session carries into each model call
+
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from core.aio import offload_to_thread
+from core.payload_store import PayloadStore, payload_scope, payload_store, summarize_text
+
+# --- Configuration ---
+CHARS_PER_TOKEN = 4                # Rough estimate; good enough for a trigger threshold
+COMPACTION_TRIGGER_TOKENS = 12_000 # Compact once the history is estimated above this
+COMPACTION_TARGET_TOKENS = 6_000   # The raw window shrinks (down to 1 turn) until it fits this
+KEEP_RECENT_TURNS = 3              # Invocations kept verbatim (sliding window)
+LARGE_TOOL_OUTPUT_CHARS = 4_000    # Tool outputs above this are replaced by a payload reference
+MAX_SUMMARY_LINES = 40             # Oldest summary lines are dropped beyond this
+SUMMARY_MARKER = "[COMPACTED HISTORY]"
+
+
+# --- 1. Size Estimation ---
+
+def _part_chars(part: types.Part) -> int:
+    if part.text:
+        return len(part.text)
+    if part.function_call:
+        return len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+    if part.function_response:
+        return len(part.function_response.name or "") + len(json.dumps(part.function_response.response or {}, default=str))
+    return 0
+
+
+def estimate_tokens(events: List[Event]) -> int:
+    chars = sum(_part_chars(p) for e in events if e.content and e.content.parts for p in e.content.parts)
+    return chars // CHARS_PER_TOKEN
+
+
+def _event_text(event: Event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(p.text for p in event.content.parts if p.text and not p.thought)
+
+
+def _is_summary(event: Event) -> bool:
+    return bool(event.custom_metadata and "compaction" in event.custom_metadata)
+
+
+# --- 2. Turn Grouping and Summaries ---
+
+def group_turns(events: List[Event]) -> List[List[Event]]:
+    """
+    Splits the history into turns, one per invocation.
+
+    A function_call and its function_response always share an invocation_id, so
+    dropping or keeping whole turns can never orphan one half of a tool-call pair.
+    """
+    turns: List[List[Event]] = []
+    for event in events:
+        if turns and turns[-1][0].invocation_id == event.invocation_id:
+            turns[-1].append(event)
+        else:
+            turns.append([event])
+    return turns
+
+
+def summarize_turn(turn: List[Event], store: PayloadStore) -> str:
+    """One line per old turn: the request, the tools/agents used and the answer, with references to big outputs."""
+    request = next((_event_text(e) for e in turn if e.author == "user" and _event_text(e)), "")
+    answer = next((_event_text(e) for e in reversed(turn) if e.author != "user" and _event_text(e)), "")
+    tools: List[str] = []
+    refs: List[str] = []
+    for event in turn:
+        for call in event.get_function_calls():
+            if call.name not in tools:
+                tools.append(call.name)
+        for response in event.get_function_responses():
+            payload = json.dumps(response.response or {}, default=str, ensure_ascii=False)
+            if len(payload) > LARGE_TOOL_OUTPUT_CHARS:
+                handle = store.put(payload, kind=f"tool:{response.name}")
+                refs.append(f"{response.name} -> {handle['handle']} ({handle['size_chars']:,} chars)")
+    line = f"- User: {summarize_text(request, 200) or '(none)'}"
+    if tools:
+        line += f" | Tools: {', '.join(tools)}"
+    if refs:
+        line += f" | Stored outputs: {'; '.join(refs)}"
+    line += f" | Answer: {summarize_text(answer, 300) or '(none)'}"
+    return line
+
+
+def _shrink_large_outputs(turn: List[Event], store: PayloadStore) -> List[Event]:
+    """Keeps the turn verbatim except for oversized tool outputs, which become references."""
+    result: List[Event] = []
+    for event in turn:
+        responses = event.get_function_responses()
+        sizes = [len(json.dumps(r.response or {}, default=str, ensure_ascii=False)) for r in responses]
+        if not any(size > LARGE_TOOL_OUTPUT_CHARS for size in sizes):
+            result.append(event)
+            continue
+        event = event.model_copy(deep=True)
+        for part in event.content.parts:
+            response = part.function_response
+            if response is None:
+                continue
+            payload = json.dumps(response.response or {}, default=str, ensure_ascii=False)
+            if len(payload) <= LARGE_TOOL_OUTPUT_CHARS:
+                continue
+            handle = store.put(payload, kind=f"tool:{response.name}")
+            response.response = {
+                "status": "compacted",
+                "handle": handle["handle"],
+                "size_chars": handle["size_chars"],
+                "summary": handle["summary"],
+            }
+        result.append(event)
+    return result
+
+
+# --- 3. Compaction Policy ---
+
+def compact_events(
+    events: List[Event],
+    store: PayloadStore = payload_store,
+    trigger_tokens: int = COMPACTION_TRIGGER_TOKENS,
+    target_tokens: int = COMPACTION_TARGET_TOKENS,
+    keep_recent_turns: int = KEEP_RECENT_TURNS,
+) -> Tuple[List[Event], Optional[Dict[str, Any]]]:
+    """
+    Applies the sliding-window policy to an event list.
+
+    Returns:
+        (new event list, stats dict) or (the original list, None) if nothing was compacted.
+    """
+    before = estimate_tokens(events)
+    if before <= trigger_tokens:
+        return events, None
+
+    previous = events[0] if events and _is_summary(events[0]) else None
+    turns = group_turns(events[1:] if previous else events)
+
+    keep = max(1, min(keep_recent_turns, len(turns)))
+    recent = [_shrink_large_outputs(t, store) for t in turns[-keep:]]
+    while keep > 1 and estimate_tokens([e for t in recent for e in t]) > target_tokens:
+        keep -= 1
+        recent = recent[1:]
+    old_turns = turns[:-keep]
+
+    lines: List[str] = list(previous.custom_metadata["compaction"]["lines"]) if previous else []
+    omitted = previous.custom_metadata["compaction"].get("omitted_turns", 0) if previous else 0
+    lines.extend(summarize_turn(t, store) for t in old_turns)
+    if len(lines) > MAX_SUMMARY_LINES:
+        omitted += len(lines) - MAX_SUMMARY_LINES
+        lines = lines[-MAX_SUMMARY_LINES:]
+
+    compacted: List[Event] = []
+    if lines:
+        header = f"{SUMMARY_MARKER} Summary of earlier turns in this conversation"
+        if omitted:
+            header += f" ({omitted} older turns omitted)"
+        header += ". Large tool outputs were stored by reference; call read_chunk with a handle if one is needed again."
+        first = (old_turns[0][0] if old_turns else previous)
+        compacted.append(Event(
+            author="user",
+            invocation_id=first.invocation_id,
+            timestamp=first.timestamp,
+            content=types.Content(role="user", parts=[types.Part(text="\n".join([header] + lines))]),
+            custom_metadata={"compaction": {"lines": lines, "omitted_turns": omitted}},
+        ))
+    for turn in recent:
+        compacted.extend(turn)
+
+    stats = {
+        "tokens_before": before,
+        "tokens_after": estimate_tokens(compacted),
+        "turns_summarized": len(old_turns),
+        "turns_kept": len(recent),
+    }
+    return compacted, stats
+
+
+# --- 4. Compacting Session Service ---
+
+class CompactingSessionService(InMemorySessionService):
+    """
+    InMemorySessionService that compacts a session's stored history whenever it is loaded.
+
+    The Runner loads the session at the start of every invocation, before the new user
+    message is appended, so compaction only ever touches finished turns. The stored
+    events are replaced too, which keeps memory per session bounded as well as the prompt.
+    """
+
+    def __init__(self, **policy: Any):
+        super().__init__()
+        self.policy = policy
+        self.stats: Dict[str, Any] = {"compactions": 0, "tokens_saved": 0, "last": None}
+        self._compaction_lock = threading.Lock()
+
+    def _compact_stored(self, app_name: str, user_id: str, session_id: str) -> None:
+        stored = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        if stored is None:
+            return
+        # Offloaded tool outputs must land in the session owner's payload scope
+        with self._compaction_lock, payload_scope(user_id):
+            events, stats = compact_events(stored.events, **self.policy)
+            if stats is None:
+                return
+            stored.events = events
+            self.stats["compactions"] += 1
+            self.stats["tokens_saved"] += stats["tokens_before"] - stats["tokens_after"]
+            self.stats["last"] = dict(stats, session_id=session_id)
+        print(f"[COMPACTION] Session {session_id}: ~{stats['tokens_before']:,} -> ~{stats['tokens_after']:,} tokens "
+              f"({stats['turns_summarized']} turns summarized, {stats['turns_kept']} kept verbatim)")
+
+    async def get_session(self, *, app_name, user_id, session_id, config=None):
+        # Compaction spills large tool outputs to disk, so it runs off the event loop
+        await offload_to_thread(self._compact_stored)(app_name, user_id, session_id)
+        return await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
@@ -0,0 +1,201 @@
+# core/single_flight.py
+# Single-flight coalescing: concurrent identical requests share one in-flight execution
+
+import asyncio
+import functools
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List
+
+_flights: List[Any] = []  # Every flight, for the Debug tab
+
+
+def normalize_request(*parts: Any) -> str:
+    """
+    Builds a coalescing key. Strings are compared case- and whitespace-insensitively;
+    dicts/lists by their sorted JSON, so argument order does not matter.
+    """
+    normalized = []
+    for part in parts:
+        if isinstance(part, str):
+            normalized.append(" ".join(part.lower().split()))
+        elif isinstance(part, (dict, list, tuple)):
+            normalized.append(json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).lower())
+        else:
+            normalized.append(str(part))
+    return "\x1f".join(normalized)
+
+
+def flight_stats() -> Dict[str, Dict[str, int]]:
+    return {flight.name: {**flight.stats, "in_flight": flight.in_flight()} for flight in _flights}
+
+
+# --- 1. Async Single-Flight (many tasks, on one or several event loops) ---
+
+class _LeaderGone(Exception):
+    """The leader stopped (e.g. a Streamlit rerun, or its event loop shut down) before it produced a result."""
+
+
+class _Call:
+    def __init__(self, task: "asyncio.Task", loop: asyncio.AbstractEventLoop):
+        self.task = task
+        self.loop = loop
+        self.waiters = 0
+        # Mirrors the task's outcome for waiters on other event loops (and threads)
+        self.outcome: Future = Future()
+        task.add_done_callback(self._publish)
+
+    def _publish(self, task: "asyncio.Task") -> None:
+        if task.cancelled():
+            self.outcome.set_exception(_LeaderGone())
+        elif task.exception() is not None:
+            self.outcome.set_exception(task.exception())
+        else:
+            self.outcome.set_result(task.result())
+
+    def cancel(self) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.task.cancel)
+        except RuntimeError:
+            pass  # The loop is already closed, and the task with it
+
+
+class SingleFlight:
+    """
+    The first caller for a key starts the work as a task; concurrent callers with the same
+    key await that same task and get the same result (or exception).
+
+    - Completed results are NOT cached - only requests that overlap in time are coalesced.
+    - A waiter that is cancelled leaves without affecting the others. When the last waiter
+      leaves, the shared task is cancelled, so abandoned work does not keep spending tokens.
+    - Calls are coalesced across event loops: Streamlit runs each rerun in its own thread
+      with its own asyncio.run, so a double-click arrives on two loops. The task runs on the
+      first caller's loop; callers on other loops wait for its outcome. If that loop stops
+      before the task finishes, a waiter elsewhere takes over and runs the work itself.
+    - The shared task runs in the first caller's context (contextvars), e.g. its prints go
+      to the first caller's transcript.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()  # Callers on several threads/loops share the table
+        self.stats = {"executions": 0, "coalesced": 0, "abandoned": 0}
+        _flights.append(self)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = _Call(asyncio.ensure_future(factory()), loop)
+                    self._calls[key] = call
+                    call.task.add_done_callback(lambda _task, call=call: self._forget(key, call))
+                    self.stats["executions"] += 1
+                else:
+                    self.stats["coalesced"] += 1
+                call.waiters += 1
+            try:
+                if call.loop is loop:
+                    # shield: cancelling one waiter must not cancel the work the others await
+                    return await asyncio.shield(call.task)
+                return await asyncio.shield(asyncio.wrap_future(call.outcome))
+            except _LeaderGone:
+                self._forget(key, call)  # Before the leader loop's own callback gets to it
+                continue  # Retry: this caller may become the new leader
+            finally:
+                with self._lock:
+                    call.waiters -= 1
+                    abandoned = call.waiters == 0 and not call.task.done()
+                    if abandoned:
+                        self.stats["abandoned"] += 1
+                        self._forget_locked(key, call)  # A new caller starts fresh instead of joining a dying task
+                if abandoned:
+                    call.cancel()
+
+    def _forget(self, key: str, call: _Call) -> None:
+        with self._lock:
+            self._forget_locked(key, call)
+
+    def _forget_locked(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+def coalesce_tool(func: Callable[..., Awaitable[Any]], flight: SingleFlight) -> Callable[..., Awaitable[Any]]:
+    """
+    Wraps an async tool so identical in-flight calls (same tool, same normalized arguments)
+    run once. functools.wraps keeps the declaration the model sees unchanged.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = normalize_request(func.__name__, list(args), kwargs)
+        return await flight.do(key, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+# --- 2. Thread Single-Flight (blocking callers, e.g. Streamlit script threads) ---
+
+class ThreadSingleFlight:
+    """
+    Blocking counterpart of SingleFlight: the first thread runs fn, the others block on its
+    result. If the leader is interrupted (a BaseException such as Streamlit's StopException),
+    the waiting threads do not inherit it - one of them takes over and runs fn itself.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"executions": 0, "coalesced": 0, "abandoned": 0}
+        _flights.append(self)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = Future()
+                    self._calls[key] = future
+                    self.stats["executions"] += 1
+                else:
+                    self.stats["coalesced"] += 1
+            if leader:
+                break
+            try:
+                return future.result()
+            except _LeaderGone:
+                continue  # Retry: this thread may become the new leader
+
+        try:
+            result = fn()
+        except Exception as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        except BaseException:
+            self._finish(key)
+            with self._lock:
+                self.stats["abandoned"] += 1
+            future.set_exception(_LeaderGone())
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key: str) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
@@ -0,0 +1,244 @@
+# core/structured_output.py
+# Schema-constrained agent output: fast validation and a targeted repair pass
+
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Type, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+
+# --- 1. Targeted Repair Pass ---
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.I)
+
+
+def _lexical_repair(text: str) -> Tuple[str, List[str]]:
+    """
+    One pass over the text fixing small syntax defects: single-quoted strings, Python
+    literals, trailing commas, and an unterminated string/brackets at the end (truncation).
+    """
+    repairs: List[str] = []
+    out: List[str] = []
+    stack: List[str] = []
+    quote: Optional[str] = None
+    escape = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == quote:
+                quote = None
+                ch = '"'
+            elif ch == '"' and quote == "'":
+                ch = '\\"'
+            out.append(ch)
+            i += 1
+            continue
+        if ch in "\"'":
+            if ch == "'":
+                repairs.append("single quotes")
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                repairs.append("trailing comma")
+            if stack:
+                stack.pop()
+            out.append(ch)
+        else:
+            literal = next((lit for lit in ("True", "False", "None") if text.startswith(lit, i)), None)
+            if literal and not (text[i - 1:i].isalnum() if i else False):
+                out.append({"True": "true", "False": "false", "None": "null"}[literal])
+                repairs.append("python literal")
+                i += len(literal)
+                continue
+            out.append(ch)
+        i += 1
+    if quote:
+        out.append('"')
+        repairs.append("unterminated string")
+    if stack:
+        while out and (out[-1].isspace() or out[-1] == ","):
+            out.pop()
+        out.extend(reversed(stack))
+        repairs.append("unclosed brackets")
+    return "".join(out), sorted(set(repairs))
+
+
+def _coerce_fields(data: Dict[str, Any], schema: Type[BaseModel]) -> List[str]:
+    """
+    Coerces near-miss field values (e.g. '85%' for an int, a comma string for a list).
+    Absent fields are left alone: a missing required field is a real failure, not a repair.
+    """
+    repairs: List[str] = []
+    for name, f in schema.model_fields.items():
+        if name not in data:
+            continue
+        value = data[name]
+        annotation = f.annotation
+        if get_origin(annotation) in (list, List):
+            item_type = (get_args(annotation) or (str,))[0]
+            if value is None:
+                data[name] = []
+                repairs.append(f"{name}: null -> []")
+            elif isinstance(value, str):
+                data[name] = [v.strip(" -*•") for v in re.split(r"[,;\n]", value) if v.strip(" -*•")]
+                repairs.append(f"{name}: string -> list")
+            elif item_type is str and any(not isinstance(v, str) for v in value):
+                data[name] = [v if isinstance(v, str) else json.dumps(v) for v in value]
+                repairs.append(f"{name}: items -> str")
+        elif annotation is int and not isinstance(value, int):
+            if isinstance(value, float):
+                data[name] = round(value)
+                repairs.append(f"{name}: float -> int")
+            elif isinstance(value, str) and re.search(r"-?\d+(\.\d+)?", value):
+                data[name] = round(float(re.search(r"-?\d+(\.\d+)?", value).group()))
+                repairs.append(f"{name}: string -> int")
+        elif annotation is str and not isinstance(value, str):
+            if value is None:
+                data[name] = ""
+                repairs.append(f"{name}: null -> ''")
+            elif isinstance(value, list):
+                data[name] = "; ".join(str(v) for v in value)
+                repairs.append(f"{name}: list -> str")
+    return repairs
+
+
+@dataclass
+class StructuredResult:
+    value: Optional[BaseModel]
+    repairs: List[str] = field(default_factory=list)
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.value is not None
+
+
+def validate_structured(text: str, schema: Type[BaseModel]) -> StructuredResult:
+    """
+    Fast path: pydantic-core validates the raw JSON directly. Only if that fails does the
+    targeted repair pass run (fences/prose around the object, syntax fixes, field coercion).
+    """
+    try:
+        return StructuredResult(schema.model_validate_json(text))
+    except ValidationError:
+        pass
+
+    repairs: List[str] = []
+    candidate = _FENCE.sub("", text.strip())
+    start = candidate.find("{")
+    if start < 0:
+        return StructuredResult(None, error="no JSON object in output")
+    end = candidate.rfind("}")
+    if start > 0 or (end != -1 and end < len(candidate) - 1):
+        repairs.append("surrounding text")
+    candidate = candidate[start:end + 1] if end > start else candidate[start:]
+    try:
+        data = json.loads(candidate)
+    except ValueError:
+        candidate, lexical = _lexical_repair(candidate)
+        repairs += lexical
+        try:
+            data = json.loads(candidate)
+        except ValueError as e:
+            return StructuredResult(None, repairs, f"unrepairable JSON: {e}")
+    if not isinstance(data, dict):
+        return StructuredResult(None, repairs, "top-level JSON value is not an object")
+    repairs += _coerce_fields(data, schema)
+    try:
+        return StructuredResult(schema.model_validate(data), repairs)
+    except ValidationError as e:
+        return StructuredResult(None, repairs, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+
+
+# --- 2. Agent Callbacks ---
+
+structured_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def _count(schema_name: str, outcome: str) -> None:
+    with _stats_lock:
+        stats = structured_stats.setdefault(schema_name, {"valid": 0, "repaired": 0, "failed": 0})
+        stats[outcome] += 1
+
+
+def _validate_counted(text: str, schema: Type[BaseModel]) -> StructuredResult:
+    result = validate_structured(text, schema)
+    if result.ok and not result.repairs:
+        _count(schema.__name__, "valid")
+    elif not result.ok:
+        _count(schema.__name__, "failed")
+        print(f"[STRUCTURED OUTPUT] {schema.__name__} could not be repaired: {result.error}")
+    else:
+        _count(schema.__name__, "repaired")
+        print(f"[STRUCTURED OUTPUT] Repaired {schema.__name__} ({', '.join(result.repairs)})")
+    return result
+
+
+def structured_output_guard(schema: Type[BaseModel]):
+    """
+    Builds an after_model_callback for an agent with output_schema whose final answer
+    arrives as JSON text (native response_schema, i.e. no tools or Vertex AI).
+
+    The text is validated and, if needed, repaired in place before ADK validates it for
+    output_key / AgentTool - so small defects no longer fail the delegation and force a
+    full re-run of the mission. Agents that also have tools answer through a
+    set_model_response call instead; see structured_response_guard.
+    """
+
+    def after_model_callback(callback_context, llm_response):
+        content = llm_response.content
+        if llm_response.partial or not content or not content.parts or any(p.function_call for p in content.parts):
+            return None
+        text = "".join(p.text for p in content.parts if p.text and not p.thought)
+        if not text.strip():
+            return None
+
+        result = _validate_counted(text, schema)
+        if not result.ok or not result.repairs:
+            return None
+        repaired = llm_response.model_copy(deep=True)
+        text_parts = [p for p in repaired.content.parts if p.text and not p.thought]
+        text_parts[0].text = result.value.model_dump_json()
+        for extra in text_parts[1:]:
+            extra.text = ""
+        return repaired
+
+    return after_model_callback
+
+
+def structured_response_guard(schema: Type[BaseModel]):
+    """
+    Builds a before_tool_callback for an agent with output_schema AND tools.
+
+    On the Gemini API backend ADK cannot combine a response schema with tools, so the
+    final answer is a set_model_response(**fields) call. Its arguments get the same
+    validation and repair pass; repaired values replace the arguments before the tool runs.
+    """
+
+    def before_tool_callback(tool, args, tool_context):
+        if tool.name != "set_model_response":
+            return None
+        result = _validate_counted(json.dumps(args, ensure_ascii=False, default=str), schema)
+        if result.ok and result.repairs:
+            args.clear()
+            args.update(result.value.model_dump(mode="json"))
+        return None
+
+    return before_tool_callback
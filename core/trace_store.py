@@ -0,0 +1,64 @@
+# core/trace_store.py
+# Raw mission logs on disk, referenced by id (keeps Streamlit session state small)
+
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+# --- Configuration ---
+TRACE_DIR = os.path.join("output", "traces")
+MAX_TRACE_FILES = 2_000   # Oldest traces are pruned beyond this
+
+
+class TraceStore:
+    """
+    Append-only store for raw mission transcripts.
+
+    The UI keeps only the trace id per chat message and loads the log lazily when the
+    user asks for it, so memory per browser session no longer grows with log volume.
+    """
+
+    def __init__(self, directory: str = TRACE_DIR, max_files: int = MAX_TRACE_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, trace_id: str) -> str:
+        # Trace ids are generated here; basename() guards against ids echoed back from elsewhere.
+        return os.path.join(self.directory, f"{os.path.basename(trace_id)}.log")
+
+    def save(self, raw: str, prefix: str = "trace") -> str:
+        """Writes one transcript and returns its id."""
+        trace_id = f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(trace_id), "w", encoding="utf-8") as f:
+            f.write(raw)
+        with self._lock:
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._prune_locked()
+        return trace_id
+
+    def load(self, trace_id: str) -> Optional[str]:
+        path = self._path(trace_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _prune_locked(self) -> None:
+        files = sorted(
+            (os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".log")),
+            key=os.path.getmtime,
+        )
+        for path in files[:-self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+trace_store = TraceStore()
@@ -0,0 +1,61 @@
+# core/transcript.py
+# Per-mission stdout capture that stays correct when several missions run at once
+
+import contextlib
+import contextvars
+import io
+import sys
+from typing import Iterator, Optional
+
+# The buffer of the mission running in the current context (task or thread).
+# contextvars are copied into asyncio tasks and asyncio.to_thread() calls, so prints
+# made by tools on behalf of a mission land in that mission's transcript.
+_active_buffer: contextvars.ContextVar[Optional[io.StringIO]] = contextvars.ContextVar(
+    "mission_transcript", default=None
+)
+
+
+class _TranscriptRouter(io.TextIOBase):
+    """
+    Stand-in for sys.stdout that writes to the active mission buffer if one is set,
+    and to the original stream otherwise.
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+
+    def write(self, text: str) -> int:
+        buffer = _active_buffer.get()
+        if buffer is not None:
+            return buffer.write(text)
+        return self._fallback.write(text)
+
+    def flush(self) -> None:
+        if _active_buffer.get() is None:
+            self._fallback.flush()
+
+    def writable(self) -> bool:
+        return True
+
+
+def install_router() -> None:
+    """Replaces sys.stdout with the routing stream (idempotent)."""
+    if not isinstance(sys.stdout, _TranscriptRouter):
+        sys.stdout = _TranscriptRouter(sys.stdout)
+
+
+@contextlib.contextmanager
+def capture_output() -> Iterator[io.StringIO]:
+    """
+    Captures everything printed in the current context into a fresh buffer.
+
+    Unlike contextlib.redirect_stdout (which swaps the process-wide stream), two
+    concurrent captures never see each other's output.
+    """
+    install_router()
+    buffer = io.StringIO()
+    token = _active_buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _active_buffer.reset(token)
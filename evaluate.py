@@ -0,0 +1,64 @@
+# evaluate.py
+# Offline evaluation of agent output quality vs. latency and token cost
+#
+# Usage:
+#   python evaluate.py --mode fake                          # pipeline/overhead check, no API key
+#   python evaluate.py --mode record                        # live run, responses saved to a cassette
+#   python evaluate.py --mode replay                        # deterministic re-run from the cassette
+#   python evaluate.py --mode live --baseline output/eval/eval_20250101_120000.json
+#
+# Reports (per-case checks, latency, tokens, cost) are written to output/eval/. Pass the
+# report of the previous build as --baseline to get the quality-vs-speed comparison.
+
+import argparse
+import asyncio
+import json
+
+from core.evaluation import (
+    DEFAULT_CASSETTE, DEFAULT_DATASET, FAKE_LATENCY_S, Cassette,
+    compare_reports, format_report, load_dataset, model_mode, run_evaluation, save_report,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the mission dataset concurrently and score the outputs.")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="JSON file with the eval cases.")
+    parser.add_argument("--mode", choices=["live", "record", "replay", "fake"], default="live", help="Model source for every agent.")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE, help="Recorded responses for --mode record/replay.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Missions in flight at once.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case (more runs = steadier latency numbers).")
+    parser.add_argument("--only", nargs="*", help="Case ids to run (default: all).")
+    parser.add_argument("--fake-latency", type=float, default=FAKE_LATENCY_S, help="Simulated seconds per model call in --mode fake.")
+    parser.add_argument("--baseline", help="Earlier report to compare against.")
+    parser.add_argument("--out", help="Report path (default: output/eval/eval_<time>.json).")
+    args = parser.parse_args()
+
+    cases = load_dataset(args.dataset)
+    if args.only:
+        cases = [case for case in cases if case.id in set(args.only)]
+    if not cases:
+        raise SystemExit("No eval cases selected.")
+
+    # Imported here so --help works without an API key / agent setup
+    import runner
+
+    cassette = Cassette(args.cassette) if args.mode in ("record", "replay") else None
+    print(f"Running {len(cases)} cases x{args.repeat} ({args.mode} models, concurrency {args.concurrency})...")
+    with model_mode(runner.root_orchestrator, args.mode, cassette=cassette, fake_latency_s=args.fake_latency):
+        report = asyncio.run(run_evaluation(cases, runner.run_mission, runner.STRUCTURED_AGENTS, args.concurrency, args.repeat))
+    report["config"] = {"mode": args.mode, "dataset": args.dataset, "concurrency": args.concurrency, "repeat": args.repeat}
+    if cassette is not None:
+        report["config"]["cassette"] = cassette.stats
+
+    print(format_report(report))
+    if cassette is not None:
+        print(f"Cassette {args.cassette}: {cassette.stats}")
+    print(f"Report saved to {save_report(report, args.out)}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            print("\n" + compare_reports(json.load(f), report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,42 @@
 # init_memory.py
+# Bulk-loads user documents (resumes, notes, past reviews, layoff context) into long-term memory
+#
+# Usage:
+#   python init_memory.py                       # files in ./data belong to the demo user (app data is skipped)
+#   python init_memory.py --dir users/          # users/<user_id>/... for many users
+#
+# Documents land in the memory store (output/memory_store.sqlite3); the Runner's memory
+# service loads a user's documents on their first load_memory search. Re-running only
+# processes files whose content changed, and drops documents whose files were removed.
+
+import argparse
 import os
-from tools.memory_tools import save_memory  # adjust import if needed
 
-# Path to your local resume file
-RESUME_PATH = os.path.join("data", "resume.txt")
+from core.memory_ingest import DEFAULT_USER_ID, INGEST_WORKERS, MEMORY_STORE_PATH, WRITE_BATCH_FILES, MemoryStore, ingest_directory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest a directory of user documents into long-term memory.")
+    parser.add_argument("--dir", default="data", help="Ingest root: <dir>/<user_id>/... per user, files directly in <dir> belong to --user.")
+    parser.add_argument("--user", default=DEFAULT_USER_ID, help="Owner of files placed directly in --dir.")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Extraction processes (0 = in-process).")
+    parser.add_argument("--batch", type=int, default=WRITE_BATCH_FILES, help="Files committed per transaction.")
+    parser.add_argument("--store", default=MEMORY_STORE_PATH, help="Memory store database file.")
+    parser.add_argument("--keep-missing", action="store_true", help="Keep documents whose files are no longer under --dir.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        raise FileNotFoundError(f"Ingest directory not found: {args.dir}")
 
-if not os.path.exists(RESUME_PATH):
-    raise FileNotFoundError("resume.txt not found in /data folder")
+    stats = ingest_directory(args.dir, args.user, MemoryStore(args.store), workers=args.workers, batch_files=args.batch,
+                             prune=not args.keep_missing)
 
-# Read your resume
-with open(RESUME_PATH, "r", encoding="utf-8") as f:
-    resume_text = f.read()
+    print(f"✔ {stats['files']} files scanned in {stats['elapsed_s']}s: {stats['changed']} ingested, "
+          f"{stats['unchanged']} unchanged, {stats['failed']} failed, {stats['removed']} removed.")
+    print(f"Passages stored: {stats['passages']} for {stats['users']} users -> {args.store}")
+    for error in stats["errors"]:
+        print(f"  ✘ {error}")
 
-# Save to long-term memory
-save_memory("user:resume", resume_text)
 
-print("✔ Resume successfully stored in long-term memory.")
-print("Characters stored:", len(resume_text))
+if __name__ == "__main__":
+    main()
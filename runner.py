@@ -2,8 +2,11 @@
 # Main execution script for the Agentic Data Science Agent (Capstone Project)
 
 import asyncio
+import json
 import os
+import time
 import uuid
+from typing import Optional
 from dotenv import load_dotenv
 
 # Windows SSL fix
@@ -13,17 +16,29 @@ if sys.platform.startswith("win"):
 
 # Core ADK Imports (LlmAgent from agents, AgentTool from tools)
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from core.models import cascade # Pooled Gemini models behind a fast->strong cascade
 from google.adk.runners import Runner
 from google.adk.sessions import DatabaseSessionService, InMemorySessionService
-from google.adk.memory import InMemoryMemoryService # Simulating Memory Bank for local use
+from core.memory_ingest import StoreBackedMemoryService # Simulating Memory Bank for local use (+ documents from init_memory.py)
 from google.adk.tools import AgentTool # Corrected import path
-from google.adk.tools import load_memory # <-- ADD the working tool
+from core.resilience import ResilientAgentTool, SubAgentMemoryPlugin, aggregate_partial_results # Circuit breakers + degraded answers
+from core.aio import ToolTimingPlugin, loop_monitor # Event-loop lag monitoring
+from core.session_compaction import CompactingSessionService # Sliding-window history compaction
+from core.profiling import ProfilingPlugin, profile_mission, profiled_phase # On-demand mission profiling
+from core.single_flight import SingleFlight, normalize_request # Identical in-flight missions run once
+from core.context_cache import ContextCachePlugin, context_cache # Provider-side caches for stable agent prefixes
+from core.evaluation import EvalUsagePlugin # Token/tool accounting for evaluate.py cases
+from core.metrics import MetricsPlugin, mission_seconds, missions_in_flight, missions_total # Counters/latency histograms (Debug tab, /metrics)
+from core.prefetch import RESUME_DOC_KEY
+from core.payload_store import payload_scope # Payload handles are private to the user that created them
+from core.transcript import capture_output
+from tools.memory_tools import load_memory # Built-in load_memory tool + single-flight coalescing of identical searches
 from google.genai import types
 
 # Import Custom Tools (needed to define tool catalog for agents)
-from tools.web_tools import search_current_trends, query_live_job_listings
-from tools.file_tools import load_user_resume, save_artifact
+from tools.web_tools import search_current_trends_async, query_live_job_listings
+from tools.file_tools import load_user_resume_async, save_artifact_async # File I/O offloaded to a thread pool
+from tools.payload_tools import read_chunk # Pages through large results returned as handles
 
 # Import Specialized Agents
 from agents.ds_tutor_agent import ds_tutor_agent
@@ -45,6 +60,7 @@ if not GOOGLE_API_KEY:
 APP_NAME = "Agentic Data Science Agent"
 USER_ID = "DS_Candidate_123"
 MODEL = "gemini-2.5-pro" 
+FAST_MODEL = "gemini-2.5-flash-lite" # Answers first; escalation to MODEL only when local checks fail
 
 # Model Configuration (Retry Options - Day 4 concept)
 retry_config = types.HttpRetryOptions(
@@ -59,7 +75,8 @@ retry_config = types.HttpRetryOptions(
 # The Root Agent manages the workflow (Day 1 Orchestration)
 root_orchestrator = LlmAgent(
     name="CareerCoPilotRootAgent",
-    model=Gemini(model=MODEL, retry_options=retry_config),
+    # Cascade: trivial requests (e.g. the Debug tab health check) never reach the pro model
+    model=cascade(FAST_MODEL, MODEL, retry_options=retry_config, label="CareerCoPilotRootAgent"),
     instruction="""
     You are the Career Co-Pilot Root Orchestrator. Your mission is to guide a Data Science candidate to job placement readiness.
     
@@ -71,29 +88,52 @@ root_orchestrator = LlmAgent(
     5. If the user needs to practice high-stakes narratives (like explaining a layoff gap), use the 'coach_agent'.
     
     Always aggregate the results and provide a final, cohesive answer.
+    Long tool or sub-agent results may arrive as a handle with a summary; call 'read_chunk' only if you need the full text.
     """,
     # Agents are wrapped in AgentTool for local A2A delegation (Day 5 concept)
+    # ResilientAgentTool adds a per-agent circuit breaker and degraded answers, so one
+    # overloaded sub-agent no longer fails the whole mission.
     tools=[
-        AgentTool(agent=ds_tutor_agent),
-        AgentTool(agent=research_agent),
-        AgentTool(agent=job_search_agent),
-        AgentTool(agent=resume_agent),
-        AgentTool(agent=coach_agent),
+        ResilientAgentTool(agent=ds_tutor_agent),
+        ResilientAgentTool(agent=research_agent, fallback=search_current_trends_async), # local deterministic output while degraded (coalesced)
+        ResilientAgentTool(agent=job_search_agent),
+        ResilientAgentTool(agent=resume_agent),
+        ResilientAgentTool(agent=coach_agent),
         # Custom file tools are also available for saving/loading artifacts
-        load_user_resume, 
-        save_artifact,
+        load_user_resume_async, 
+        save_artifact_async,
+        read_chunk,
         load_memory, # <-- CRITICAL FIX: Use the functional reactive memory tool
     ],
 )
 
+SUB_AGENT_NAMES = {tool.name for tool in root_orchestrator.tools if isinstance(tool, AgentTool)}
+# Sub-agents with a declared output_schema; their typed results are echoed for the UI
+STRUCTURED_AGENTS = {
+    tool.name: tool.agent.output_schema
+    for tool in root_orchestrator.tools
+    if isinstance(tool, AgentTool) and getattr(tool.agent, "output_schema", None)
+}
+
 # --- 3. Initialize Services (Day 3 Sessions & Memory) ---
 
-# Use InMemorySessionService for conversation history in this local demo
-session_service = InMemorySessionService()
+# Use InMemorySessionService for conversation history in this local demo.
+# The compacting variant keeps a sliding window of recent turns and summarizes older ones
+# (large tool outputs become payload references), so long chats don't grow the prompt.
+session_service = CompactingSessionService()
 
 # Use InMemoryMemoryService to simulate persistent knowledge storage 
 # In production, this would be Vertex AI Memory Bank [7, 8]
-memory_service = InMemoryMemoryService()
+# The store-backed variant also serves the documents bulk-ingested by init_memory.py,
+# loading each user's documents on their first load_memory search.
+memory_service = StoreBackedMemoryService()
+
+# Context caching (Day 4 cost/latency): these agents resend the same long instruction and
+# tool declarations on every call; the resume/coach prefixes also carry the current resume
+# (registered by the upload prefetcher), so a new resume version gets a new cache.
+context_cache.register_agent(resume_agent.name, documents=(RESUME_DOC_KEY,))
+context_cache.register_agent(coach_agent.name, documents=(RESUME_DOC_KEY,))
+context_cache.register_agent(ds_tutor_agent.name)
 
 # Create the main Runner
 runner = Runner(
@@ -101,72 +141,170 @@ runner = Runner(
     app_name=APP_NAME,
     session_service=session_service,
     memory_service=memory_service, # Memory service provided to runner
+    plugins=[
+        ToolTimingPlugin(), # Tool spans for the loop-lag monitor (also applies inside AgentTool sub-runs)
+        ProfilingPlugin(),  # Model/tool timings, recorded only for missions run with profile=True
+        ContextCachePlugin(), # Swaps registered agents' stable prefixes for cached-content handles
+        MetricsPlugin(),      # Model and FunctionTool latency/error metrics
+        EvalUsagePlugin(),    # Tokens/cost/tool calls per eval case, recorded only inside evaluate.py runs
+        SubAgentMemoryPlugin(), # Sub-agents' load_memory searches this Runner's memory, not an empty one
+    ],
 )
 
 # --- 4. Execution Loop ---
 
-async def run_mission(mission_query: str):
-    """Orchestrates the full multi-agent mission."""
+# Identical fresh missions in flight at the same time (a double-click, a burst of the same
+# tutor question) share one multi-agent execution; every caller receives its transcript.
+# This holds across event loops too, e.g. Streamlit reruns that each call asyncio.run.
+mission_flight = SingleFlight("run_mission")
+
+async def run_mission(mission_query: str, user_id: str = USER_ID, session_id: Optional[str] = None, profile: bool = False):
+    """
+    Orchestrates the full multi-agent mission.
+
+    Args:
+        mission_query: The user's mission prompt.
+        user_id: The user the session (and long-term memory) belongs to.
+        session_id: Continue an existing conversation; a fresh session is created when omitted or unknown.
+        profile: Capture a cProfile + wall-clock/await breakdown, saved as output/profiles/<session_id>_<time>.json/.prof.
+    """
     
-    # Generate a unique session ID for the execution
-    session_id = f"mission_{uuid.uuid4().hex[:8]}"
+    if session_id is None and not profile:
+        # A fresh session has no history, so the result depends only on user + mission text.
+        # The shared run is captured and re-printed into each caller's own output.
+        transcript = await mission_flight.do(
+            normalize_request(user_id, mission_query),
+            lambda: _captured_mission(mission_query, user_id, f"mission_{uuid.uuid4().hex[:8]}"),
+        )
+        print(transcript, end="")
+        return
+
+    # Generate a unique session ID for the execution unless the caller continues a conversation
+    session_id = session_id or f"mission_{uuid.uuid4().hex[:8]}"
     
+    if not profile:
+        return await _execute_mission(mission_query, user_id, session_id)
+    # One profile per mission (a chat session runs many missions)
+    with profile_mission(f"{session_id}_{time.strftime('%Y%m%d_%H%M%S')}"):
+        return await _execute_mission(mission_query, user_id, session_id)
+
+
+async def _captured_mission(mission_query: str, user_id: str, session_id: str) -> str:
+    with capture_output() as buffer:
+        await _execute_mission(mission_query, user_id, session_id)
+    return buffer.getvalue()
+
+
+async def _execute_mission(mission_query: str, user_id: str, session_id: str):
+    # Every handle stored or read by the tools of this mission is scoped to user_id
+    with payload_scope(user_id):
+        return await _run_orchestrator(mission_query, user_id, session_id)
+
+
+async def _run_orchestrator(mission_query: str, user_id: str, session_id: str):
     print(f"\n{'='*70}")
     print(f"🚀 Starting Mission: '{mission_query}'")
     print(f"🔗 Session ID: {session_id}")
     print(f"{'='*70}")
     
-    # Create session 
+    # Create session (or reuse it for multi-turn chats)
     # Must use the App Name configured in your system.
-    await session_service.create_session(
-        app_name=APP_NAME, user_id=USER_ID, session_id=session_id
-    )
+    with profiled_phase("session"):
+        session = await session_service.get_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            await session_service.create_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
     
     query_content = types.Content(role="user", parts=[types.Part(text=mission_query)])
     
     # Run the orchestrator asynchronously
     print("\n[AGENT EXECUTION TRACE] (Observability Enabled)")
     
-    try:
-        # The runner handles the sequencing of agents and tools (Orchestration [6], [7])
-        async for event in runner.run_async(
-            user_id=USER_ID, session_id=session_id, new_message=query_content
-        ):
-            if event.content and event.content.parts:
+    # Sub-agent outputs seen so far; used for a partial answer if the orchestrator fails
+    sub_agent_results = {}
+    final_response_printed = False
+    outcome = "no_response"
+    started = time.perf_counter()
+    missions_in_flight.inc()
+    
+    # Loop-lag watcher for the duration of the mission (reports which tool blocked the loop)
+    async with loop_monitor.watching():
+        try:
+            # The runner handles the sequencing of agents and tools (Orchestration [6], [7])
+            async for event in runner.run_async(
+                user_id=user_id, session_id=session_id, new_message=query_content
+            ):
+                if event.content and event.content.parts:
+                
+                    # **CRITICAL FIX: Safely extract text from the list of content parts.**
+                    # This handles structured parts (like function calls [8]) that do not have a .text attribute.
+                    text_parts = [
+                        p.text for p in event.content.parts 
+                        if hasattr(p, 'text') and p.text is not None and p.text != "None"
+                    ]
+                    full_text = ' '.join(text_parts).strip()
                 
-                # **CRITICAL FIX: Safely extract text from the list of content parts.**
-                # This handles structured parts (like function calls [8]) that do not have a .text attribute.
-                text_parts = [
-                    p.text for p in event.content.parts 
-                    if hasattr(p, 'text') and p.text is not None and p.text != "None"
-                ]
-                full_text = ' '.join(text_parts).strip()
+                    for p in event.content.parts:
+                        if p.function_response and p.function_response.name in SUB_AGENT_NAMES:
+                            response = p.function_response.response or {}
+                            sub_agent_results[p.function_response.name] = str(response.get("result", response))
+                            # Typed result line (parsed by the UI instead of searching the prose)
+                            if p.function_response.name in STRUCTURED_AGENTS and "result" not in response:
+                                print(f"[STRUCTURED RESULT] {p.function_response.name} > {json.dumps(response, ensure_ascii=False)}")
                 
-                # Check for the final response event
-                if event.is_final_response() and full_text:
-                    print(f"\n[FINAL RESPONSE] > {full_text}")
+                    # Check for the final response event
+                    if event.is_final_response() and full_text:
+                        print(f"\n[FINAL RESPONSE] > {full_text}")
+                        final_response_printed = True
                 
-                # Print intermediate text events (thoughts, partial responses) for tracing
-                elif full_text:
-                    # Logs and Traces provide the narrative of actions (Day 4 [9])
-                    print(f"[EVENT] > {full_text}")
+                    # Print intermediate text events (thoughts, partial responses) for tracing
+                    elif full_text:
+                        # Logs and Traces provide the narrative of actions (Day 4 [9])
+                        print(f"[EVENT] > {full_text}")
     
-    except Exception as e:
-        # This final safeguard prevents an unhandled exception during A2A delegation 
-        # from crashing the entire network transport layer (SSL Fatal Error).
-        print(f"\n[FATAL EXECUTION ERROR CAUGHT]: An unhandled exception occurred during the agent run: {e}")
-        # Note: If this prints, you must examine the agent's tool inputs or outputs 
-        # (Day 2b LRO tool patterns [10]) for serialization issues.
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            # This final safeguard prevents an unhandled exception during A2A delegation 
+            # from crashing the entire network transport layer (SSL Fatal Error).
+            print(f"\n[FATAL EXECUTION ERROR CAUGHT]: An unhandled exception occurred during the agent run: {e}")
+            # Note: If this prints, you must examine the agent's tool inputs or outputs 
+            # (Day 2b LRO tool patterns [10]) for serialization issues.
+        
+            # Degraded mode: still hand back whatever the successful sub-agents produced.
+            partial = aggregate_partial_results(sub_agent_results)
+            if partial and not final_response_printed:
+                print(f"\n[FINAL RESPONSE] > {partial}")
+            outcome = "degraded" if partial or final_response_printed else "error"
+        else:
+            if final_response_printed:
+                outcome = "ok"
+        finally:
+            # Also runs on cancellation, so the in-flight gauge cannot drift
+            missions_in_flight.dec()
+            mission_seconds.observe(time.perf_counter() - started, outcome=outcome)
+            missions_total.inc(outcome=outcome)
                 
     print(f"\n{'='*70}\nMission Completed.")
 
 if __name__ == "__main__":
+    import argparse
+
     # Example Mission demonstrating full orchestration:
     mission = (
         "I was recently laid off and need a pitch to explain the gap. "
         "Also, review my resume against the 'Senior Data Analyst' role requirements. "
         "What are the top three skills I should highlight?"
     )
+
+    parser = argparse.ArgumentParser(description="Run one Career Co-Pilot mission.")
+    parser.add_argument("mission", nargs="?", default=mission, help="Mission prompt (defaults to the demo mission).")
+    parser.add_argument("--profile", action="store_true", help="Save a cProfile/await breakdown to output/profiles/.")
+    args = parser.parse_args()
     
     # Note: LROs (Long-Running Operations) requiring human input in coach_agent 
     # must be manually handled by checking events, as detailed in Day 2b [9].
@@ -180,7 +318,7 @@ if __name__ == "__main__":
     asyncio.set_event_loop(loop)
     try:
         # Run your agent logic until it completes
-        loop.run_until_complete(run_mission(mission))
+        loop.run_until_complete(run_mission(args.mission, profile=args.profile))
     finally:
         # Clean up generators gracefully
         loop.run_until_complete(loop.shutdown_asyncgens())
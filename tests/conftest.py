@@ -0,0 +1,52 @@
+# tests/conftest.py
+# Shared pytest setup: repo root on sys.path, a dummy API key, and a local keep-alive stub server
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")  # Never sent anywhere real: tests only talk to local stubs
+
+
+class _GeminiStubHandler(BaseHTTPRequestHandler):
+    """Answers every POST like generateContent does; counts TCP connections and requests."""
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        self.server.connections += 1
+        super().setup()
+
+    def do_POST(self):
+        self.server.bodies.append(json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}"))
+        self.server.paths.append(self.path)
+        body = json.dumps({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": "stub answer"}]}, "finishReason": "STOP"}],
+            "usageMetadata": {"promptTokenCount": 3, "candidatesTokenCount": 2, "totalTokenCount": 5},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gemini_stub():
+    """Local stub of the Gemini REST API; yields the server (base_url, connections, paths)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GeminiStubHandler)
+    server.connections = 0
+    server.paths = []
+    server.bodies = []
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,98 @@
+# tests/test_context_cache.py
+# ContextCacheManager reuses, refreshes and invalidates provider caches (in-process fake provider)
+
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, Tuple
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from core.context_cache import ContextCacheManager
+
+INSTRUCTION = "You are the resume agent. " * 400  # Well above MIN_CACHE_TOKENS
+
+
+class FakeCacheProvider:
+    """Same interface as GenaiCacheProvider; tracks creates/refreshes/deletes and cache hits."""
+
+    def __init__(self):
+        self.caches: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"created": 0, "refreshed": 0, "deleted": 0, "hits": 0, "misses": 0}
+        self._ids = itertools.count(1)
+
+    async def create(self, model: str, prefix: Dict[str, Any], ttl_s: int) -> Tuple[str, float]:
+        name = f"cachedContents/fake-{next(self._ids)}"
+        self.caches[name] = {"expire_at": time.time() + ttl_s, "instruction": prefix["system_instruction"]}
+        self.stats["created"] += 1
+        return name, self.caches[name]["expire_at"]
+
+    async def refresh(self, name: str, ttl_s: int) -> float:
+        self.caches[name]["expire_at"] = time.time() + ttl_s
+        self.stats["refreshed"] += 1
+        return self.caches[name]["expire_at"]
+
+    async def delete(self, name: str) -> None:
+        if self.caches.pop(name, None) is not None:
+            self.stats["deleted"] += 1
+
+    def use(self, name: str) -> None:
+        cache = self.caches.get(name)
+        self.stats["hits" if cache and cache["expire_at"] > time.time() else "misses"] += 1
+
+
+def _request() -> LlmRequest:
+    return LlmRequest(model="gemini-2.5-flash", config=types.GenerateContentConfig(system_instruction=INSTRUCTION))
+
+
+def test_cache_hits_refreshes_and_resume_invalidation():
+    provider = FakeCacheProvider()
+    manager = ContextCacheManager(provider, ttl_s=3600)
+    manager.register_agent("ResumeAgent", documents=["user:resume"])
+    manager.set_document("alice", "user:resume", "Resume v1: SQL, Tableau.")
+
+    async def scenario():
+        first = await manager.apply(_request(), "ResumeAgent", "alice")
+        request = _request()
+        second = await manager.apply(request, "ResumeAgent", "alice")
+        return first, second, request
+
+    first, second, request = asyncio.run(scenario())
+    assert first == second == "cachedContents/fake-1"
+    assert request.config.cached_content == first and request.config.system_instruction is None
+    assert "Resume v1" in provider.caches[first]["instruction"]
+    assert (manager.stats["created"], manager.stats["hits"], provider.stats["hits"]) == (1, 1, 2)
+
+    # A cache close to expiry is extended when reused
+    provider.caches[first]["expire_at"] = time.time() + 60
+    for entry in manager._entries.values():
+        entry.expire_at = time.time() + 60
+    assert asyncio.run(manager.apply(_request(), "ResumeAgent", "alice")) == first
+    assert manager.stats["refreshed"] == provider.stats["refreshed"] == 1
+
+    # A new resume version lands on a new cache; the old one is deleted provider-side
+    manager.set_document("alice", "user:resume", "Resume v2: SQL, Tableau, Spark.")
+    third = asyncio.run(manager.apply(_request(), "ResumeAgent", "alice"))
+    assert third == "cachedContents/fake-2"
+    assert "Resume v2" in provider.caches[third]["instruction"]
+    assert manager.stats["invalidated"] == provider.stats["deleted"] == 1
+    assert first not in provider.caches
+
+
+def test_each_user_gets_their_own_cache():
+    provider = FakeCacheProvider()
+    manager = ContextCacheManager(provider)
+    manager.register_agent("ResumeAgent", documents=["user:resume"])
+    manager.set_document("alice", "user:resume", "Alice's resume")
+    manager.set_document("bob", "user:resume", "Bob's resume")
+
+    async def scenario():
+        return (
+            await manager.apply(_request(), "ResumeAgent", "alice"),
+            await manager.apply(_request(), "ResumeAgent", "bob"),
+        )
+
+    alice, bob = asyncio.run(scenario())
+    assert alice != bob and manager.stats["hits"] == 0
+    assert "Bob's resume" in provider.caches[bob]["instruction"]
@@ -0,0 +1,20 @@
+# tests/test_evaluation.py
+# The fake-model baseline passes every eval case, so any failure in it is a pipeline regression
+
+import asyncio
+
+from core.evaluation import model_mode, load_dataset, run_evaluation
+
+
+def test_fake_baseline_passes_every_case(tmp_path, monkeypatch):
+    import runner
+
+    cases = load_dataset()
+    monkeypatch.chdir(tmp_path)  # Payloads, traces and runtime files stay out of the checkout
+    with model_mode(runner.root_orchestrator, "fake", fake_latency_s=0.0):
+        report = asyncio.run(run_evaluation(cases, runner.run_mission, runner.STRUCTURED_AGENTS, 4, 1))
+
+    failed = {r["id"]: [name for name, c in r["checks"].items() if not c["passed"]] for r in report["results"] if not r["passed"]}
+    assert not failed
+    assert report["summary"]["pass_rate"] == 1.0
+    assert len(report["results"]) == len(cases)
@@ -0,0 +1,64 @@
+# tests/test_http_client.py
+# PooledGemini requests go through the shared keep-alive pool (validated against a local stub server)
+
+import asyncio
+import socket
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from core.http_client import aclose_shared_async_client, connection_stats, get_shared_async_client
+from core.models import PooledGemini
+
+
+def _request() -> LlmRequest:
+    return LlmRequest(
+        model="gemini-2.5-flash-lite",
+        contents=[types.Content(role="user", parts=[types.Part(text="ping")])],
+    )
+
+
+def test_pooled_gemini_reuses_connections(gemini_stub):
+    # Two model instances, as two agents would have: both must share one pool
+    models = [PooledGemini(model="gemini-2.5-flash-lite", base_url=gemini_stub.base_url) for _ in range(2)]
+    connection_stats.reset()
+
+    async def burst(rounds: int = 10, concurrency: int = 4):
+        texts = []
+        for _ in range(rounds):
+            async def one(model):
+                return [r async for r in model.generate_content_async(_request())]
+            results = await asyncio.gather(*(one(models[i % 2]) for i in range(concurrency)))
+            texts += [responses[0].content.parts[0].text for responses in results]
+        await aclose_shared_async_client()
+        return texts
+
+    texts = asyncio.run(burst())
+
+    assert texts == ["stub answer"] * 40
+    assert all(path.endswith("models/gemini-2.5-flash-lite:generateContent") for path in gemini_stub.paths)
+    # 40 requests, at most 4 in flight: the pool opens a handful of sockets and reuses them
+    assert gemini_stub.connections <= 4
+    stats = connection_stats.snapshot()
+    assert stats["requests"] == 40
+    assert stats["new_connections"] == gemini_stub.connections
+    assert stats["reused_connections"] >= 36
+    assert stats["status_codes"] == {200: 40}
+    assert stats["failed_requests"] == 0
+
+
+def test_transport_failure_counted_once_per_request():
+    with socket.socket() as s:  # A port nothing listens on
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    connection_stats.reset()
+
+    async def call():
+        try:
+            await get_shared_async_client().get(f"http://127.0.0.1:{port}/")
+        except Exception:
+            pass
+        await aclose_shared_async_client()
+
+    asyncio.run(call())
+    assert connection_stats.snapshot()["failed_requests"] == 1
@@ -0,0 +1,32 @@
+# tests/test_job_dedup.py
+# Syndicated copies collapse into one cluster; re-querying the same board does not inflate the counts
+
+from tools.job_dedup import JobDeduplicator
+
+BOARD = [
+    {"id": "J101", "title": "Junior Data Analyst", "company": "DataCorp", "snippet": "Requires strong SQL, Python (Pandas), and visualization skills (Tableau).", "source": "Google Jobs"},
+    {"id": "LI-88412", "title": "Junior Data Analyst", "company": "DataCorp", "snippet": "Requires strong SQL, Python (Pandas), and visualization skills (Tableau). Apply today!", "source": "LinkedIn"},
+    {"id": "J102", "title": "Machine Learning Engineer", "company": "AICo", "snippet": "Demands expertise in PyTorch/TensorFlow, deep learning models, and cloud deployment (GCP/AWS).", "source": "Google Jobs"},
+]
+
+
+def test_repeated_queries_do_not_inflate_copies():
+    dedup = JobDeduplicator()
+    for _ in range(3):
+        unique = dedup.dedupe(BOARD, source="job_board")
+        assert len(unique) == 2
+        analyst = next(p for p in unique if p["company"] == "DataCorp")
+        assert analyst["copies_seen"] == 2
+        assert sorted(analyst["sources"]) == ["Google Jobs", "LinkedIn"]
+    assert dedup.stats()["duplicates_collapsed"] == 1
+    assert dedup.stats()["clusters"] == 2
+
+
+def test_copies_without_ids_are_keyed_by_exact_text():
+    dedup = JobDeduplicator()
+    posting = {"title": "Data Scientist", "company": "Global Analytics", "skills": ["Python", "SQL", "Tableau"]}
+    dedup.add(posting, source="live_listings")
+    dedup.add(dict(posting), source="live_listings")
+    dedup.add(dict(posting), source="other_board")
+    assert dedup.dedupe([posting], source="live_listings")[0]["copies_seen"] == 2
+    assert dedup.stats()["duplicates_collapsed"] == 1
@@ -0,0 +1,100 @@
+# tests/test_memory_ingest.py
+# Files that share a memory doc key keep their own passages across re-ingests; removed files lose theirs
+
+import asyncio
+import os
+from pathlib import Path
+
+from core.memory_ingest import MemoryStore, StoreBackedMemoryService, discover_documents, doc_key_for, ingest_directory
+
+
+def test_files_sharing_a_doc_key_do_not_overwrite_each_other(tmp_path):
+    root = tmp_path / "users"
+    (root / "alice" / "2023").mkdir(parents=True)
+    (root / "alice" / "2024").mkdir(parents=True)
+    (root / "alice" / "resume.txt").write_text("Resume: SQL, Tableau.")
+    (root / "alice" / "cv.txt").write_text("CV: Python, Spark.")
+    (root / "alice" / "2023" / "notes.txt").write_text("Mentor call notes.")
+    (root / "alice" / "2024" / "notes.txt").write_text("Interview prep notes.")
+    store = MemoryStore(str(tmp_path / "memory.sqlite3"))
+
+    assert ingest_directory(str(root), store=store, workers=0)["changed"] == 4
+    (root / "alice" / "cv.txt").write_text("CV: Python, Spark, Airflow.")
+    stats = ingest_directory(str(root), store=store, workers=0)
+    assert (stats["changed"], stats["unchanged"]) == (1, 3)
+
+    documents = store.load_user("alice")
+    assert sorted(documents["user:resume"]) == ["CV: Python, Spark, Airflow.", "Resume: SQL, Tableau."]
+    assert sorted(documents["user:notes:notes"]) == ["Interview prep notes.", "Mentor call notes."]
+
+
+def test_app_data_is_not_ingested(monkeypatch):
+    monkeypatch.chdir(Path(__file__).resolve().parents[1])
+    sources = [source for _, _, source in discover_documents("data")]
+    assert "user_resume.txt" in sources
+    assert "quiz_bank.json" not in sources and "eval_missions.json" not in sources
+
+
+def test_removed_and_renamed_files_lose_their_passages(tmp_path):
+    root = tmp_path / "users"
+    (root / "alice").mkdir(parents=True)
+    (root / "alice" / "resume.txt").write_text("Resume: SQL, Tableau.")
+    (root / "alice" / "notes.txt").write_text("Mentor call notes.")
+    store = MemoryStore(str(tmp_path / "memory.sqlite3"))
+    ingest_directory(str(root), store=store, workers=0)
+    version = store.user_version("alice")
+
+    (root / "alice" / "notes.txt").rename(root / "alice" / "mentor.txt")
+    (root / "alice" / "resume.txt").unlink()
+    stats = ingest_directory(str(root), store=store, workers=0)
+
+    assert (stats["changed"], stats["removed"]) == (1, 2)
+    assert store.load_user("alice") == {"user:notes:mentor": ["Mentor call notes."]}
+    assert set(store.known_hashes()) == {("alice", os.path.join("alice", "mentor.txt"))}
+    assert store.user_version("alice") > version  # Running memory services reload and drop the old documents
+
+
+def test_doc_keys_match_whole_words():
+    assert doc_key_for("cv_2024.pdf") == "user:resume"
+    assert doc_key_for("My-Resume.docx") == "user:resume"
+    assert doc_key_for("export_cvs.csv") == "user:notes:export_cvs"
+    assert doc_key_for("recv_log.txt") == "user:notes:recv_log"
+    assert doc_key_for("layoff_reason.txt") == "user:coaching:layoff_reason"
+
+
+def test_reads_reuse_one_connection_per_thread(tmp_path):
+    root = tmp_path / "users"
+    (root / "alice").mkdir(parents=True)
+    (root / "alice" / "resume.txt").write_text("Resume: SQL, Tableau.")
+    store = MemoryStore(str(tmp_path / "memory.sqlite3"))
+    ingest_directory(str(root), store=store, workers=0)
+
+    connections = []
+    real_connect = store._connect
+    store._connect = lambda: connections.append(1) or real_connect()
+    for _ in range(5):
+        store.user_version("alice")
+        store.load_user("alice")
+    assert len(connections) == 1
+
+    # A re-ingest is visible through the reused connection
+    (root / "alice" / "resume.txt").write_text("Resume: SQL, Tableau, dbt.")
+    ingest_directory(str(root), store=store, workers=0)
+    assert store.load_user("alice")["user:resume"] == ["Resume: SQL, Tableau, dbt."]
+
+
+def test_memory_service_drops_documents_removed_by_a_later_ingest(tmp_path):
+    root = tmp_path / "users"
+    (root / "alice").mkdir(parents=True)
+    (root / "alice" / "notes.txt").write_text("Mentor call about Kubernetes.")
+    store = MemoryStore(str(tmp_path / "memory.sqlite3"))
+    ingest_directory(str(root), store=store, workers=0)
+    service = StoreBackedMemoryService(store)
+
+    def search():
+        return asyncio.run(service.search_memory(app_name="app", user_id="alice", query="Kubernetes")).memories
+
+    assert search()
+    (root / "alice" / "notes.txt").unlink()
+    ingest_directory(str(root), store=store, workers=0)
+    assert not search()
@@ -0,0 +1,63 @@
+# tests/test_memory_tools.py
+# Coalesced load_memory searches are never shared between different memory services
+
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.memory import InMemoryMemoryService
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from tools.memory_tools import index_user_document, load_memory
+
+
+class MemoryLookupLlm(BaseLlm):
+    """Calls load_memory once, then answers with the tool response."""
+
+    model: str = "scripted"
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        part = llm_request.contents[-1].parts[0]
+        if part.function_response:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=str(part.function_response.response))]))
+        else:
+            call = types.FunctionCall(name="load_memory", args={"query": "user resume"})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+
+class SlowMemoryService(InMemoryMemoryService):
+    """Keeps each search in flight long enough for the two runners' searches to overlap."""
+
+    async def search_memory(self, *, app_name, user_id, query):
+        await asyncio.sleep(0.2)
+        return await super().search_memory(app_name=app_name, user_id=user_id, query=query)
+
+
+async def _ask(runner: Runner) -> str:
+    session = await runner.session_service.create_session(app_name="app", user_id="alice")
+    message = types.Content(role="user", parts=[types.Part(text="What is on my resume?")])
+    texts = []
+    async for event in runner.run_async(user_id="alice", session_id=session.id, new_message=message):
+        if event.content and event.content.parts:
+            texts += [p.text for p in event.content.parts if p.text]
+    return texts[-1]
+
+
+def test_identical_searches_on_different_memory_services_are_not_coalesced():
+    runners = [
+        Runner(app_name="app", agent=LlmAgent(name="Root", model=MemoryLookupLlm(), tools=[load_memory]),
+               session_service=InMemorySessionService(), memory_service=SlowMemoryService())
+        for _ in range(2)
+    ]
+
+    async def scenario():
+        await index_user_document(runners[0].memory_service, "app", "alice", "user:resume", "First store: SQL.")
+        await index_user_document(runners[1].memory_service, "app", "alice", "user:resume", "Second store: Spark.")
+        return await asyncio.gather(*(_ask(runner) for runner in runners))
+
+    first, second = asyncio.run(scenario())
+    assert "First store" in first and "Second store" not in first
+    assert "Second store" in second and "First store" not in second
@@ -0,0 +1,47 @@
+# tests/test_metrics.py
+# Shards of exited threads are folded into the registry's totals instead of piling up;
+# the /metrics endpoint listens on loopback unless told otherwise
+
+import threading
+import urllib.request
+
+from core.metrics import MetricsRegistry, start_metrics_server
+
+
+def test_finished_thread_shards_are_folded_without_losing_counts():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ["route"])
+    latency = registry.histogram("latency_seconds", "Latency.")
+
+    def rerun():  # Streamlit runs each script rerun on a fresh thread
+        requests.inc(route="/chat")
+        latency.observe(0.25)
+
+    for _ in range(50):
+        thread = threading.Thread(target=rerun)
+        thread.start()
+        thread.join()
+    requests.inc(route="/chat")  # This (live) thread keeps its own shard
+
+    snapshot = registry.snapshot()
+    assert len(registry._shards) == 1
+    assert [(row["labels"], row["value"]) for row in snapshot["scalars"]] == [({"route": "/chat"}, 51.0)]
+    assert snapshot["latencies"][0]["count"] == 50
+
+    # Retired totals are counted once, however often the registry is read
+    assert registry.snapshot()["scalars"][0]["value"] == 51.0
+    assert 'requests_total{route="/chat"} 51' in registry.render_prometheus()
+
+
+def test_metrics_server_binds_loopback_by_default():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests served").inc()
+    server = start_metrics_server(0, registry)
+    try:
+        host, port = server.server_address
+        assert host == "127.0.0.1"
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode("utf-8")
+        assert "requests_total 1" in body
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,98 @@
+# tests/test_mission_executor.py
+# Worker processes receive the user's state with each job, and every submitted future resolves
+
+import asyncio
+import multiprocessing as mp
+import queue
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from core.context_cache import context_cache
+from core.mission_executor import MissionExecutor, WorkerCrashedError, _Worker, apply_worker_state, collect_worker_state
+from tools.file_tools import MOCK_USER_FILES
+
+
+def _probe_worker(state, results) -> None:
+    # Runs in a spawned interpreter, like a mission worker
+    import runner
+
+    async def probe():
+        await apply_worker_state("worker_probe", state)
+        found = await runner.memory_service.search_memory(app_name=runner.APP_NAME, user_id="worker_probe", query="Kubernetes")
+        return {
+            "resume_file": MOCK_USER_FILES.get("user:resume:raw"),
+            "cached_version": context_cache.document_version("worker_probe", "user:resume"),
+            "memory_hits": len(found.memories),
+        }
+
+    results.put(asyncio.run(probe()))
+
+
+def test_uploaded_resume_reaches_a_spawned_worker(monkeypatch):
+    monkeypatch.setitem(MOCK_USER_FILES, "user:resume:raw", "Resume: Kubernetes, Airflow.")
+    version = context_cache.set_document("worker_probe", "user:resume", "Resume: Kubernetes, Airflow.")
+    state = collect_worker_state("worker_probe")
+    assert state["documents"] == {"user:resume": (version, "Resume: Kubernetes, Airflow.")}
+
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_probe_worker, args=(state, results))
+    process.start()
+    try:
+        seen = results.get(timeout=60)
+    finally:
+        process.join(10)
+    assert seen == {"resume_file": "Resume: Kubernetes, Airflow.", "cached_version": version, "memory_hits": 1}
+
+
+class _DeadProcess:
+    pid = 4242
+    exitcode = -9
+
+    def is_alive(self) -> bool:
+        return False
+
+    def join(self, timeout=None) -> None:
+        pass
+
+
+def _executor_with_retiring_worker():
+    executor = MissionExecutor(num_workers=1, health_check_interval=3600)
+    worker = _Worker(index=0, process=_DeadProcess(), inbox=queue.Queue(), generation=1)
+    delivered, lost = Future(), Future()
+    worker.inflight = {1: delivered, 2: lost}
+    with executor._lock:
+        executor._retire_locked(worker)
+    return executor, delivered, lost
+
+
+def test_dead_retiring_worker_fails_its_pending_futures():
+    executor, delivered, lost = _executor_with_retiring_worker()
+    executor._outbox.put(("result", 0, 1, "transcript", None))
+    executor._collector = threading.Thread(target=executor._collect_results, daemon=True)
+    executor._collector.start()
+
+    assert delivered.result(timeout=10) == ("transcript", None)
+    with pytest.raises(WorkerCrashedError):
+        lost.result(timeout=10)
+    assert executor.queue_depth() == 0
+    executor._stopping.set()
+    executor._collector.join(10)
+    assert not executor._collector.is_alive()
+
+
+def test_shutdown_delivers_queued_results_then_fails_the_rest():
+    executor = MissionExecutor(num_workers=1, health_check_interval=3600)
+    delivered, lost = Future(), Future()
+    executor._workers = [_Worker(index=0, process=_DeadProcess(), inbox=queue.Queue(), generation=1, inflight={1: delivered, 2: lost})]
+    # The worker sent one result before exiting; the collector has not read it yet
+    executor._outbox.put(("result", 0, 1, "transcript", None))
+    executor._collector = threading.Thread(target=executor._collect_results, daemon=True)
+    executor._collector.start()
+    executor.shutdown(timeout=5)
+
+    assert delivered.result(timeout=0) == ("transcript", None)
+    assert isinstance(lost.exception(timeout=0), WorkerCrashedError)
+    assert not executor._retiring and executor.queue_depth() == 0
@@ -0,0 +1,71 @@
+# tests/test_payload_store.py
+# Payload handles are validated before any disk access and resolve only for their owner
+
+import asyncio
+import os
+import threading
+from types import SimpleNamespace
+
+from core.payload_store import PayloadStore, payload_scope
+from tools.payload_tools import read_chunk
+
+
+def test_malformed_handles_never_touch_disk(tmp_path, monkeypatch):
+    secret = tmp_path / "secret.txt"
+    secret.write_text("api key")
+    store = PayloadStore(directory=str(tmp_path / "payloads"))
+    monkeypatch.chdir(tmp_path)
+
+    for handle in (str(tmp_path / "secret"), "../secret", "../../requirements", "ref_../../secret", "REF_0123456789ABCDEF", None):
+        assert store.get(handle) is None
+        assert store.read(handle) is None
+    assert read_chunk("../../requirements", tool_context=SimpleNamespace(user_id="alice"))["status"] == "error"
+
+
+def test_handles_are_scoped_per_user(tmp_path):
+    store = PayloadStore(directory=str(tmp_path))
+    handle = store.put("alice's resume", kind="resume", user_id="alice")["handle"]
+
+    assert store.get(handle, user_id="alice") == "alice's resume"
+    assert store.get(handle, user_id="bob") is None
+    assert store.get(handle) is None  # no user -> shared scope only
+
+    # A fresh store (another worker process) resolves from disk with the same rules
+    reopened = PayloadStore(directory=str(tmp_path))
+    assert reopened.read(handle, user_id="bob") is None
+    with payload_scope("alice"):
+        assert reopened.read(handle)["content"] == "alice's resume"
+
+
+def test_store_is_bounded_on_disk_and_in_memory(tmp_path, monkeypatch):
+    import core.payload_store as ps
+
+    monkeypatch.setattr(ps, "PRUNE_EVERY_WRITES", 5)
+    store = PayloadStore(directory=str(tmp_path), max_files=8, max_meta=4)
+    handles = []
+    for i in range(20):
+        handles.append(store.put(f"payload {i}", user_id="alice" if i % 2 else "bob")["handle"])
+        os.utime(next(tmp_path.rglob(f"{handles[-1]}.txt")), (i, i))  # Deterministic age order
+
+    assert len(list(tmp_path.rglob("*.txt"))) <= 8
+    assert not list(tmp_path.rglob("*.tmp"))
+    assert len(store._meta) == 4
+    assert store.read(handles[0], user_id="bob") is None  # Pruned with its file
+    assert store.read(handles[-1], user_id="alice")["content"] == "payload 19"
+    assert store.describe(handles[-2], user_id="bob")["size_chars"] == len("payload 18")
+
+
+def test_put_async_writes_off_the_loop(tmp_path, monkeypatch):
+    store = PayloadStore(directory=str(tmp_path))
+    loop_thread = threading.get_ident()
+    writers = []
+    real_replace = os.replace
+
+    def spy(src, dst):
+        writers.append(threading.get_ident())
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", spy)
+    handle = asyncio.run(store.put_async("x" * 10_000, kind="job_list", user_id="alice"))["handle"]
+    assert writers and writers[0] != loop_thread
+    assert store.get(handle, user_id="alice") == "x" * 10_000
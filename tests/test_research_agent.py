@@ -0,0 +1,48 @@
+# tests/test_research_agent.py
+# ResearchAgent (google_search built-in tool) runs end to end against a local Gemini stub
+
+import asyncio
+
+from google.adk.runners import InMemoryRunner
+from google.adk.utils.model_name_utils import is_gemini_model
+from google.genai import types
+
+from agents.research_agent import research_agent
+from core.models import CascadeLlm
+
+
+def test_research_agent_stays_on_the_cascade():
+    model = research_agent.model
+    assert isinstance(model, CascadeLlm)
+    assert (model.fast.model, model.strong.model) == ("gemini-2.5-flash-lite", "gemini-2.5-pro")
+    assert is_gemini_model(model.model)  # google_search attaches only for gemini-* names
+
+
+def test_research_agent_runs_with_google_search(gemini_stub):
+    tiers = (research_agent.model.fast, research_agent.model.strong)
+    original_base_urls = [tier.base_url for tier in tiers]
+    for tier in tiers:
+        tier.base_url = gemini_stub.base_url
+    runner = InMemoryRunner(agent=research_agent, app_name="test_research")
+
+    async def run():
+        session = await runner.session_service.create_session(app_name="test_research", user_id="u1")
+        events = []
+        async for event in runner.run_async(
+            user_id="u1", session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text="Top MLOps hiring trends?")]),
+        ):
+            events.append(event)
+        return events
+
+    try:
+        events = asyncio.run(run())
+    finally:
+        for tier, base_url in zip(tiers, original_base_urls):
+            tier.base_url = base_url
+
+    finals = [e for e in events if e.is_final_response()]
+    assert finals and finals[-1].content.parts[0].text == "stub answer"
+    assert not any(e.error_code for e in events)
+    # The built-in search tool reached the request sent to Gemini
+    assert any("googleSearch" in tool for tool in gemini_stub.bodies[0].get("tools", []))
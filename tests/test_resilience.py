@@ -0,0 +1,37 @@
+# tests/test_resilience.py
+# Degraded answers are cached per user and never served across users
+
+import asyncio
+from types import SimpleNamespace
+
+from google.adk.agents import LlmAgent
+
+from core.resilience import ResilientAgentTool, degraded_cache
+
+
+def test_degraded_cache_is_scoped_per_user(monkeypatch):
+    tool = ResilientAgentTool(agent=LlmAgent(name="PrivateAgent", model="gemini-2.5-flash-lite"))
+    calls = {"fail": False}
+
+    # The sub-agent answers with the caller's private data, then its provider goes down
+    async def fake_agent_run(self, *, args, tool_context):
+        if calls["fail"]:
+            raise RuntimeError("provider down")
+        return f"resume details of {tool_context.user_id}"
+
+    monkeypatch.setattr("google.adk.tools.AgentTool.run_async", fake_agent_run)
+    args = {"request": "Summarize my resume"}
+    context = SimpleNamespace(memory_service=None)
+    alice = SimpleNamespace(user_id="alice", _invocation_context=context)
+    bob = SimpleNamespace(user_id="bob", _invocation_context=context)
+
+    async def scenario():
+        first = await tool.run_async(args=args, tool_context=alice)
+        calls["fail"] = True
+        return first, await tool.run_async(args=args, tool_context=bob), await tool.run_async(args=args, tool_context=alice)
+
+    first, bob_degraded, alice_degraded = asyncio.run(scenario())
+    assert first == "resume details of alice"
+    assert "alice" not in bob_degraded and "unavailable" in bob_degraded
+    assert "cached answer" in alice_degraded and "resume details of alice" in alice_degraded
+    degraded_cache._data.clear()
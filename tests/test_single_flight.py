@@ -0,0 +1,81 @@
+# tests/test_single_flight.py
+# Identical missions coalesce even when each caller runs its own event loop (Streamlit reruns)
+
+import asyncio
+import threading
+
+import runner
+from core.single_flight import SingleFlight
+from core.transcript import capture_output
+
+
+def _run_in_threads(target, count: int = 2):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    return results
+
+
+def test_ui_reruns_on_separate_loops_share_one_mission(monkeypatch):
+    executions = []
+
+    async def fake_execute(mission_query, user_id, session_id):
+        executions.append(session_id)
+        await asyncio.sleep(0.3)
+        print(f"answer to {mission_query}")
+
+    monkeypatch.setattr(runner, "_execute_mission", fake_execute)
+
+    def click():
+        # What the UI does per rerun: its own thread, its own asyncio.run
+        with capture_output() as buffer:
+            asyncio.run(runner.run_mission("Explain bias vs variance", user_id="ui_user"))
+        return buffer.getvalue()
+
+    transcripts = _run_in_threads(click)
+    assert len(executions) == 1
+    assert transcripts == ["answer to Explain bias vs variance\n"] * 2
+
+
+def test_waiter_takes_over_when_the_leading_loop_stops():
+    flight = SingleFlight("takeover_test")
+    runs = []
+    leader_started = threading.Event()
+
+    async def work():
+        runs.append(threading.current_thread().name)
+        leader_started.set()
+        await asyncio.sleep(0.5)
+        return "done"
+
+    def leader():
+        async def main():
+            try:
+                await asyncio.wait_for(flight.do("k", work), timeout=0.1)
+            except asyncio.TimeoutError:
+                pass
+            # Returning while the shared task still runs: asyncio.run cancels it on the way out
+            await asyncio.sleep(0.1)
+        asyncio.run(main())
+
+    def follower():
+        leader_started.wait(5)
+        return asyncio.run(flight.do("k", work))
+
+    threads = [threading.Thread(target=leader, name="leader")]
+    threads[0].start()
+    result = follower()
+    threads[0].join(10)
+
+    assert result == "done"
+    assert runs == ["leader", "MainThread"]
+    assert flight.in_flight() == 0
@@ -0,0 +1,83 @@
+# tests/test_structured_output.py
+# The repair pass fixes near-miss values but never invents missing required fields
+
+import asyncio
+from types import SimpleNamespace
+from typing import AsyncGenerator, List
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+from pydantic import BaseModel, Field
+
+from core.structured_output import structured_response_guard, structured_stats, validate_structured
+
+
+class Analysis(BaseModel):
+    match_score: int = Field(...)
+    skill_gaps_flagged: List[str] = Field(...)
+    suggested_rewrite_summary: str = Field(...)
+
+
+def test_near_miss_values_are_repaired():
+    text = 'Here you go: {"match_score": "85%", "skill_gaps_flagged": "spark, airflow", "suggested_rewrite_summary": "Lead with SQL",}'
+    result = validate_structured(text, Analysis)
+    assert result.ok
+    assert result.value.match_score == 85
+    assert result.value.skill_gaps_flagged == ["spark", "airflow"]
+
+
+def test_missing_required_fields_stay_a_failure():
+    result = validate_structured('{"match_score": 85}', Analysis)
+    assert not result.ok
+    assert "skill_gaps_flagged" in result.error and "suggested_rewrite_summary" in result.error
+
+
+class SetModelResponseLlm(BaseLlm):
+    """Answers like Gemini does for an agent with tools + output_schema: a set_model_response call."""
+
+    model: str = "scripted"
+    args: dict = {}
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        assert "set_model_response" in llm_request.tools_dict
+        call = types.FunctionCall(name="set_model_response", args=dict(self.args))
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+
+def _run_agent(args: dict) -> dict:
+    def parse_resume(text: str) -> str:
+        """Parses a resume."""
+        return text
+
+    agent = LlmAgent(
+        name="ResumeAgent", model=SetModelResponseLlm(args=args), tools=[parse_resume],
+        output_schema=Analysis, output_key="analysis", before_tool_callback=structured_response_guard(Analysis),
+    )
+    runner = InMemoryRunner(agent=agent, app_name="app")
+
+    async def scenario():
+        session = await runner.session_service.create_session(app_name="app", user_id="alice")
+        message = types.Content(role="user", parts=[types.Part(text="Analyze my resume")])
+        async for _ in runner.run_async(user_id="alice", session_id=session.id, new_message=message):
+            pass
+        return (await runner.session_service.get_session(app_name="app", user_id="alice", session_id=session.id)).state
+
+    return asyncio.run(scenario())
+
+
+def test_set_model_response_arguments_are_repaired():
+    before = dict(structured_stats.get("Analysis", {}))
+    state = _run_agent({"match_score": "85%", "skill_gaps_flagged": "spark, airflow", "suggested_rewrite_summary": "Lead with SQL"})
+    assert state["analysis"] == {"match_score": 85, "skill_gaps_flagged": ["spark", "airflow"], "suggested_rewrite_summary": "Lead with SQL"}
+    assert structured_stats["Analysis"]["repaired"] == before.get("repaired", 0) + 1
+
+
+def test_set_model_response_missing_field_is_counted_as_failed():
+    before = dict(structured_stats.get("Analysis", {}))
+    args = {"match_score": 85}
+    guard = structured_response_guard(Analysis)
+    assert guard(tool=SimpleNamespace(name="set_model_response"), args=args, tool_context=None) is None
+    assert args == {"match_score": 85}  # Left for ADK to reject; nothing is invented
+    assert structured_stats["Analysis"]["failed"] == before.get("failed", 0) + 1
@@ -0,0 +1,55 @@
+# tests/test_sub_agent_memory.py
+# Sub-agents behind ResilientAgentTool search the Runner's memory, not an empty per-run one
+
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.memory import InMemoryMemoryService
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from core.resilience import ResilientAgentTool, SubAgentMemoryPlugin
+from tools.memory_tools import index_user_document, load_memory
+
+
+class ScriptedLlm(BaseLlm):
+    """Root delegates to ResumeAgent, ResumeAgent calls load_memory, both return what their tool returned."""
+
+    model: str = "scripted"
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        part = llm_request.contents[-1].parts[0]
+        if part.function_response:
+            text = str(part.function_response.response)
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+        elif "load_memory" in llm_request.tools_dict:
+            call = types.FunctionCall(name="load_memory", args={"query": "user resume"})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+        else:
+            call = types.FunctionCall(name="ResumeAgent", args={"request": "Summarize my resume"})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+
+def test_sub_agent_load_memory_sees_indexed_resume():
+    resume_agent = LlmAgent(name="ResumeAgent", model=ScriptedLlm(), tools=[load_memory])
+    root = LlmAgent(name="Root", model=ScriptedLlm(), tools=[ResilientAgentTool(agent=resume_agent)])
+    runner = Runner(
+        app_name="app", agent=root, session_service=InMemorySessionService(),
+        memory_service=InMemoryMemoryService(), plugins=[SubAgentMemoryPlugin()],
+    )
+
+    async def scenario():
+        await index_user_document(runner.memory_service, "app", "alice", "user:resume", "Senior analyst, 6 years of SQL and Tableau.")
+        session = await runner.session_service.create_session(app_name="app", user_id="alice")
+        message = types.Content(role="user", parts=[types.Part(text="Review my resume")])
+        texts = []
+        async for event in runner.run_async(user_id="alice", session_id=session.id, new_message=message):
+            if event.content and event.content.parts:
+                texts += [p.text for p in event.content.parts if p.text]
+        return texts[-1]
+
+    final = asyncio.run(scenario())
+    assert "[user:resume] Senior analyst, 6 years of SQL and Tableau." in final
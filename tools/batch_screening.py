@@ -0,0 +1,327 @@
+# tools/batch_screening.py
+# Recruiter mode: score a directory/archive of resumes against one JD in a single local pass
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from tools.skill_extraction import extract_jd_requirements, extract_skills, from_mask, to_mask
+
+# Optional document parsers (plain-text fallback when they are not installed)
+try:
+    from pypdf import PdfReader
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+try:
+    import docx
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+# --- Configuration ---
+RESUME_EXTENSIONS = (".txt", ".md", ".pdf", ".docx")
+TEXT_CACHE_DIR = os.path.join("output", "resume_text_cache")  # Extracted text keyed by file content hash
+EXTRACTION_WORKERS = 8
+DEFAULT_TOP_K = 5
+REWRITE_CONCURRENCY = 3       # Parallel LLM missions for the top-k rewrite suggestions
+REWRITE_RESUME_CHARS = 6_000  # Resume text shipped to the LLM per candidate
+REQUIRED_WEIGHT = 2           # A required JD skill counts twice as much as a preferred one
+PREFERRED_WEIGHT = 1
+# The only server-side tree the web UI may read resumes from (the CLI takes any path)
+BATCH_SCREENING_ROOT = os.getenv("BATCH_SCREENING_ROOT", os.path.join("data", "resumes"))
+
+
+# --- 1. Ingestion (directory, zip archive or uploaded files) ---
+
+def expand_archive(name: str, data: bytes) -> Iterator[Tuple[str, bytes]]:
+    """Yields the resumes inside a .zip, or the file itself if it is a resume."""
+    if name.lower().endswith(".zip"):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or "__MACOSX" in info.filename:
+                    continue
+                if info.filename.lower().endswith(RESUME_EXTENSIONS):
+                    yield f"{name}/{info.filename}", archive.read(info)
+    elif name.lower().endswith(RESUME_EXTENSIONS):
+        yield name, data
+
+
+def resolve_screening_path(path: str, root: str = BATCH_SCREENING_ROOT) -> str:
+    """
+    Resolves a path typed into the UI against the screening root.
+
+    Raises:
+        ValueError: if the path (after resolving '..' and symlinks) leaves the root.
+    """
+    real_root = os.path.realpath(root)
+    full_path = os.path.realpath(os.path.join(real_root, path))
+    if os.path.commonpath([real_root, full_path]) != real_root:
+        raise ValueError(f"'{path}' is outside the screening directory {root}.")
+    return full_path
+
+
+def iter_resume_sources(path: str) -> Iterator[Tuple[str, bytes]]:
+    """Walks a directory (or opens a single archive/file) and yields (name, raw bytes) per resume."""
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            yield from expand_archive(os.path.basename(path), f.read())
+        return
+    for root, _, files in os.walk(path):
+        for filename in sorted(files):
+            full_path = os.path.join(root, filename)
+            with open(full_path, "rb") as f:
+                yield from expand_archive(os.path.relpath(full_path, path), f.read())
+
+
+# --- 2. Text Extraction with a Content-Hash Cache ---
+
+def extract_text(name: str, data: bytes) -> Tuple[str, List[str]]:
+    """
+    Extracts plain text from a resume file.
+
+    Returns:
+        (text, extraction flags) - flags feed into the ATS risk column.
+    """
+    lower = name.lower()
+    flags: List[str] = []
+    if lower.endswith(".pdf"):
+        if PDF_AVAILABLE:
+            try:
+                reader = PdfReader(io.BytesIO(data))
+                return "\n".join(page.extract_text() or "" for page in reader.pages), flags
+            except Exception as e:
+                flags.append(f"PDF could not be parsed ({type(e).__name__})")
+        else:
+            flags.append("PDF text extraction unavailable (pip install pypdf); raw bytes decoded")
+    elif lower.endswith(".docx"):
+        if DOCX_AVAILABLE:
+            try:
+                document = docx.Document(io.BytesIO(data))
+                if document.tables:
+                    flags.append("Uses tables (often mangled by ATS parsers)")
+                return "\n".join(p.text for p in document.paragraphs), flags
+            except Exception as e:
+                flags.append(f"DOCX could not be parsed ({type(e).__name__})")
+        else:
+            flags.append("DOCX text extraction unavailable (pip install python-docx); raw bytes decoded")
+    return data.decode("utf-8", errors="ignore"), flags
+
+
+class ResumeTextCache:
+    """Extracted text keyed by the SHA-256 of the file bytes (re-uploads and re-runs skip extraction)."""
+
+    def __init__(self, directory: str = TEXT_CACHE_DIR):
+        self.directory = directory
+        self._memory: Dict[str, Tuple[str, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_extract(self, name: str, data: bytes) -> Tuple[str, List[str], bool]:
+        """Returns (text, extraction flags, cache hit)."""
+        key = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.directory, f"{key}.json")
+        with self._lock:
+            hit = self._memory.get(key)
+        if hit is None and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            hit = (stored["text"], stored["flags"])
+        if hit is not None:
+            with self._lock:
+                self._memory[key] = hit
+                self.hits += 1
+            return hit[0], list(hit[1]), True
+
+        text, flags = extract_text(name, data)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"text": text, "flags": flags}, f)
+        with self._lock:
+            self._memory[key] = (text, flags)
+            self.misses += 1
+        return text, flags, False
+
+
+text_cache = ResumeTextCache()
+
+
+# --- 3. Scoring (bitset pass over all candidates) ---
+
+def ats_risk_flags(text: str, extraction_flags: List[str]) -> List[str]:
+    """Cheap local ATS checks (the same category of flags ResumeAnalysisResult.ats_risk_flags carries)."""
+    flags = list(extraction_flags)
+    stripped = text.strip()
+    if len(stripped) < 200:
+        flags.append("Very little extractable text (image-only or scanned resume?)")
+    if not re.search(r"[\w.+-]+@[\w-]+\.[\w.]+", text):
+        flags.append("No email address found")
+    lines = text.splitlines()
+    if sum(1 for ln in lines if ln.count("|") >= 3 or ln.count("\t") >= 3) >= 5:
+        flags.append("Table/column layout detected")
+    if len(stripped) > 9_000:
+        flags.append("Longer than ~2 pages")
+    return flags
+
+
+def score_resumes(candidates: List[Dict[str, Any]], jd_text: str) -> Dict[str, Any]:
+    """
+    Scores all candidates against one JD.
+
+    Every resume and the JD are reduced to skill bitmasks once; matching is then a couple of
+    AND/popcount operations per candidate, so hundreds of resumes score in milliseconds.
+
+    Args:
+        candidates: Dicts with 'candidate', 'text' and 'extraction_flags'.
+        jd_text: The job description.
+
+    Returns:
+        {'jd_required', 'jd_preferred', 'rows'} with rows ranked by match_score, using the
+        ResumeAnalysisResult field names.
+    """
+    required, preferred = extract_jd_requirements(jd_text)
+    denominator = REQUIRED_WEIGHT * required.bit_count() + PREFERRED_WEIGHT * preferred.bit_count()
+    masks = [to_mask(extract_skills(c["text"])) for c in candidates]
+
+    rows = []
+    for candidate, mask in zip(candidates, masks):
+        req_hit, pref_hit = mask & required, mask & preferred
+        points = REQUIRED_WEIGHT * req_hit.bit_count() + PREFERRED_WEIGHT * pref_hit.bit_count()
+        rows.append({
+            "candidate": candidate["candidate"],
+            "match_score": round(100 * points / denominator) if denominator else 0,
+            "required_skills_found": from_mask(req_hit | pref_hit),
+            "skill_gaps_flagged": from_mask(required & ~mask),
+            "preferred_missing": from_mask(preferred & ~mask),
+            "ats_risk_flags": ats_risk_flags(candidate["text"], candidate["extraction_flags"]),
+            "suggested_rewrite_summary": "",
+        })
+    # Ties: fewer ATS risks first, then name (stable, reproducible ranking)
+    rows.sort(key=lambda r: (-r["match_score"], len(r["ats_risk_flags"]), r["candidate"]))
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    return {"jd_required": from_mask(required), "jd_preferred": from_mask(preferred), "rows": rows}
+
+
+def screen_resumes(sources: Iterable[Tuple[str, bytes]], jd_text: str, workers: int = EXTRACTION_WORKERS) -> Dict[str, Any]:
+    """
+    Ingests all resumes (text extraction in a thread pool, cached by content hash) and scores them.
+
+    Returns:
+        The score_resumes() report plus 'texts' (candidate -> extracted text) and 'stats'.
+    """
+    started = time.perf_counter()
+    sources = list(sources)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        extracted = list(pool.map(lambda item: text_cache.get_or_extract(*item), sources))
+    extract_s = time.perf_counter() - started
+
+    candidates = [
+        {"candidate": name, "text": text, "extraction_flags": flags}
+        for (name, _), (text, flags, _) in zip(sources, extracted)
+    ]
+    report = score_resumes(candidates, jd_text)
+    report["texts"] = {c["candidate"]: c["text"] for c in candidates}
+    report["stats"] = {
+        "resumes": len(candidates),
+        "text_cache_hits": sum(1 for *_, hit in extracted if hit),
+        "extract_s": round(extract_s, 3),
+        "score_s": round(time.perf_counter() - started - extract_s, 4),
+    }
+    print(f"TOOL_OUTPUT: Screened {len(candidates)} resumes in {time.perf_counter() - started:.2f}s "
+          f"({report['stats']['text_cache_hits']} from the text cache).")
+    return report
+
+
+# --- 4. LLM Rewrite Suggestions for the Top-k Only ---
+
+def _final_response(transcript: str) -> str:
+    match = re.search(r"\[FINAL RESPONSE\]\s*> ?(.*?)(?:\n={3,}|$)", transcript, re.S)
+    return match.group(1).strip() if match else ""
+
+
+async def suggest_rewrites(report: Dict[str, Any], jd_text: str, top_k: int = DEFAULT_TOP_K, user_id: str = "recruiter") -> Dict[str, Any]:
+    """
+    Fills 'suggested_rewrite_summary' for the top-k rows through ResumeTailorAgent missions.
+
+    The score and gaps are already computed locally, so each mission only asks for the
+    rewrite advice; the rest of the table never touches the LLM.
+    """
+    import runner  # Deferred: the batch scorer itself needs no agents or API key
+    from core.transcript import capture_output
+
+    semaphore = asyncio.Semaphore(REWRITE_CONCURRENCY)
+
+    async def one(row: Dict[str, Any]) -> None:
+        mission = (
+            "TASK: recruiter_rewrite\n"
+            "Action: Ask ResumeTailorAgent for a short suggested_rewrite_summary (max 3 bullets) for this candidate. "
+            "The match score and skill gaps below were computed locally; do not re-score.\n\n"
+            f"Match score: {row['match_score']}\nSkill gaps: {', '.join(row['skill_gaps_flagged']) or 'none'}\n"
+            f"ATS risks: {', '.join(row['ats_risk_flags']) or 'none'}\n\n"
+            f"Job Description:\n{jd_text}\n\n"
+            f"Candidate resume:\n{report['texts'][row['candidate']][:REWRITE_RESUME_CHARS]}"
+        )
+        async with semaphore:
+            with capture_output() as buf:
+                await runner.run_mission(mission, user_id=user_id, session_id=f"screen_{uuid.uuid4().hex[:8]}")
+        row["suggested_rewrite_summary"] = _final_response(buf.getvalue()) or "(No suggestion returned.)"
+
+    await asyncio.gather(*(one(row) for row in report["rows"][:top_k]))
+    return report
+
+
+def report_to_csv(report: Dict[str, Any]) -> str:
+    columns = ["rank", "candidate", "match_score", "required_skills_found", "skill_gaps_flagged",
+               "preferred_missing", "ats_risk_flags", "suggested_rewrite_summary"]
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for row in report["rows"]:
+        writer.writerow({k: "; ".join(v) if isinstance(v, list) else v for k, v in row.items()})
+    return out.getvalue()
+
+
+# --- 5. CLI ---
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch-score resumes (directory or .zip) against one job description.")
+    parser.add_argument("--jd", required=True, help="Path to the job description text file.")
+    parser.add_argument("--resumes", required=True, help="Directory or .zip archive of resumes (.txt/.md/.pdf/.docx).")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="Candidates that get LLM rewrite suggestions.")
+    parser.add_argument("--rewrite", action="store_true", help="Run ResumeTailorAgent for the top-k candidates.")
+    parser.add_argument("--csv", help="Write the ranked table to this CSV file.")
+    args = parser.parse_args()
+
+    with open(args.jd, "r", encoding="utf-8") as f:
+        jd_text = f.read()
+    report = screen_resumes(iter_resume_sources(args.resumes), jd_text)
+    if args.rewrite:
+        asyncio.run(suggest_rewrites(report, jd_text, top_k=args.top_k))
+
+    print(f"JD required: {', '.join(report['jd_required'])} | preferred: {', '.join(report['jd_preferred']) or '-'}")
+    for row in report["rows"][:max(args.top_k, 20)]:
+        print(f"{row['rank']:>3}. {row['match_score']:>3}  {row['candidate']}  gaps: {', '.join(row['skill_gaps_flagged']) or '-'}")
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            f.write(report_to_csv(report))
+        print(f"Ranked table written to {args.csv}")
+
+
+print("Batch Screening module loaded.")
+
+if __name__ == "__main__":
+    main()
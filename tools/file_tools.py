@@ -5,6 +5,9 @@ import os
 import json
 from typing import Dict, Any, Union, List
 
+from core.aio import offload_to_thread
+from core.payload_store import inline_or_handle
+
 # --- Configuration: File Locations ---
 # This path must be correct relative to the location where runner.py is executed.
 RESUME_FILE_PATH = os.path.join("data", "resume.txt")
@@ -35,6 +38,8 @@ def load_user_resume() -> Dict[str, Union[str, int]]:
     
     Returns:
         A dictionary containing the status, content (full resume text), and character count.
+        Very long resumes come back as a 'handle' with a summary and preview instead of
+        'content'; use the 'read_chunk' tool to page through them.
     """
     if not os.path.exists(RESUME_FILE_PATH):
         return {
@@ -59,7 +64,7 @@ def load_user_resume() -> Dict[str, Union[str, int]]:
             
         return {
             "status": "success",
-            "content": resume_content,
+            **inline_or_handle(resume_content, kind="resume"), # 'content' or a paginated handle
             "char_count": len(resume_content)
         }
         
@@ -118,4 +123,11 @@ def get_layoff_context(user_id: str = "ds_student_user") -> str:
     print(f"TOOL_OUTPUT: Retrieved layoff context.")
     return layoff_context
 
+# --- Async Variants for the Agent Tool Catalog ---
+# The blocking open()/read()/write() calls run in a worker thread, so a large resume or
+# artifact never stalls the shared event loop (and every other in-flight mission).
+# Names and signatures are unchanged, so the model sees the same tool declarations.
+load_user_resume_async = offload_to_thread(load_user_resume)
+save_artifact_async = offload_to_thread(save_artifact)
+
 print("File Tools module loaded and ready for agent integration.")
\ No newline at end of file
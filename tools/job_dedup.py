@@ -0,0 +1,170 @@
+# tools/job_dedup.py
+# Near-duplicate job posting detection (MinHash + LSH) in front of the job listing tools
+
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# --- Configuration ---
+NUM_PERMUTATIONS = 64          # MinHash signature length
+LSH_BANDS = 16                 # 16 bands x 4 rows: candidate pairs start around Jaccard ~0.5
+SIMILARITY_THRESHOLD = 0.7     # Estimated Jaccard needed to merge two postings into one cluster
+SHINGLE_SIZE = 3               # Word n-grams
+MAX_CLUSTERS = 50_000          # Oldest clusters are evicted beyond this (bounded memory)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1337)  # Fixed seed: signatures are comparable across runs and processes
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+_ROWS_PER_BAND = NUM_PERMUTATIONS // LSH_BANDS
+
+
+def posting_text(posting: Dict[str, Any]) -> str:
+    """The fields that identify a job: title, company, location and description/snippet/skills."""
+    skills = posting.get("skills") or []
+    parts = [
+        posting.get("title", ""),
+        posting.get("company", ""),
+        posting.get("location", ""),
+        posting.get("snippet", "") or posting.get("description", ""),
+        " ".join(skills) if isinstance(skills, list) else str(skills),
+    ]
+    return " ".join(str(p) for p in parts if p)
+
+
+def copy_key(posting: Dict[str, Any], source: str, text: str) -> Tuple[str, str]:
+    """Identity of one physical copy: (source, posting id/url), or (source, exact-text hash) when it has neither."""
+    for field in ("id", "url", "link"):
+        if posting.get(field):
+            return source, f"{field}:{posting[field]}"
+    return source, "sha1:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    words = re.findall(r"[a-z0-9+#/]+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(shingle_set: set) -> Tuple[int, ...]:
+    if not shingle_set:
+        return tuple([_MAX_HASH] * NUM_PERMUTATIONS)
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingle_set]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimated_jaccard(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERMUTATIONS
+
+
+class JobDeduplicator:
+    """
+    Incremental near-duplicate clustering of job postings.
+
+    Each posting gets a MinHash signature; LSH band buckets return only the handful of
+    clusters that could match, so adding a posting costs O(bands) lookups instead of a
+    scan over everything seen so far. Matching postings join an existing cluster, which
+    keeps one canonical representative (the most detailed copy) plus every source it
+    was seen on. Copies are counted by identity (see copy_key), so re-querying the same
+    board does not inflate copies_seen or duplicates_collapsed.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_clusters: int = MAX_CLUSTERS):
+        self.threshold = threshold
+        self.max_clusters = max_clusters
+        self._clusters: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.seen = 0
+        self.duplicates = 0
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for band in range(LSH_BANDS):
+            yield band, signature[band * _ROWS_PER_BAND:(band + 1) * _ROWS_PER_BAND]
+
+    def _find_match(self, signature: Tuple[int, ...]) -> Optional[str]:
+        best_id, best_score = None, self.threshold
+        candidates = {cid for key in self._bands(signature) for cid in self._buckets.get(key, ())}
+        for cid in candidates:
+            score = estimated_jaccard(signature, self._clusters[cid]["signature"])
+            if score >= best_score:
+                best_id, best_score = cid, score
+        return best_id
+
+    def _evict_oldest_locked(self) -> None:
+        cid, cluster = self._clusters.popitem(last=False)
+        for key in self._bands(cluster["signature"]):
+            bucket = self._buckets.get(key)
+            if bucket and cid in bucket:
+                bucket.remove(cid)
+                if not bucket:
+                    del self._buckets[key]
+
+    def add(self, posting: Dict[str, Any], source: str = "unknown") -> Tuple[str, bool]:
+        """
+        Adds one posting.
+
+        Returns:
+            (cluster id, True if the posting started a new cluster / False if it matched one)
+        """
+        text = posting_text(posting)
+        signature = minhash_signature(shingles(text))
+        key = copy_key(posting, source, text)
+        with self._lock:
+            self.seen += 1
+            cid = self._find_match(signature)
+            if cid is not None:
+                cluster = self._clusters[cid]
+                if key in cluster["copy_keys"]:
+                    return cid, False  # The same copy seen again (e.g. a repeated query)
+                cluster["copy_keys"].add(key)
+                self.duplicates += 1
+                if source not in cluster["sources"]:
+                    cluster["sources"].append(source)
+                # The most detailed copy becomes the canonical representative.
+                if len(text) > len(posting_text(cluster["canonical"])):
+                    cluster["canonical"] = dict(posting)
+                return cid, False
+
+            cid = f"JOB-{self._next_id:06d}"
+            self._next_id += 1
+            self._clusters[cid] = {"canonical": dict(posting), "signature": signature, "sources": [source], "copy_keys": {key}}
+            for key in self._bands(signature):
+                self._buckets.setdefault(key, []).append(cid)
+            if len(self._clusters) > self.max_clusters:
+                self._evict_oldest_locked()
+            return cid, True
+
+    def dedupe(self, postings: List[Dict[str, Any]], source: str = "unknown") -> List[Dict[str, Any]]:
+        """
+        Ingests a batch and returns one canonical posting per distinct job in the batch,
+        annotated with its cluster id, all known sources and the number of copies seen.
+        """
+        order: List[str] = []
+        for posting in postings:
+            cid, _ = self.add(posting, source=posting.get("source", source))
+            if cid not in order:
+                order.append(cid)
+        with self._lock:
+            return [
+                dict(self._clusters[cid]["canonical"], cluster_id=cid,
+                     sources=list(self._clusters[cid]["sources"]), copies_seen=len(self._clusters[cid]["copy_keys"]))
+                for cid in order if cid in self._clusters
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"postings_seen": self.seen, "duplicates_collapsed": self.duplicates, "clusters": len(self._clusters)}
+
+
+# Shared deduplicator for all job listing tools (postings repeat across boards and calls)
+job_deduplicator = JobDeduplicator()
+
+print("Job Dedup module loaded.")
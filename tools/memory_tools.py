@@ -1,19 +1,94 @@
 # tools/memory_tools.py
+# Helpers that write user documents into the Runner's memory service (searched by load_memory)
 
-import os
-from google.adk.memory import InMemoryMemoryService
+from typing import List
 
-# Initialize a memory service instance (local DB)
-memory_service = InMemoryMemoryService()
+from google.adk.events import Event
+from google.adk.memory.base_memory_service import BaseMemoryService
+from google.adk.sessions import Session
+from google.adk.tools.load_memory_tool import LoadMemoryTool
+from google.genai import types
 
-def save_memory(key: str, value: str):
-    """Save a memory item under a specific key."""
-    memory_service.save_memory(user_id="DS_Candidate_123", key=key, value=value)
-    return f"Memory stored under key: {key}"
+from core.single_flight import SingleFlight, normalize_request
 
-def load_memory(key: str):
-    """Load a memory item by key."""
-    memory_item = memory_service.load_memory(user_id="DS_Candidate_123", key=key)
-    if memory_item:
-        return memory_item
-    return f"No memory found for key: {key}"
+# NOTE: there is deliberately no memory service instance here. The Runner's memory service
+# (runner.memory_service) is the only one load_memory searches, so every writer - the resume
+# prefetcher, init_memory.py via the memory store - targets that one.
+
+
+# --- load_memory with Single-Flight Coalescing ---
+
+memory_flight = SingleFlight("load_memory")
+
+
+class CoalescedLoadMemoryTool(LoadMemoryTool):
+    """
+    The built-in load_memory tool, but identical concurrent searches (same memory service,
+    app, user and normalized query) share one memory search - e.g. several sub-agents of one
+    mission all retrieving 'user:resume' at the start of their turn. Same tool name and declaration.
+    """
+
+    async def run_async(self, *, args, tool_context):
+        # Runners with different memory services (tests, evaluate.py, a second app) must not share results
+        memory_id = id(tool_context._invocation_context.memory_service)
+        key = normalize_request(memory_id, tool_context.session.app_name, tool_context.user_id, args.get("query", ""))
+        return await memory_flight.do(key, lambda: super(CoalescedLoadMemoryTool, self).run_async(args=args, tool_context=tool_context))
+
+
+# Drop-in replacement for google.adk.tools.load_memory
+load_memory = CoalescedLoadMemoryTool()
+
+
+# --- Document Indexing into the Runner's Memory Service (Day 3 Memory) ---
+
+MEMORY_CHUNK_CHARS = 1_500  # load_memory returns whole events, so documents are split into small passages
+
+
+def chunk_text(text: str, chunk_chars: int = MEMORY_CHUNK_CHARS) -> List[str]:
+    """Splits on paragraph boundaries into passages of at most ~chunk_chars characters."""
+    chunks: List[str] = []
+    current = ""
+    for paragraph in (p.strip() for p in text.split("\n\n")):
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        while len(paragraph) > chunk_chars:
+            chunks.append(paragraph[:chunk_chars])
+            paragraph = paragraph[chunk_chars:]
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def index_user_document(
+    memory: BaseMemoryService, app_name: str, user_id: str, doc_key: str, text: str
+) -> int:
+    """
+    Writes a user document (e.g. doc_key='user:resume') into the memory service as one
+    pseudo-session of passage events, so the load_memory tool can find it.
+
+    Re-indexing the same doc_key replaces the previous version. Returns the number of passages.
+    """
+    events = document_events(doc_key, chunk_text(text))
+    session = Session(id=document_session_id(doc_key), app_name=app_name, user_id=user_id, events=events)
+    await memory.add_session_to_memory(session)
+    return len(events)
+
+
+def document_session_id(doc_key: str) -> str:
+    return f"doc_{doc_key}"
+
+
+def document_events(doc_key: str, chunks: List[str]) -> List[Event]:
+    """One memory event per passage, prefixed with the doc key so search hits show their source."""
+    return [
+        Event(
+            author="user",
+            invocation_id=document_session_id(doc_key),
+            content=types.Content(role="user", parts=[types.Part(text=f"[{doc_key}] {chunk}")]),
+        )
+        for chunk in chunks
+    ]
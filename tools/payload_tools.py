@@ -0,0 +1,36 @@
+# tools/payload_tools.py
+# Paginated access to large tool results that were returned as handles instead of inline text
+
+from typing import Any, Dict
+
+from google.adk.tools.tool_context import ToolContext
+
+from core.payload_store import DEFAULT_CHUNK_CHARS, payload_store
+
+# --- Tools for Large Payloads (Day 2 Concept) ---
+
+def read_chunk(handle: str, tool_context: ToolContext, offset: int = 0, length: int = DEFAULT_CHUNK_CHARS) -> Dict[str, Any]:
+    """
+    [TOOL] Reads one page of a large result (full resume, job list, long sub-agent output)
+    that another tool returned as a handle instead of inlining it.
+
+    Only call this when the summary/preview that came with the handle is not enough.
+
+    Args:
+        handle: The handle id from the earlier tool result (e.g., 'ref_3f2a9c...').
+        offset: Character offset to start reading from (0 for the first page).
+        length: Number of characters to read.
+        tool_context: Injected by ADK; handles resolve only for the calling user.
+
+    Returns:
+        A dictionary with the status, the page content, the total size and 'next_offset'
+        (pass it as offset to read the next page; None when the end is reached).
+    """
+    page = payload_store.read(handle, offset=offset, length=min(int(length), 4 * DEFAULT_CHUNK_CHARS), user_id=tool_context.user_id)
+    if page is None:
+        return {"status": "error", "message": f"Unknown handle '{handle}'."}
+    print(f"TOOL_OUTPUT: Read {len(page['content'])} chars of {handle} at offset {page['offset']}.")
+    return dict(page, status="success")
+
+
+print("Payload Tools module loaded.")
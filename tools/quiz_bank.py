@@ -0,0 +1,196 @@
+# tools/quiz_bank.py
+# Topic-indexed quiz bank: serves repeat quiz requests locally instead of regenerating them
+
+import difflib
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# --- Configuration: File Locations ---
+# Same convention as tools/file_tools.py: paths are relative to where runner.py is executed.
+QUIZ_SEED_PATH = os.path.join("data", "quiz_bank.json")      # Curated questions shipped with the repo (read-only)
+QUIZ_BANK_PATH = os.path.join("output", "quiz_bank.json")    # Questions generated at runtime
+FUZZY_MATCH_CUTOFF = 0.82  # difflib ratio needed to treat a typo/variant as a known topic
+
+# Common shorthands and variants -> canonical topic
+TOPIC_ALIASES: Dict[str, str] = {
+    "gd": "gradient descent",
+    "sgd": "gradient descent",
+    "stochastic gradient descent": "gradient descent",
+    "mini batch gradient descent": "gradient descent",
+    "ab testing": "a/b testing",
+    "a b testing": "a/b testing",
+    "ab tests": "a/b testing",
+    "split testing": "a/b testing",
+    "hypothesis testing for experiments": "a/b testing",
+    "gbm": "gradient boosting",
+    "gbdt": "gradient boosting",
+    "boosting": "gradient boosting",
+    "gradient boosted trees": "gradient boosting",
+    "xgboost": "gradient boosting",
+    "lightgbm": "gradient boosting",
+}
+
+# Filler words users wrap around a topic ("a quick quiz on the basics of SGD")
+_FILLER = re.compile(r"(?<!/)\b(quiz|quizzes|questions?|on|about|the|basics?|of|intro(duction)?( to)?|a|an|quick|short)\b(?!/)")
+
+
+def normalize_topic(topic: str) -> str:
+    """Lower-cases, strips punctuation/filler words and resolves known aliases."""
+    text = topic.lower().replace("&", " and ").replace("-", " ").replace("_", " ")
+    text = re.sub(r"[^a-z0-9/ ]+", " ", text)
+    text = _FILLER.sub(" ", text)
+    text = " ".join(text.split())
+    if text.endswith("s") and text[:-1] in TOPIC_ALIASES.values():
+        text = text[:-1]
+    return TOPIC_ALIASES.get(text, text)
+
+
+def _question_id(question_text: str) -> str:
+    return hashlib.sha1(" ".join(question_text.lower().split()).encode("utf-8")).hexdigest()[:12]
+
+
+class QuizBank:
+    """
+    JSON-backed store of quiz questions indexed by normalized topic. The seed file is
+    loaded first and never written; generated questions are persisted to `path` only.
+
+    Layout of both files:
+        {"<topic>": {"aliases": [...], "questions": [{"id", "question", "options",
+                     "answer", "explanation", "source", "created_at"}, ...]}}
+    """
+
+    def __init__(self, path: str = QUIZ_BANK_PATH, seed_path: Optional[str] = QUIZ_SEED_PATH):
+        self.path = path
+        self.seed_path = seed_path
+        self._lock = threading.Lock()
+        self._topics: Dict[str, Dict[str, Any]] = {}
+        self._served: Dict[str, Dict[str, List[str]]] = {}  # user -> topic -> served ids (fallback when no session state)
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        for path in (self.seed_path, self.path):
+            if not path or not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for name, stored in json.load(f).items():
+                    entry = self._topics.setdefault(name, {"aliases": [], "questions": []})
+                    entry["aliases"] += [a for a in stored.get("aliases", []) if a not in entry["aliases"]]
+                    known = {q["id"] for q in entry["questions"]}
+                    entry["questions"] += [q for q in stored.get("questions", []) if q["id"] not in known]
+
+    def _persist_locked(self) -> None:
+        # Write-then-rename so a crash never leaves a half-written bank behind.
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._topics, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def resolve(self, topic: str) -> Optional[str]:
+        """Maps a free-form topic to a bank key (exact, alias or fuzzy match)."""
+        key = normalize_topic(topic)
+        # add() mutates the index from concurrent missions; match against a snapshot
+        with self._lock:
+            aliases = {name: list(entry.get("aliases", [])) for name, entry in self._topics.items()}
+        if key in aliases:
+            return key
+        for name, names in aliases.items():
+            if key in names:
+                return name
+        candidates = list(aliases) + [a for names in aliases.values() for a in names]
+        match = difflib.get_close_matches(key, candidates, n=1, cutoff=FUZZY_MATCH_CUTOFF)
+        if not match:
+            return None
+        if match[0] in aliases:
+            return match[0]
+        return next(name for name, names in aliases.items() if match[0] in names)
+
+    def sample(self, topic: str, num_questions: int, served_ids: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Draws num_questions questions the user has not seen yet.
+
+        Returns:
+            The questions, or None on a miss (unknown topic or not enough unseen questions left).
+        """
+        key = self.resolve(topic)
+        seen = set(served_ids)
+        with self._lock:
+            unseen = [q for q in self._topics[key]["questions"] if q["id"] not in seen] if key is not None else []
+            if len(unseen) < num_questions or key is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return random.sample(unseen, num_questions)
+
+    def add(self, topic: str, questions: List[Dict[str, Any]], source: str = "llm") -> int:
+        """Stores generated questions (deduplicated by question text). Returns how many were new."""
+        key = self.resolve(topic) or normalize_topic(topic)
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self._lock:
+            entry = self._topics.setdefault(key, {"aliases": [], "questions": []})
+            original = " ".join(topic.lower().split())
+            if original != key and original not in entry["aliases"]:
+                entry["aliases"].append(original)
+            known = {q["id"] for q in entry["questions"]}
+            added = 0
+            for q in questions:
+                text = str(q.get("question", "")).strip()
+                if not text or _question_id(text) in known:
+                    continue
+                entry["questions"].append({
+                    "id": _question_id(text),
+                    "question": text,
+                    "options": [str(o) for o in q.get("options", [])],
+                    "answer": str(q.get("answer", "")),
+                    "explanation": str(q.get("explanation", "")),
+                    "source": source,
+                    "created_at": now,
+                })
+                known.add(_question_id(text))
+                added += 1
+            if added:
+                self._persist_locked()
+            return added
+
+    def served_ids(self, user_id: str, topic_key: str) -> List[str]:
+        return self._served.setdefault(user_id, {}).setdefault(topic_key, [])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "topics": {name: len(entry["questions"]) for name, entry in self._topics.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def format_quiz(topic: str, questions: List[Dict[str, Any]]) -> str:
+    """Renders bank questions as the Markdown quiz the tutor presents."""
+    lines = [f"### Quiz: {topic.title()}", ""]
+    for i, q in enumerate(questions, 1):
+        lines.append(f"**Q{i}. {q['question']}**")
+        for letter, option in zip("ABCDEFGH", q.get("options", [])):
+            lines.append(f"- {letter}) {option}")
+        lines.append("")
+    lines.append("<details><summary>Answers</summary>")
+    lines.append("")
+    for i, q in enumerate(questions, 1):
+        explanation = f" - {q['explanation']}" if q.get("explanation") else ""
+        lines.append(f"{i}. {q['answer']}{explanation}")
+    lines.append("</details>")
+    return "\n".join(lines)
+
+
+# Shared bank instance used by the DS Tutor Agent tools
+quiz_bank = QuizBank()
+
+print("Quiz Bank module loaded.")
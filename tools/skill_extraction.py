@@ -0,0 +1,91 @@
+# tools/skill_extraction.py
+# Local skill extraction and bitset encoding for resume/JD matching (no LLM round trip)
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# The study planner's skill graph is the canonical DS/ML vocabulary; screening adds the
+# few tool skills that recruiters filter on but that have no place in the study DAG.
+from tools.study_planner import SKILL_ALIASES, SKILL_GRAPH
+
+EXTRA_SKILLS: Dict[str, List[str]] = {
+    "excel": ["ms excel", "microsoft excel", "spreadsheets"],
+    "r": ["r programming", "rstudio", "tidyverse"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "airflow": ["apache airflow"],
+    "dbt": [],
+    "snowflake": [],
+    "bigquery": ["big query"],
+    "communication": ["stakeholder management", "presentation skills"],
+    # Recruiters filter on these by name, so they are not folded into their study-graph node
+    "machine learning": ["ml"],
+    "numpy": [],
+    "tableau": [],
+    "spark": ["pyspark", "apache spark"],
+}
+
+# Surface form -> canonical skill
+_SURFACE_FORMS: Dict[str, str] = {}
+for _skill in SKILL_GRAPH:
+    _SURFACE_FORMS[_skill] = _skill
+for _alias, _skill in SKILL_ALIASES.items():
+    _SURFACE_FORMS[_alias] = _skill
+for _skill, _aliases in EXTRA_SKILLS.items():
+    _SURFACE_FORMS[_skill] = _skill
+    for _alias in _aliases:
+        _SURFACE_FORMS[_alias] = _skill
+_SURFACE_FORMS.update({"a/b tests": "a/b testing", "machine learning ops": "mlops"})
+
+# Canonical skill -> bit position (stable order, so masks are comparable across calls)
+SKILLS: Tuple[str, ...] = tuple(sorted(set(_SURFACE_FORMS.values())))
+SKILL_BITS: Dict[str, int] = {skill: i for i, skill in enumerate(SKILLS)}
+
+# One alternation, longest forms first ("gradient boosting" wins over "boosting").
+# Single-letter skills ("r") only match as a standalone token, e.g. "Python, R, SQL".
+_SKILL_PATTERN = re.compile(
+    r"(?<![a-z0-9+#&'])(" + "|".join(re.escape(f) for f in sorted(_SURFACE_FORMS, key=len, reverse=True)) + r")(?![a-z0-9+#&'])"
+)
+
+# JD lines with these markers list nice-to-have skills (weighted lower than required ones)
+_PREFERRED_MARKERS = re.compile(r"\b(preferred|nice to have|nice-to-have|bonus|a plus|desirable|optional)\b", re.I)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().replace("-", " ").replace("_", " ").split())
+
+
+def extract_skills(text: str) -> FrozenSet[str]:
+    """Canonical skills mentioned anywhere in the text."""
+    return frozenset(_SURFACE_FORMS[m] for m in _SKILL_PATTERN.findall(_normalize(text)))
+
+
+def to_mask(skills: Iterable[str]) -> int:
+    mask = 0
+    for skill in skills:
+        bit = SKILL_BITS.get(skill)
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def from_mask(mask: int) -> List[str]:
+    return [skill for skill, bit in SKILL_BITS.items() if mask >> bit & 1]
+
+
+def extract_jd_requirements(jd_text: str) -> Tuple[int, int]:
+    """
+    Splits the JD's skills into required and preferred bitmasks.
+
+    A skill mentioned on any line without a 'preferred/nice to have/bonus' marker counts as required.
+    """
+    required, preferred = 0, 0
+    for line in jd_text.splitlines():
+        mask = to_mask(extract_skills(line))
+        if _PREFERRED_MARKERS.search(line):
+            preferred |= mask
+        else:
+            required |= mask
+    return required, preferred & ~required
+
+
+print("Skill Extraction module loaded.")
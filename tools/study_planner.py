@@ -0,0 +1,193 @@
+# tools/study_planner.py
+# Local DS/ML skill-prerequisite graph and a deterministic study-plan planner
+
+import difflib
+import heapq
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# --- Skill DAG: prerequisites and estimated study hours ---
+# Hours are rough focused-study estimates for an interview-ready working knowledge.
+SKILL_GRAPH: Dict[str, Dict[str, Any]] = {
+    "python":                   {"hours": 8,  "prereqs": []},
+    "sql":                      {"hours": 6,  "prereqs": []},
+    "git":                      {"hours": 2,  "prereqs": []},
+    "probability":              {"hours": 6,  "prereqs": []},
+    "linear algebra":           {"hours": 6,  "prereqs": []},
+    "calculus":                 {"hours": 4,  "prereqs": []},
+    "pandas":                   {"hours": 5,  "prereqs": ["python"]},
+    "data visualization":       {"hours": 3,  "prereqs": ["pandas"]},
+    "statistics":               {"hours": 6,  "prereqs": ["probability"]},
+    "hypothesis testing":       {"hours": 4,  "prereqs": ["statistics"]},
+    "a/b testing":              {"hours": 5,  "prereqs": ["hypothesis testing"]},
+    "linear regression":        {"hours": 4,  "prereqs": ["statistics", "linear algebra"]},
+    "gradient descent":         {"hours": 3,  "prereqs": ["calculus", "linear algebra"]},
+    "logistic regression":      {"hours": 3,  "prereqs": ["linear regression", "gradient descent"]},
+    "feature engineering":      {"hours": 4,  "prereqs": ["pandas"]},
+    "model evaluation":         {"hours": 4,  "prereqs": ["logistic regression"]},
+    "decision trees":           {"hours": 3,  "prereqs": ["model evaluation"]},
+    "random forests":           {"hours": 2,  "prereqs": ["decision trees"]},
+    "gradient boosting":        {"hours": 4,  "prereqs": ["decision trees", "gradient descent"]},
+    "clustering":               {"hours": 3,  "prereqs": ["linear algebra", "pandas"]},
+    "dimensionality reduction": {"hours": 3,  "prereqs": ["linear algebra"]},
+    "time series":              {"hours": 6,  "prereqs": ["statistics", "pandas"]},
+    "neural networks":          {"hours": 6,  "prereqs": ["gradient descent", "logistic regression"]},
+    "deep learning":            {"hours": 10, "prereqs": ["neural networks", "python"]},
+    "nlp":                      {"hours": 6,  "prereqs": ["deep learning"]},
+    "transformers":             {"hours": 6,  "prereqs": ["nlp"]},
+    "big data":                 {"hours": 6,  "prereqs": ["sql", "python"]},
+    "docker":                   {"hours": 3,  "prereqs": []},
+    "cloud":                    {"hours": 6,  "prereqs": ["docker"]},
+    "mlops":                    {"hours": 6,  "prereqs": ["cloud", "model evaluation", "git"]},
+}
+
+# Tool/library names and variants that map onto a graph node
+SKILL_ALIASES: Dict[str, str] = {
+    "stats": "statistics",
+    "numpy": "python",
+    "matplotlib": "data visualization",
+    "seaborn": "data visualization",
+    "tableau": "data visualization",
+    "power bi": "data visualization",
+    "visualization": "data visualization",
+    "ab testing": "a/b testing",
+    "experimentation": "a/b testing",
+    "regression": "linear regression",
+    "classification": "logistic regression",
+    "sgd": "gradient descent",
+    "optimization": "gradient descent",
+    "xgboost": "gradient boosting",
+    "lightgbm": "gradient boosting",
+    "boosting": "gradient boosting",
+    "cross validation": "model evaluation",
+    "metrics": "model evaluation",
+    "k means": "clustering",
+    "pca": "dimensionality reduction",
+    "forecasting": "time series",
+    "pytorch": "deep learning",
+    "tensorflow": "deep learning",
+    "keras": "deep learning",
+    "llm": "transformers",
+    "llms": "transformers",
+    "bert": "transformers",
+    "spark": "big data",
+    "pyspark": "big data",
+    "hadoop": "big data",
+    "gcp": "cloud",
+    "aws": "cloud",
+    "azure": "cloud",
+    "cloud deployment": "cloud",
+    "kubernetes": "mlops",
+    "kubeflow": "mlops",
+    "model deployment": "mlops",
+}
+
+FUZZY_MATCH_CUTOFF = 0.8
+
+
+def resolve_skill(name: str) -> Optional[str]:
+    """Maps a free-form skill name (from a gap list or resume) to a node of SKILL_GRAPH."""
+    key = " ".join(re.sub(r"[^a-z0-9/ ]+", " ", name.lower().replace("-", " ")).split())
+    if key in SKILL_GRAPH:
+        return key
+    if key in SKILL_ALIASES:
+        return SKILL_ALIASES[key]
+    match = difflib.get_close_matches(key, list(SKILL_GRAPH) + list(SKILL_ALIASES), n=1, cutoff=FUZZY_MATCH_CUTOFF)
+    if not match:
+        return None
+    return SKILL_ALIASES.get(match[0], match[0])
+
+
+def prerequisite_closure(targets: Iterable[str], known: Set[str] = frozenset()) -> Set[str]:
+    """All target skills plus their transitive prerequisites, minus skills already known."""
+    closure: Set[str] = set()
+    stack = [t for t in targets if t not in known]
+    while stack:
+        skill = stack.pop()
+        if skill in closure:
+            continue
+        closure.add(skill)
+        stack.extend(p for p in SKILL_GRAPH[skill]["prereqs"] if p not in known and p not in closure)
+    return closure
+
+
+def topological_order(skills: Set[str]) -> List[str]:
+    """Kahn's algorithm restricted to 'skills'; ties break alphabetically for a stable plan."""
+    indegree = {s: sum(1 for p in SKILL_GRAPH[s]["prereqs"] if p in skills) for s in skills}
+    dependents: Dict[str, List[str]] = {s: [] for s in skills}
+    for s in skills:
+        for p in SKILL_GRAPH[s]["prereqs"]:
+            if p in skills:
+                dependents[p].append(s)
+    ready = [s for s, d in indegree.items() if d == 0]
+    heapq.heapify(ready)
+    order: List[str] = []
+    while ready:
+        skill = heapq.heappop(ready)
+        order.append(skill)
+        for nxt in dependents[skill]:
+            indegree[nxt] -= 1
+            if indegree[nxt] == 0:
+                heapq.heappush(ready, nxt)
+    if len(order) != len(skills):
+        raise ValueError("SKILL_GRAPH contains a cycle.")
+    return order
+
+
+def plan_study(
+    skill_gaps: Iterable[str],
+    days: int = 14,
+    hours_per_day: float = 2.0,
+    known_skills: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """
+    Computes a study plan: prerequisite closure of the gaps, topologically ordered and
+    packed into daily time budgets (a skill may continue over several days).
+
+    Returns:
+        A dictionary with the ordered skills, the per-day schedule, skills that did not fit
+        into the budget and gap names that are not in the skill graph.
+    """
+    targets, unknown = [], []
+    for gap in skill_gaps:
+        resolved = resolve_skill(gap)
+        (targets if resolved else unknown).append(resolved or gap)
+    known = {k for k in (resolve_skill(s) for s in known_skills) if k} - set(targets)
+
+    order = topological_order(prerequisite_closure(targets, known))
+    schedule: List[Dict[str, Any]] = [{"day": d + 1, "hours": 0.0, "items": []} for d in range(days)]
+    unscheduled: List[str] = []
+    day, free = 0, hours_per_day
+    for skill in order:
+        remaining = float(SKILL_GRAPH[skill]["hours"])
+        parts: List[Dict[str, Any]] = []
+        while remaining > 1e-9 and day < days:
+            chunk = min(remaining, free)
+            parts.append({"day": day, "skill": skill, "hours": round(chunk, 2)})
+            remaining -= chunk
+            free -= chunk
+            if free <= 1e-9:
+                day, free = day + 1, hours_per_day
+        for i, part in enumerate(parts, 1):
+            item = {"skill": part["skill"], "hours": part["hours"], "is_gap": skill in targets}
+            if len(parts) > 1:
+                item["part"] = f"{i}/{len(parts)}"
+            schedule[part["day"]]["items"].append(item)
+            schedule[part["day"]]["hours"] = round(schedule[part["day"]]["hours"] + part["hours"], 2)
+        if remaining > 1e-9:
+            unscheduled.append(skill)
+
+    total_hours = sum(SKILL_GRAPH[s]["hours"] for s in order)
+    return {
+        "status": "success" if not unscheduled else "over_budget",
+        "skill_order": order,
+        "schedule": [d for d in schedule if d["items"]],
+        "total_hours": total_hours,
+        "capacity_hours": days * hours_per_day,
+        "unscheduled_skills": unscheduled,
+        "unknown_gaps": unknown,
+        "skipped_known_skills": sorted(known),
+    }
+
+
+print("Study Planner module loaded.")
@@ -7,6 +7,14 @@ import json
 # Import the ADK built-in tool for easy web search access (Day 1 concept)
 from google.adk.tools import google_search
 
+# Near-duplicate collapsing for job listings (postings repeat across boards)
+from tools.job_dedup import job_deduplicator
+# Long result lists come back as a paginated handle instead of a multi-hundred-KB string
+from core.payload_store import handle_note
+# Identical searches already in flight are awaited instead of repeated
+from core.aio import offload_to_thread
+from core.single_flight import SingleFlight, coalesce_tool
+
 # Load API keys via os.environ (set by runner.py from .env file)
 # SERPAPI_API_KEY = os.environ.get("SERPAPI_API_KEY")
 
@@ -59,7 +67,16 @@ def query_live_job_listings(role: str, location: str, max_age_days: int = 7) ->
         {"title": "Junior Data Scientist (Entry-Level)", "company": "Global Analytics", "skills": ["Python", "SQL", "Tableau"], "link": "link_1"},
         {"title": "ML Research Engineer (GCP Focus)", "company": "Cloud Innovators", "skills": ["PyTorch", "GCP", "Kubeflow"], "link": "link_2"},
     ]
-    print(f"TOOL_OUTPUT: Retrieved mock job listings for role: {role} in {location}")
-    return json.dumps(mock_jobs)
+    # Collapse near-identical postings before they reach ranking or the model
+    unique_jobs = job_deduplicator.dedupe(mock_jobs, source="live_listings")
+    print(f"TOOL_OUTPUT: Retrieved mock job listings for role: {role} in {location} ({len(mock_jobs) - len(unique_jobs)} duplicates collapsed)")
+    return handle_note(json.dumps(unique_jobs), kind="job_list")
+
+
+# --- Async, Coalesced Variants ---
+# Concurrent identical searches (same normalized query) share one call, e.g. a burst of
+# missions that all fall back to local trend search while the research agent is degraded.
+search_flight = SingleFlight("search_current_trends")
+search_current_trends_async = coalesce_tool(offload_to_thread(search_current_trends), search_flight)
 
 print("Web Tools module loaded and ready for agent integration.")
\ No newline at end of file